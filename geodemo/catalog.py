@@ -0,0 +1,475 @@
+"""A module cataloging the vector datasets of a data directory from their headers."""
+
+import os
+import re
+import json
+import struct
+import itertools
+import threading
+
+FORMATS = {
+    ".shp": "shapefile",
+    ".geojson": "geojson",
+    ".json": "geojson",
+    ".csv": "csv",
+}
+
+# Longitude and latitude column names recognized in CSV files
+XY_COLUMNS = [("longitude", "latitude"), ("lon", "lat"), ("lng", "lat"), ("x", "y")]
+
+CHUNK_SIZE = 1024 * 1024
+
+_NUMBER = r"-?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?"
+# An innermost array of two or three numbers, i.e. a position
+_POSITION = re.compile(rf"\[\s*({_NUMBER})\s*,\s*({_NUMBER})(?:\s*,\s*{_NUMBER})?\s*\]")
+_FEATURE = re.compile(r'"type"\s*:\s*"Feature"')
+_GEOMETRY_TYPE = re.compile(
+    r'"type"\s*:\s*"((?:Multi)?(?:Point|LineString|Polygon)|GeometryCollection)"'
+)
+
+
+def _shapefile_files(in_shp):
+    from .dbf import sidecar_file
+
+    return [
+        path
+        for path in (
+            sidecar_file(in_shp, ext)
+            for ext in (".shp", ".shx", ".dbf", ".prj", ".cpg")
+        )
+        if path is not None
+    ]
+
+
+def _to_wgs84(bbox, crs):
+    """Transforms a bounding box to longitude/latitude.
+
+    The coordinate system can be the WKT of a .prj file or a name such as
+    "EPSG:26918". Without one, the bounding box is kept if it is a valid
+    longitude/latitude extent.
+    """
+    if bbox is None:
+        return None
+    if crs is None:
+        minx, miny, maxx, maxy = bbox
+        valid = -180 <= minx <= maxx <= 180 and -90 <= miny <= maxy <= 90
+        return bbox if valid else None
+    try:
+        from pyproj import CRS, Transformer
+
+        crs = CRS.from_user_input(crs)
+        if crs.is_geographic:
+            return bbox
+        transformer = Transformer.from_crs(crs, "EPSG:4326", always_xy=True)
+        return list(transformer.transform_bounds(*bbox))
+    except Exception:
+        return None
+
+
+def _crs_name(prj):
+    """Returns the name of the coordinate system of a .prj file, its first quoted string."""
+    match = re.search(r'"([^"]+)"', prj or "")
+    return match.group(1) if match else None
+
+
+def _shapefile_header(in_shp):
+    """Reads the shape type, bounding box, record count, fields and CRS of a shapefile."""
+    import shapefile
+    from .dbf import sidecar_file, dbf_fields
+
+    with open(in_shp, "rb") as f:
+        header = f.read(100)
+    if len(header) < 100 or struct.unpack(">i", header[:4])[0] != 9994:
+        raise ValueError("The provided file is not a valid shapefile.")
+    shape_type = struct.unpack("<i", header[32:36])[0]
+    bbox = list(struct.unpack("<4d", header[36:68]))
+
+    count, fields = None, []
+    in_shx = sidecar_file(in_shp, ".shx")
+    if in_shx is not None:
+        with open(in_shx, "rb") as f:
+            # The file length is stored in 16-bit words; each index record takes 8 bytes
+            count = (struct.unpack(">i", f.read(28)[24:28])[0] * 2 - 100) // 8
+    in_dbf = sidecar_file(in_shp, ".dbf")
+    if in_dbf is not None:
+        n_records, _, _, dbf_field_list = dbf_fields(in_dbf)
+        fields = [[name, field_type] for name, field_type, _, _, _ in dbf_field_list]
+        if count is None:
+            count = n_records
+
+    prj = None
+    in_prj = sidecar_file(in_shp, ".prj")
+    if in_prj is not None:
+        with open(in_prj) as f:
+            prj = f.read()
+
+    return {
+        "format": "shapefile",
+        "geometry_type": shapefile.SHAPETYPE_LOOKUP.get(shape_type, str(shape_type)),
+        "count": count,
+        "bbox": bbox if count else None,
+        "wgs84_bbox": _to_wgs84(bbox, prj) if count else None,
+        "fields": fields,
+        "crs": _crs_name(prj),
+    }
+
+
+def _feature_fields(properties):
+    return [[k, type(v).__name__] for k, v in (properties or {}).items()]
+
+
+def _topojson_header(in_topojson):
+    """Describes a TopoJSON file, which is compact enough to be decoded."""
+    from .topology import feature
+
+    with open(in_topojson) as f:
+        data = feature(json.load(f))
+    features = data["features"]
+    bbox = None
+    if features:
+        from .spatial import SpatialIndex
+
+        bounds = SpatialIndex(data).bounds
+        bbox = [
+            float(bounds[:, 0].min()),
+            float(bounds[:, 1].min()),
+            float(bounds[:, 2].max()),
+            float(bounds[:, 3].max()),
+        ]
+    geometry_types = {f["geometry"]["type"] for f in features if f.get("geometry")}
+    return {
+        "format": "topojson",
+        "geometry_type": ", ".join(sorted(geometry_types)) or None,
+        "count": len(features),
+        "bbox": bbox,
+        "wgs84_bbox": _to_wgs84(bbox, None),
+        "fields": _feature_fields(features[0].get("properties")) if features else [],
+        "crs": None,
+    }
+
+
+def _geojson_header(in_geojson):
+    """Counts the features and computes the bounding box of a GeoJSON file in a streaming scan."""
+    count = 0
+    geometry_types = set()
+    fields = None
+    crs = None
+    xmin = ymin = float("inf")
+    xmax = ymax = float("-inf")
+    tail = ""
+
+    with open(in_geojson, encoding="utf-8", errors="replace") as f:
+        head = f.read(CHUNK_SIZE)
+        if re.search(r'"type"\s*:\s*"Topology"', head):
+            return _topojson_header(in_geojson)
+        # Files written before RFC 7946 may name their coordinate system
+        match = re.search(r'"crs"\s*:\s*\{.*?"name"\s*:\s*"([^"]+)"', head, re.S)
+        if match:
+            crs = match.group(1)
+
+        for chunk in itertools.chain([head], iter(lambda: f.read(CHUNK_SIZE), "")):
+            text = tail + chunk
+            # Only scan up to the last closing bracket so that no token is split
+            cut = text.rfind("]") + 1
+            text, tail = text[:cut], text[cut:]
+            if not text:
+                continue
+            count += len(_FEATURE.findall(text))
+            geometry_types.update(_GEOMETRY_TYPE.findall(text))
+            if fields is None:
+                match = re.search(r'"properties"\s*:\s*', text)
+                if match:
+                    try:
+                        properties = json.JSONDecoder().raw_decode(text, match.end())[0]
+                        fields = _feature_fields(properties)
+                    except ValueError:
+                        pass
+            positions = _POSITION.findall(text)
+            if positions:
+                xs = [float(x) for x, _ in positions]
+                ys = [float(y) for _, y in positions]
+                xmin, xmax = min(xmin, min(xs)), max(xmax, max(xs))
+                ymin, ymax = min(ymin, min(ys)), max(ymax, max(ys))
+
+    bbox = [xmin, ymin, xmax, ymax] if xmin <= xmax else None
+    return {
+        "format": "geojson",
+        "geometry_type": ", ".join(sorted(geometry_types)) or None,
+        "count": count,
+        "bbox": bbox,
+        "wgs84_bbox": _to_wgs84(bbox, crs),
+        "fields": fields or [],
+        "crs": crs,
+    }
+
+
+def _csv_header(in_csv):
+    """Reads the columns and counts the rows of a CSV file, with the extent of its coordinate columns."""
+    import pandas as pd
+
+    sample = pd.read_csv(in_csv, nrows=100)
+    columns = sample.columns.tolist()
+    with open(in_csv, "rb") as f:
+        count = sum(
+            chunk.count(b"\n") for chunk in iter(lambda: f.read(CHUNK_SIZE), b"")
+        )
+        if f.tell() > 0:
+            f.seek(-1, os.SEEK_END)
+            count += f.read(1) != b"\n"
+    # Rows quoted across several lines are counted once per line
+    count -= 1
+
+    bbox = None
+    lower = {c.lower(): c for c in columns}
+    for x, y in XY_COLUMNS:
+        if x in lower and y in lower:
+            xmin = ymin = float("inf")
+            xmax = ymax = float("-inf")
+            for chunk in pd.read_csv(
+                in_csv, usecols=[lower[x], lower[y]], chunksize=1000000
+            ):
+                xs = pd.to_numeric(chunk[lower[x]], errors="coerce")
+                ys = pd.to_numeric(chunk[lower[y]], errors="coerce")
+                xmin, xmax = min(xmin, xs.min()), max(xmax, xs.max())
+                ymin, ymax = min(ymin, ys.min()), max(ymax, ys.max())
+            if xmin <= xmax:
+                bbox = [float(xmin), float(ymin), float(xmax), float(ymax)]
+            break
+
+    return {
+        "format": "csv",
+        "geometry_type": "Point" if bbox is not None else None,
+        "count": max(count, 0),
+        "bbox": bbox,
+        "wgs84_bbox": _to_wgs84(bbox, None),
+        "fields": [[c, str(dtype)] for c, dtype in sample.dtypes.items()],
+        "crs": None,
+    }
+
+
+def read_header(in_file):
+    """Describes a vector dataset by reading only its headers.
+
+    Shapefiles are described from the headers of the .shp, .shx and .dbf files,
+    GeoJSON files from a streaming scan that never builds the features, and CSV
+    files from their header row and coordinate columns.
+
+    Args:
+        in_file (str): The file path to a shapefile, GeoJSON or CSV file.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+        ValueError: If the file format is not supported.
+
+    Returns:
+        dict: The format, geometry type, feature count, native and longitude/latitude bounding boxes, fields and coordinate system of the dataset.
+    """
+    if not os.path.exists(in_file):
+        raise FileNotFoundError("The provided file could not be found.")
+    ext = os.path.splitext(in_file)[1].lower()
+    if ext not in FORMATS:
+        raise ValueError(
+            f"The file format must be one of the following: {', '.join(FORMATS)}"
+        )
+
+    if ext == ".shp":
+        header = _shapefile_header(in_file)
+    elif ext == ".csv":
+        header = _csv_header(in_file)
+    else:
+        header = _geojson_header(in_file)
+    header["size"] = os.path.getsize(in_file)
+    return header
+
+
+class DataCatalog:
+    """An index of the vector datasets of a directory, built from their headers.
+
+    The index is persisted as a JSON file in the data directory. An entry is
+    reused as long as the modification times of the dataset files are unchanged,
+    so rebuilding the catalog only reads the headers of new or modified files.
+    The entry of a dataset whose headers cannot be read holds the error message
+    instead of the description.
+
+    Args:
+        data_dir (str): The data directory.
+        index_file (str, optional): The file path to the persisted index. Defaults to None, which uses .geodemo_catalog.json in the data directory.
+    """
+
+    def __init__(self, data_dir, index_file=None):
+
+        if not os.path.isdir(data_dir):
+            raise FileNotFoundError("The provided data directory could not be found.")
+
+        self.data_dir = os.path.abspath(data_dir)
+        if index_file is None:
+            index_file = os.path.join(self.data_dir, ".geodemo_catalog.json")
+        self.index_file = os.path.abspath(index_file)
+        self.entries = {}
+        # While build() runs, describe() and bounds() do not read headers
+        self.indexing = False
+        self._lock = threading.Lock()
+
+        if os.path.exists(self.index_file):
+            try:
+                with open(self.index_file) as f:
+                    self.entries = json.load(f)
+            except ValueError:
+                self.entries = {}
+
+    def _key(self, path):
+        return os.path.relpath(os.path.abspath(path), self.data_dir)
+
+    @staticmethod
+    def _mtime(path):
+        if path.lower().endswith(".shp"):
+            return max(os.path.getmtime(p) for p in _shapefile_files(path))
+        return os.path.getmtime(path)
+
+    def datasets(self):
+        """Lists the supported datasets in the data directory.
+
+        Returns:
+            list: The file paths, sorted.
+        """
+        paths = []
+        for root, dirs, files in os.walk(self.data_dir):
+            dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+            for name in sorted(files):
+                ext = os.path.splitext(name)[1].lower()
+                if ext in FORMATS and not name.startswith("."):
+                    paths.append(os.path.join(root, name))
+        return paths
+
+    def _indexed(self, path):
+        """Returns the up-to-date catalog entry of a dataset, or None."""
+        mtime = self._mtime(path)
+        with self._lock:
+            entry = self.entries.get(self._key(path))
+        if entry is None or entry.get("mtime") != mtime:
+            return None
+        return entry
+
+    def get(self, path):
+        """Returns the catalog entry of a dataset, reading its headers if it is not indexed or has changed.
+
+        Args:
+            path (str): The file path to the dataset.
+
+        Raises:
+            FileNotFoundError: If the dataset does not exist.
+
+        Returns:
+            dict: The catalog entry, see read_header(), or a dict with the error message and modification time if the headers cannot be read.
+        """
+        entry = self._indexed(path)
+        if entry is None:
+            mtime = self._mtime(path)
+            try:
+                entry = read_header(path)
+            except (OSError, ValueError) as e:
+                entry = {"error": str(e)}
+            entry["mtime"] = mtime
+            with self._lock:
+                self.entries[self._key(path)] = entry
+        return entry
+
+    def build(self, progress=None):
+        """Indexes all datasets of the data directory and saves the index.
+
+        Args:
+            progress (callable, optional): A function receiving the fraction done and the current file name. Defaults to None.
+
+        Returns:
+            DataCatalog: The catalog itself.
+        """
+        self.indexing = True
+        try:
+            paths = self.datasets()
+            for i, path in enumerate(paths):
+                if progress is not None:
+                    progress(i / max(len(paths), 1), os.path.basename(path))
+                try:
+                    self.get(path)
+                except OSError:
+                    # The file was removed while indexing
+                    pass
+
+            keys = {self._key(path) for path in paths}
+            with self._lock:
+                self.entries = {k: v for k, v in self.entries.items() if k in keys}
+        finally:
+            self.indexing = False
+        self.save()
+        return self
+
+    def save(self):
+        """Writes the index to disk. The index stays in memory if the directory is read-only."""
+        with self._lock:
+            entries = dict(self.entries)
+        try:
+            with open(self.index_file, "w") as f:
+                json.dump(entries, f)
+        except OSError:
+            pass
+
+    def bounds(self, path):
+        """Returns the extent of a dataset for Map.fit_bounds().
+
+        Args:
+            path (str): The file path to the dataset.
+
+        Returns:
+            list: The [[south, west], [north, east]] bounds, or None if unknown or not indexed yet while the catalog is being built.
+        """
+        entry = self._indexed(path)
+        if entry is None and not self.indexing:
+            entry = self.get(path)
+        bbox = (entry or {}).get("wgs84_bbox")
+        if bbox is None:
+            return None
+        minx, miny, maxx, maxy = bbox
+        return [[miny, minx], [maxy, maxx]]
+
+    def describe(self, path):
+        """Returns an HTML summary of a dataset.
+
+        While the catalog is being built, a dataset that is not indexed yet is
+        described as being indexed rather than read on the calling thread.
+
+        Args:
+            path (str): The file path to the dataset.
+
+        Returns:
+            str: The HTML summary.
+        """
+        try:
+            entry = self._indexed(path)
+            if entry is None:
+                if self.indexing:
+                    return f"<b>{os.path.basename(path)}</b>: indexing…"
+                entry = self.get(path)
+        except OSError as e:
+            return f"<b>{os.path.basename(path)}</b>: {e}"
+        if "error" in entry:
+            return f"<b>{os.path.basename(path)}</b>: {entry['error']}"
+
+        lines = [
+            f"<b>{os.path.basename(path)}</b> ({entry['format']}, {entry['size'] / 1024 ** 2:.1f} MB)"
+        ]
+        details = []
+        if entry.get("count") is not None:
+            details.append(f"{entry['count']:,} features")
+        if entry.get("geometry_type"):
+            details.append(entry["geometry_type"].lower())
+        if entry.get("crs"):
+            details.append(entry["crs"])
+        if details:
+            lines.append(", ".join(details))
+        if entry.get("bbox"):
+            lines.append("Extent: " + ", ".join(f"{v:.4g}" for v in entry["bbox"]))
+        if entry.get("fields"):
+            names = [name for name, _ in entry["fields"]]
+            more = f" (+{len(names) - 10} more)" if len(names) > 10 else ""
+            lines.append("Fields: " + ", ".join(names[:10]) + more)
+        return "<br>".join(lines)
@@ -0,0 +1,352 @@
+"""A module for bulk reading the attribute tables (.dbf) of shapefiles with NumPy.
+"""
+
+import os
+import codecs
+import struct
+import numpy as np
+
+# The .cpg spellings that are not Python codec names
+CPG_ALIASES = {
+    "88591": "latin-1",
+    "ansi 1252": "cp1252",
+    "system": "cp1252",
+}
+
+
+def sidecar_file(in_file, ext):
+    """Returns the path to a companion file of a shapefile, e.g. its .dbf or .cpg.
+
+    Args:
+        in_file (str): The file path to the shapefile or one of its files.
+        ext (str): The extension of the companion file, e.g. ".dbf".
+
+    Returns:
+        str: The file path, or None if the file does not exist.
+    """
+    base = os.path.splitext(in_file)[0]
+    for candidate in (base + ext.lower(), base + ext.upper()):
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def dbf_encoding(in_dbf, default="utf-8"):
+    """Returns the text encoding of a DBF file, read from the .cpg file next to it.
+
+    Args:
+        in_dbf (str): The file path to the DBF file.
+        default (str, optional): The encoding used when there is no valid .cpg file. Defaults to "utf-8".
+
+    Returns:
+        str: The name of the encoding.
+    """
+    in_cpg = sidecar_file(in_dbf, ".cpg")
+    if in_cpg is None:
+        return default
+    with open(in_cpg, "rb") as f:
+        name = f.read().decode("ascii", "ignore").strip()
+    name = CPG_ALIASES.get(name.lower(), name)
+    if name.isdigit():
+        name = f"cp{name}"
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return default
+
+
+def dbf_fields(in_dbf, encoding=None):
+    """Reads the field definitions from the header of a DBF file.
+
+    Args:
+        in_dbf (str): The file path to the DBF file.
+        encoding (str, optional): The encoding of the field names. Defaults to None, which uses the .cpg file.
+
+    Raises:
+        FileNotFoundError: If the DBF file does not exist.
+        ValueError: If the file is not a valid DBF file.
+
+    Returns:
+        tuple: The number of records, the header length, the record length and the list of fields, each a (name, type, offset, size, decimal) tuple.
+    """
+    if not os.path.exists(in_dbf):
+        raise FileNotFoundError("The provided DBF file could not be found.")
+    if encoding is None:
+        encoding = dbf_encoding(in_dbf)
+
+    with open(in_dbf, "rb") as f:
+        header = f.read(32)
+        if len(header) < 32:
+            raise ValueError("The provided file is not a valid DBF file.")
+        n_records, header_length, record_length = struct.unpack("<4xLHH20x", header)
+        descriptors = f.read(header_length - 32)
+
+    fields = []
+    # The first byte of each record is the deletion flag
+    offset = 1
+    for i in range(0, len(descriptors) - 31, 32):
+        descriptor = descriptors[i : i + 32]
+        if descriptor[0] == 0x0D:
+            break
+        name = descriptor[:11].split(b"\x00")[0].decode(encoding, "replace").strip()
+        field_type = chr(descriptor[11]).upper()
+        size, decimal = descriptor[16], descriptor[17]
+        fields.append((name, field_type, offset, size, decimal))
+        offset += size
+
+    if offset > record_length:
+        raise ValueError("The provided file is not a valid DBF file.")
+    return n_records, header_length, record_length, fields
+
+
+def _map_records(in_dbf, n_records, header_length, record_length):
+    """Memory-maps the records of a DBF file as an (n, record_length) byte array."""
+    size = os.path.getsize(in_dbf)
+    # Some writers report more records than the file holds
+    n_records = max(min(n_records, (size - header_length) // record_length), 0)
+    if n_records == 0:
+        return np.zeros((0, record_length), dtype=np.uint8)
+    return np.memmap(
+        in_dbf,
+        dtype=np.uint8,
+        mode="r",
+        offset=header_length,
+        shape=(n_records, record_length),
+    )
+
+
+def _parse_number(value, decimal):
+    """Parses one numeric value the way pyshp does, for the values the vectorized path skips."""
+    value = value.partition(b"\x00")[0].strip().strip(b"*")
+    if not value:
+        return None
+    try:
+        if decimal:
+            return float(value)
+        try:
+            return int(value)
+        except ValueError:
+            return int(float(value))
+    except ValueError:
+        return None
+
+
+def _decode_numbers(raw, decimal):
+    """Decodes a numeric column with digit arithmetic on its (n, size) byte matrix.
+
+    Returns:
+        tuple: The values (int64 or float64), the missing mask and the indices of the rows that need the scalar parser.
+    """
+    n, size = raw.shape
+    # Anything after a null byte is padding
+    raw = np.where(np.cumsum(raw == 0, axis=1) > 0, 32, raw)
+
+    digit = (raw >= 48) & (raw <= 57)
+    space = raw == 32
+    star = raw == 42
+    sign = (raw == 45) | (raw == 43)
+    dot = raw == 46
+    filled = ~space
+
+    n_digits = digit.sum(axis=1)
+    first = np.argmax(filled, axis=1)
+    last = size - 1 - np.argmax(filled[:, ::-1], axis=1)
+    # Values with inner blanks, stray characters, exponents or too many digits for
+    # an exact int64 or float conversion are left to the scalar parser
+    simple = (
+        (n_digits > 0)
+        & (n_digits <= (15 if decimal else 18))
+        & ~(filled & ~(digit | sign | dot)).any(axis=1)
+        & (sign.sum(axis=1) <= 1)
+        & (dot.sum(axis=1) <= 1)
+        & (filled.sum(axis=1) == last - first + 1)
+        & (~sign.any(axis=1) | sign[np.arange(n), first])
+    )
+    if not decimal:
+        simple &= ~dot.any(axis=1)
+    missing = ~(filled & ~star).any(axis=1)
+
+    whole = np.zeros(n, dtype=np.int64)
+    fraction_digits = np.zeros(n, dtype=np.int64)
+    seen_dot = np.zeros(n, dtype=bool)
+    for j in range(size):
+        d = digit[:, j]
+        whole = np.where(d, whole * 10 + (raw[:, j].astype(np.int64) - 48), whole)
+        fraction_digits += d & seen_dot
+        seen_dot |= dot[:, j]
+    negative = (raw == 45).any(axis=1)
+    whole = np.where(negative, -whole, whole)
+
+    if decimal:
+        values = whole / 10.0 ** fraction_digits
+    else:
+        values = whole
+    slow = np.flatnonzero(~simple & ~missing)
+    return values, missing, slow
+
+
+def _decode_dates(raw):
+    """Decodes a date column; valid and invalid dates keep their YYYYMMDD text, like pyshp."""
+    null = ((raw == 0) | (raw == 32) | (raw == 48)).all(axis=1)
+    text = np.ascontiguousarray(raw).view(f"S{raw.shape[1]}").ravel()
+    values = np.char.decode(np.char.rstrip(text, b" \x00"), "ascii", "replace")
+    return values.astype(object), null
+
+
+def _decode_logical(raw):
+    """Decodes a logical column to True, False or None."""
+    values = np.full(len(raw), None, dtype=object)
+    flag = raw[:, 0]
+    values[np.isin(flag, np.frombuffer(b"YyTt1", dtype=np.uint8))] = True
+    values[np.isin(flag, np.frombuffer(b"NnFf0", dtype=np.uint8))] = False
+    return values
+
+
+def _decode_text(records, name, encoding):
+    """Decodes a character column, trimming the trailing blanks and nulls."""
+    text = np.char.rstrip(records[name], b" \x00")
+    return np.char.decode(text, encoding, "replace").astype(object)
+
+
+def read_dbf(in_dbf, columns=None, encoding=None):
+    """Reads the columns of a DBF file in bulk.
+
+    The file is memory-mapped and viewed as a NumPy structured array of its
+    fixed-width records. Each column is decoded in a single vectorized pass:
+    numbers with digit arithmetic on the raw bytes, dates, logical values, and
+    character fields with the encoding given by the .cpg file.
+
+    Args:
+        in_dbf (str): The file path to the DBF file.
+        columns (list, optional): The names of the columns to read. Defaults to None, which reads all columns.
+        encoding (str, optional): The text encoding. Defaults to None, which uses the .cpg file, or UTF-8 without one.
+
+    Raises:
+        FileNotFoundError: If the DBF file does not exist.
+        ValueError: If a requested column does not exist.
+
+    Returns:
+        tuple: A dictionary mapping column names to (type, values, missing) tuples, and the boolean array of deleted records.
+    """
+    if encoding is None:
+        encoding = dbf_encoding(in_dbf)
+    n_records, header_length, record_length, fields = dbf_fields(in_dbf, encoding)
+
+    names = [field[0] for field in fields]
+    if columns is not None:
+        unknown = [c for c in columns if c not in names]
+        if unknown:
+            raise ValueError(
+                f"columns must be among the following: {', '.join(names)}"
+            )
+        fields = [field for field in fields if field[0] in columns]
+
+    raw = _map_records(in_dbf, n_records, header_length, record_length)
+    records = raw.view(
+        np.dtype(
+            {
+                "names": [f"f{i}" for i in range(len(fields))],
+                "formats": [f"S{field[3]}" for field in fields],
+                "offsets": [field[2] for field in fields],
+                "itemsize": record_length,
+            }
+        )
+    ).ravel()
+
+    table = {}
+    for i, (name, field_type, offset, size, decimal) in enumerate(fields):
+        block = raw[:, offset : offset + size]
+        if field_type in ("N", "F"):
+            values, missing, slow = _decode_numbers(block, decimal)
+            if len(slow):
+                parsed = [_parse_number(bytes(block[j]), decimal) for j in slow]
+                values = values.astype(float if decimal else object)
+                missing = missing.copy()
+                for j, value in zip(slow, parsed):
+                    if value is None:
+                        missing[j] = True
+                    else:
+                        values[j] = value
+            column = ("N", values, missing)
+        elif field_type == "D":
+            values, missing = _decode_dates(block)
+            column = ("D", values, missing)
+        elif field_type == "L":
+            values = _decode_logical(block)
+            column = ("L", values, np.equal(values, None))
+        else:
+            values = _decode_text(records, f"f{i}", encoding)
+            column = ("C", values, np.zeros(len(values), dtype=bool))
+        table[name] = column
+
+    deleted = raw[:, 0] == ord("*")
+    del records, raw
+    return table, deleted
+
+
+def dbf_to_records(in_dbf, columns=None, encoding=None):
+    """Reads a DBF file into a list of GeoJSON properties dictionaries.
+
+    The values match pyshp's: integers, floats and strings, dates as YYYYMMDD
+    strings, and None for missing values. Deleted records are returned as None
+    so that the records stay aligned with the shapes.
+
+    Args:
+        in_dbf (str): The file path to the DBF file.
+        columns (list, optional): The names of the columns to read. Defaults to None, which reads all columns.
+        encoding (str, optional): The text encoding. Defaults to None, which uses the .cpg file.
+
+    Returns:
+        list: One dictionary per record, or None for deleted records.
+    """
+    table, deleted = read_dbf(in_dbf, columns, encoding)
+    names = list(table)
+    lists = []
+    for field_type, values, missing in table.values():
+        values = values.tolist()
+        if missing.any():
+            values = [None if m else v for v, m in zip(values, missing.tolist())]
+        lists.append(values)
+
+    if not lists:
+        rows = [{} for _ in range(len(deleted))]
+    else:
+        rows = [dict(zip(names, row)) for row in zip(*lists)]
+    for i in np.flatnonzero(deleted):
+        rows[i] = None
+    return rows
+
+
+def dbf_to_df(in_dbf, columns=None, encoding=None):
+    """Reads a DBF file into a pandas DataFrame.
+
+    Integer columns with missing values become floats with NaN, and date columns
+    become datetime64 columns with NaT for missing or invalid dates. Deleted
+    records are dropped.
+
+    Args:
+        in_dbf (str): The file path to the DBF file.
+        columns (list, optional): The names of the columns to read. Defaults to None, which reads all columns.
+        encoding (str, optional): The text encoding. Defaults to None, which uses the .cpg file.
+
+    Returns:
+        pd.DataFrame: The attribute table.
+    """
+    import pandas as pd
+
+    table, deleted = read_dbf(in_dbf, columns, encoding)
+    data = {}
+    for name, (field_type, values, missing) in table.items():
+        if field_type == "N":
+            if values.dtype == object:
+                values = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy()
+            if missing.any():
+                values = values.astype(float)
+                values[missing] = np.nan
+        elif field_type == "D":
+            values = pd.to_datetime(
+                pd.Series(values).where(~missing), format="%Y%m%d", errors="coerce"
+            )
+        data[name] = np.asarray(values)
+    df = pd.DataFrame(data, columns=list(table))
+    return df[~deleted].reset_index(drop=True)
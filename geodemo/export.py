@@ -0,0 +1,309 @@
+"""A module for exporting static maps of many extents without the interactive Map.
+"""
+
+import os
+import re
+import numpy as np
+
+# The loaded layers of a worker process, keyed by the file holding them
+_export_cache = {}
+
+
+def _layer_bounds(data):
+    """Returns the (n, 4) array of feature bounding boxes of a FeatureCollection."""
+    from .spatial import SpatialIndex
+
+    return SpatialIndex(data).bounds
+
+
+def load_layers(layers):
+    """Reads the layers to export and indexes their feature bounding boxes.
+
+    Args:
+        layers (list): A list of layer definitions. Each is a dict with a "data" key holding the file path to a shapefile or GeoJSON (or a GeoJSON dictionary), and optional "style" and "name" keys.
+
+    Returns:
+        list: The loaded layers, with the GeoJSON in "data" and the feature bounds in "bounds".
+    """
+    from .geodemo import _read_vector
+
+    loaded = []
+    for i, layer in enumerate(layers):
+        if not isinstance(layer, dict) or "data" not in layer:
+            layer = {"data": layer}
+        data = _read_vector(layer["data"])
+        style = {
+            "color": "#000000",
+            "weight": 1,
+            "fillColor": "#0000ff",
+            "fillOpacity": 0.4,
+        }
+        style.update(layer.get("style") or {})
+        loaded.append(
+            {
+                "name": layer.get("name", f"Layer {i + 1}"),
+                "data": data,
+                "style": style,
+                "bounds": _layer_bounds(data),
+            }
+        )
+    return loaded
+
+
+def extents_from_vector(in_vector, name_field=None):
+    """Derives one extent per feature of a vector dataset, e.g. one per county.
+
+    The extents are listed in feature order, so features sharing a name, e.g.
+    counties of different states, each keep their own extent.
+
+    Args:
+        in_vector (str | dict): The file path to a shapefile or GeoJSON, or a GeoJSON dictionary.
+        name_field (str, optional): The attribute used to name the extents. Defaults to None, which uses the feature number.
+
+    Returns:
+        list: The (name, (minx, miny, maxx, maxy)) pairs, one per feature.
+    """
+    from .geodemo import _read_vector
+
+    data = _read_vector(in_vector)
+    bounds = _layer_bounds(data)
+    extents = []
+    for i, (feature, bbox) in enumerate(zip(data["features"], bounds)):
+        name = i
+        if name_field is not None:
+            name = (feature.get("properties") or {}).get(name_field, i)
+        extents.append((str(name), tuple(float(v) for v in bbox)))
+    return extents
+
+
+def _file_names(names, prefix):
+    """Turns extent names into unique file names that stay inside the output directory."""
+    file_names, taken = [], set()
+    for i, name in enumerate(names):
+        # Keep letters, digits, dots, dashes and spaces; no leading dot
+        base = re.sub(r"[^\w.\- ]+", "_", str(name)).strip(" .")
+        if not base:
+            base = f"{prefix}{i + 1}"
+        file_name, n = base, 2
+        # Compare without case for case-insensitive file systems
+        while file_name.lower() in taken:
+            file_name = f"{base}_{n}"
+            n += 1
+        taken.add(file_name.lower())
+        file_names.append(file_name)
+    return file_names
+
+
+def _clip(layer, extent):
+    """Returns the features of a layer whose bounding box intersects the extent."""
+    b = layer["bounds"]
+    minx, miny, maxx, maxy = extent
+    hits = np.flatnonzero(
+        (b[:, 0] <= maxx) & (b[:, 2] >= minx) & (b[:, 1] <= maxy) & (b[:, 3] >= miny)
+    )
+    features = layer["data"]["features"]
+    return {"type": "FeatureCollection", "features": [features[i] for i in hits]}
+
+
+def _render_html(layers, extent, out_file):
+    import folium
+
+    minx, miny, maxx, maxy = extent
+    m = folium.Map(tiles="OpenStreetMap")
+    for layer in layers:
+        style = layer["style"]
+        folium.GeoJson(
+            _clip(layer, extent),
+            name=layer["name"],
+            style_function=lambda feature, style=style: style,
+        ).add_to(m)
+    m.fit_bounds([[miny, minx], [maxy, maxx]])
+    m.save(out_file)
+
+
+def _polygon_path(rings):
+    """Builds a compound path from the rings of a polygon, its holes wound against its exterior."""
+    from matplotlib.path import Path
+
+    vertices, codes = [], []
+    for i, ring in enumerate(rings):
+        ring = np.asarray(ring, dtype=float)[:, :2]
+        if len(ring) < 3:
+            continue
+        if not np.array_equal(ring[0], ring[-1]):
+            ring = np.vstack([ring, ring[:1]])
+        x, y = ring[:, 0], ring[:, 1]
+        area = np.dot(x[:-1], y[1:]) - np.dot(x[1:], y[:-1])
+        # Counter-clockwise exterior and clockwise holes, so that the nonzero
+        # winding rule leaves the holes empty
+        if (i == 0) != (area > 0):
+            ring = ring[::-1]
+        vertices.append(ring)
+        codes.extend([Path.MOVETO] + [Path.LINETO] * (len(ring) - 2) + [Path.CLOSEPOLY])
+    if not vertices:
+        return None
+    return Path(np.vstack(vertices), codes)
+
+
+def _render_png(layers, extent, out_file, width=800, height=600, dpi=100):
+    import matplotlib.colors as mcolors
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.collections import LineCollection, PathCollection
+    from .spatial import _iter_parts
+
+    fig = Figure(figsize=(width / dpi, height / dpi), dpi=dpi)
+    FigureCanvasAgg(fig)
+    ax = fig.add_axes([0, 0, 1, 1])
+    ax.set_axis_off()
+
+    for layer in layers:
+        style = layer["style"]
+        polygons, lines, points = [], [], []
+        for feature in _clip(layer, extent)["features"]:
+            for geom_type, coords in _iter_parts(feature.get("geometry")):
+                if geom_type == "Polygon":
+                    path = _polygon_path(coords)
+                    if path is not None:
+                        polygons.append(path)
+                elif geom_type == "LineString":
+                    lines.append(np.asarray(coords)[:, :2])
+                elif geom_type == "Point":
+                    points.append(coords[:2])
+
+        edgecolor = mcolors.to_rgba(style["color"], style.get("opacity", 1))
+        facecolor = mcolors.to_rgba(
+            style.get("fillColor", style["color"]), style.get("fillOpacity", 0.2)
+        )
+        if polygons:
+            ax.add_collection(
+                PathCollection(
+                    polygons,
+                    facecolors=facecolor,
+                    edgecolors=edgecolor,
+                    linewidths=style["weight"],
+                )
+            )
+        if lines:
+            ax.add_collection(
+                LineCollection(lines, colors=edgecolor, linewidths=style["weight"])
+            )
+        if points:
+            points = np.asarray(points)
+            ax.scatter(
+                points[:, 0],
+                points[:, 1],
+                s=style.get("radius", 5) ** 2,
+                c=[facecolor],
+                edgecolors=[edgecolor],
+            )
+
+    # Pad the extent to the aspect ratio of the image
+    minx, miny, maxx, maxy = extent
+    cx, cy = (minx + maxx) / 2, (miny + maxy) / 2
+    half_w = max(maxx - minx, 1e-9) / 2
+    half_h = max(maxy - miny, 1e-9) / 2
+    if half_w / half_h > width / height:
+        half_h = half_w * height / width
+    else:
+        half_w = half_h * width / height
+    ax.set_xlim(cx - half_w, cx + half_w)
+    ax.set_ylim(cy - half_h, cy + half_h)
+    fig.savefig(out_file, dpi=dpi)
+
+
+def _export_one(layers, extent, out_file, file_format, options):
+    if file_format == "html":
+        _render_html(layers, extent, out_file)
+    else:
+        _render_png(layers, extent, out_file, **options)
+    return out_file
+
+
+def _export_task(args):
+    """Exports one map in a worker process, reading the pickled layers once per process."""
+    import pickle
+
+    in_pickle, extent, out_file, file_format, options = args
+    if in_pickle not in _export_cache:
+        with open(in_pickle, "rb") as f:
+            layers = pickle.load(f)
+        _export_cache.clear()
+        _export_cache[in_pickle] = layers
+    return _export_one(_export_cache[in_pickle], extent, out_file, file_format, options)
+
+
+def export_maps(
+    layers,
+    extents,
+    out_dir,
+    file_format="html",
+    processes=None,
+    prefix="map_",
+    **kwargs,
+):
+    """Renders the same layers to a static map for each of many extents.
+
+    The layers are read and indexed once. With a process pool, they are pickled
+    once to a temporary file that each worker reads once, and each output only
+    receives the features whose bounding box intersects its extent.
+
+    Args:
+        layers (list): A list of layer definitions. Each is a dict with a "data" key holding the file path to a shapefile or GeoJSON (or a GeoJSON dictionary), and optional "style" and "name" keys.
+        extents (list | dict): The (minx, miny, maxx, maxy) extents to render, a list of (name, extent) pairs, e.g. from extents_from_vector(), or a dictionary mapping output names to extents. Names are made safe for file names, and repeated names get a numeric suffix, e.g. "Washington_2".
+        out_dir (str): The output directory.
+        file_format (str, optional): Either "html" (a standalone folium map) or "png" (a matplotlib image). Defaults to "html".
+        processes (int, optional): The number of worker processes. Defaults to None, which renders in the current process.
+        prefix (str, optional): The file name prefix used when extents is a list. Defaults to "map_".
+        **kwargs: Additional options for PNG output: width, height and dpi.
+
+    Raises:
+        ValueError: If the file format is not supported.
+
+    Returns:
+        list: The file paths of the exported maps, in the order of the extents.
+    """
+    import pickle
+    import tempfile
+    from concurrent.futures import ProcessPoolExecutor
+
+    if file_format not in ("html", "png"):
+        raise ValueError("file_format must be one of the following: html, png")
+
+    out_dir = os.path.abspath(out_dir)
+    if not os.path.exists(out_dir):
+        os.makedirs(out_dir)
+
+    if isinstance(extents, dict):
+        items = list(extents.items())
+    else:
+        items = []
+        for i, extent in enumerate(extents):
+            if len(extent) == 2 and isinstance(extent[0], str):
+                items.append(tuple(extent))
+            else:
+                items.append((f"{prefix}{i + 1}", extent))
+    file_names = _file_names([name for name, _ in items], prefix)
+
+    loaded = load_layers(layers)
+    tasks = [
+        (
+            tuple(extent),
+            os.path.join(out_dir, f"{file_name}.{file_format}"),
+            file_format,
+            kwargs,
+        )
+        for file_name, (_, extent) in zip(file_names, items)
+    ]
+
+    if processes is not None and processes > 1:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            in_pickle = os.path.join(tmp_dir, "layers.pickle")
+            with open(in_pickle, "wb") as f:
+                pickle.dump(loaded, f, pickle.HIGHEST_PROTOCOL)
+            with ProcessPoolExecutor(processes) as executor:
+                return list(
+                    executor.map(_export_task, [(in_pickle,) + t for t in tasks])
+                )
+
+    return [_export_one(loaded, *task) for task in tasks]
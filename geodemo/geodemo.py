@@ -12,6 +12,7 @@ from ipyleaflet import (
 )
 from .utils import random_string
 from .common import ee_initialize, tool_template
+from .loader import no_progress
 from .toolbar import main_toolbar
 
 
@@ -20,10 +21,18 @@ class Map(ipyleaflet.Map):
 
     Args:
         ipyleaflet (ipyleaflet.Map): An ipyleaflet map.
+        tile_cache (bool | TileProxy, optional): Whether to route the basemap and Earth Engine tiles through a local disk-backed caching proxy. Pass a TileProxy to customize the cache location and size. Defaults to None.
     """
 
     def __init__(self, **kwargs):
 
+        tile_cache = kwargs.pop("tile_cache", None)
+        if tile_cache is True:
+            from .tiles import get_tile_proxy
+
+            tile_cache = get_tile_proxy()
+        self.tile_proxy = tile_cache or None
+
         if "center" not in kwargs:
             kwargs["center"] = [40, -100]
 
@@ -35,6 +44,16 @@ class Map(ipyleaflet.Map):
 
         super().__init__(**kwargs)
 
+        self._layer_registry = {}
+        self._named_layers = {}
+        self.selection = None
+        self.memory_manager = None
+        self._selection_options = None
+        self._selection_layer = None
+        self.load_tasks = []
+        self.observe(self._update_layer_registry, names="layers")
+        self._update_layer_registry()
+
         if "height" not in kwargs:
             self.layout.height = "600px"
         else:
@@ -42,7 +61,9 @@ class Map(ipyleaflet.Map):
 
         self.add_control(FullScreenControl())
         self.add_control(LayersControl(position="topright"))
-        self.add_control(DrawControl(position="topleft"))
+        self.draw_control = DrawControl(position="topleft")
+        self.draw_control.on_draw(self._handle_draw)
+        self.add_control(self.draw_control)
         self.add_control(MeasureControl())
         self.add_control(ScaleControl(position="bottomleft"))
 
@@ -50,7 +71,9 @@ class Map(ipyleaflet.Map):
 
         if "google_map" not in kwargs:
             layer = TileLayer(
-                url="https://mt1.google.com/vt/lyrs=m&x={x}&y={y}&z={z}",
+                url=self.tile_url(
+                    "https://mt1.google.com/vt/lyrs=m&x={x}&y={y}&z={z}"
+                ),
                 attribution="Google",
                 name="Google Maps",
             )
@@ -58,51 +81,108 @@ class Map(ipyleaflet.Map):
         else:
             if kwargs["google_map"] == "ROADMAP":
                 layer = TileLayer(
-                    url="https://mt1.google.com/vt/lyrs=m&x={x}&y={y}&z={z}",
+                    url=self.tile_url(
+                        "https://mt1.google.com/vt/lyrs=m&x={x}&y={y}&z={z}"
+                    ),
                     attribution="Google",
                     name="Google Maps",
                 )
                 self.add_layer(layer)
             elif kwargs["google_map"] == "HYBRID":
                 layer = TileLayer(
-                    url="https://mt1.google.com/vt/lyrs=y&x={x}&y={y}&z={z}",
+                    url=self.tile_url(
+                        "https://mt1.google.com/vt/lyrs=y&x={x}&y={y}&z={z}"
+                    ),
                     attribution="Google",
                     name="Google Satellite",
                 )
                 self.add_layer(layer)
 
-    def add_geojson(self, in_geojson, style=None, layer_name="Untitled"):
+    def tile_url(self, url):
+        """Returns the URL to use for an XYZ tile layer, routed through the tile cache if enabled.
+
+        Args:
+            url (str): The upstream XYZ URL template.
+
+        Returns:
+            str: The URL template to use for the TileLayer.
+        """
+        if self.tile_proxy is None:
+            return url
+        return self.tile_proxy.proxy_url(url)
+
+    def add_geojson(
+        self,
+        in_geojson,
+        style=None,
+        layer_name="Untitled",
+        rasterize=False,
+        quantize=False,
+        quantization=100000,
+        background=False,
+    ):
         """Adds a GeoJSON file to the map.
 
         Args:
-            in_geojson (str): The file path to the input GeoJSON.
+            in_geojson (str): The file path to the input GeoJSON or TopoJSON.
             style (dict, optional): The style for the GeoJSON layer. Defaults to None.
             layer_name (str, optional): The layer name for the GeoJSON layer. Defaults to "Untitled".
+            rasterize (bool, optional): Whether to render the layer into PNG tiles in Python and serve them from a local tile server instead of drawing the vectors in the browser. Useful for very dense layers. Defaults to False.
+            quantize (bool, optional): Whether to round the coordinates to a grid before sending the layer to the map, through a TopoJSON round trip that also snaps shared borders together. The map still receives GeoJSON, with shorter coordinates, so this is lossy: positions move by up to half a grid step, i.e. half of the layer's extent divided by quantization. Defaults to False.
+            quantization (int, optional): The number of grid steps along each axis of the layer's extent used by quantize. Defaults to 100000.
+            background (bool, optional): Whether to read and prepare the layer in a background thread, with its progress shown in the toolbar output panel. The layer is added once ready. Defaults to False.
 
         Raises:
             FileNotFoundError: If the provided file path does not exist.
             TypeError: If the input geojson is not a str or dict.
-        """
 
-        import json
-
-        if layer_name == "Untitled":
-            layer_name = "Untitled " + random_string()
+        Returns:
+            LoadTask: The background task if background is True, otherwise None.
+        """
 
         if isinstance(in_geojson, str):
 
             if not os.path.exists(in_geojson):
                 raise FileNotFoundError("The provided GeoJSON file could not be found.")
 
+        elif not isinstance(in_geojson, dict):
+            raise TypeError("The input geojson must be a type of str or dict.")
+
+        def build(data):
+            return self._geojson_layer(data, style, layer_name, rasterize)
+
+        if background:
+            return self._load_in_background(
+                layer_name,
+                lambda task: self._geojson_data(
+                    in_geojson, quantize, quantization, task.update
+                ),
+                build,
+            )
+        self.add_layer(build(self._geojson_data(in_geojson, quantize, quantization)))
+
+    def _geojson_data(self, in_geojson, quantize, quantization, progress=no_progress):
+        """Reads and decodes the GeoJSON or TopoJSON data for add_geojson."""
+        import json
+        from . import topology
+
+        if isinstance(in_geojson, str):
+            progress(0.1, "Reading")
             with open(in_geojson) as f:
                 data = json.load(f)
-
-        elif isinstance(in_geojson, dict):
+        else:
             data = in_geojson
 
-        else:
-            raise TypeError("The input geojson must be a type of str or dict.")
+        if topology.is_topology(data):
+            progress(0.6, "Decoding")
+            data = topology.feature(data)
+        elif quantize:
+            progress(0.6, "Quantizing")
+            data = topology.quantize(data, quantization)
+        return data
 
+    def _geojson_layer(self, data, style, layer_name, rasterize):
+        """Builds the layer for add_geojson from the decoded data."""
         if style is None:
             style = {
                 "stroke": True,
@@ -114,19 +194,672 @@ class Map(ipyleaflet.Map):
                 "fillOpacity": 0.4,
             }
 
-        geo_json = ipyleaflet.GeoJSON(data=data, style=style, name=layer_name)
-        self.add_layer(geo_json)
+        if rasterize:
+            return vector_tile_layer(data, style=style, name=layer_name)
+        return ipyleaflet.GeoJSON(data=data, style=style, name=layer_name)
 
-    def add_shapefile(self, in_shp, style=None, layer_name="Untitled"):
+    def add_shapefile(
+        self,
+        in_shp,
+        style=None,
+        layer_name="Untitled",
+        rasterize=False,
+        quantize=False,
+        quantization=100000,
+        background=False,
+    ):
         """Adds a shapefile layer to the map.
 
         Args:
             in_shp (str): The file path to the input shapefile.
             style (dict, optional): The style dictionary. Defaults to None.
             layer_name (str, optional): The layer name for the shapefile layer. Defaults to "Untitled".
+            rasterize (bool, optional): Whether to render the layer into PNG tiles served locally. Defaults to False.
+            quantize (bool, optional): Whether to round the coordinates to a grid before sending the layer to the map. This is lossy, see add_geojson(). Defaults to False.
+            quantization (int, optional): The number of grid steps along each axis of the layer's extent used by quantize. Defaults to 100000.
+            background (bool, optional): Whether to read and prepare the layer in a background thread, with its progress shown in the toolbar output panel. Defaults to False.
+
+        Raises:
+            FileNotFoundError: If the input shapefile does not exist.
+
+        Returns:
+            LoadTask: The background task if background is True, otherwise None.
+        """
+        if not os.path.exists(os.path.abspath(in_shp)):
+            raise FileNotFoundError("The provided shapefile could not be found.")
+
+        def prepare(progress=no_progress):
+            geojson = _read_shapefile(
+                os.path.abspath(in_shp), lambda f: progress(0.6 * f, "Reading")
+            )
+            return self._geojson_data(geojson, quantize, quantization, progress)
+
+        def build(data):
+            return self._geojson_layer(data, style, layer_name, rasterize)
+
+        if background:
+            return self._load_in_background(
+                layer_name, lambda task: prepare(task.update), build
+            )
+        self.add_layer(build(prepare()))
+
+    def add_vectors(
+        self,
+        inputs,
+        style=None,
+        layer_name="Merged",
+        processes=None,
+        source_field=None,
+        background=False,
+    ):
+        """Merges many shapefiles, GeoJSON or zip files into a single layer.
+
+        The inputs are read in parallel and appended to the layer one file at a
+        time, in the order of the expanded inputs, so the map fills in while the
+        remaining files are read. See merge.iter_merged_features() for the handling
+        of differing attribute schemas.
+
+        Args:
+            inputs (str | list): A file path or glob pattern, or a list of them, e.g. "data/counties/*.shp".
+            style (dict, optional): The style dictionary. Defaults to None.
+            layer_name (str, optional): The layer name. Defaults to "Merged".
+            processes (int, optional): The number of worker processes reading the inputs. Defaults to None, which reads them in the current process.
+            source_field (str, optional): The name of a property recording the input file name of each feature. Defaults to None.
+            background (bool, optional): Whether to read the inputs in a background thread, with the progress shown in the toolbar output panel. The features of each file are appended to the layer on the event loop as soon as they are read, and the layer is added once all inputs are read. Defaults to False.
+
+        Raises:
+            FileNotFoundError: If an input file does not exist.
+            ValueError: If no input file matches.
+
+        Returns:
+            LoadTask: The background task if background is True, otherwise None.
+        """
+        from .layers import ChunkedGeoJSON
+        from .merge import expand_inputs, iter_merged_features
+
+        paths = expand_inputs(inputs)
+        if style is None:
+            style = {
+                "stroke": True,
+                "color": "#000000",
+                "weight": 2,
+                "opacity": 1,
+                "fill": True,
+                "fillColor": "#0000ff",
+                "fillOpacity": 0.4,
+            }
+
+        def fill(append, progress=no_progress):
+            merged = iter_merged_features(paths, processes, source_field)
+            try:
+                for i, (path, features) in enumerate(merged):
+                    append(features)
+                    progress((i + 1) / len(paths), os.path.basename(path))
+            finally:
+                merged.close()
+
+        layer = ChunkedGeoJSON(style=style, name=layer_name)
+
+        def prepare(task):
+            # The widgets are not thread-safe: hand each file's features over to
+            # the event loop instead of holding all of them until the end
+            try:
+                fill(
+                    lambda features: task._call_soon(layer.append, features),
+                    task.update,
+                )
+            except Exception:
+                task._call_soon(layer.close)
+                raise
+            return layer
+
+        if background:
+            return self._load_in_background(layer_name, prepare)
+        self.add_layer(layer)
+        fill(layer.append)
+
+    def _load_in_background(self, name, prepare, build=None, finish=None):
+        """Runs a layer load in a background thread and shows its progress in the toolbar.
+
+        prepare runs in the thread and returns plain data. Unless a finish callback
+        is given, build turns the data into the layer on the event loop, where the
+        layer is then added to the map.
+        """
+        from .loader import LoadTask
+
+        if finish is None:
+
+            def finish(data):
+                layer = build(data) if build is not None else data
+                self.add_layer(layer)
+                return layer
+
+        task = LoadTask(name, prepare, finish)
+        self.load_tasks = [t for t in self.load_tasks if not t.done()] + [task]
+        task.on_done(lambda task: self._show_load_tasks())
+        self._show_load_tasks()
+        task.start()
+        return task
+
+    def _show_load_tasks(self):
+        """Shows the pending and failed loads in the toolbar output panel."""
+        from IPython.display import display
+
+        panel = getattr(self, "progress_panel", None)
+        if panel is None:
+            return
+        panel.children = tuple(
+            task.widget for task in self.load_tasks if task.status != "done"
+        )
+        if panel.children and self.toolbar_output_ctrl not in self.controls:
+            with self.toolbar_output:
+                self.toolbar_output.clear_output()
+                display(panel)
+            self.add_control(self.toolbar_output_ctrl)
+
+    def add_choropleth(
+        self,
+        in_data,
+        column,
+        scheme="quantiles",
+        k=5,
+        cmap="viridis",
+        style=None,
+        layer_name="Choropleth",
+    ):
+        """Adds a vector layer colored by the values of an attribute column.
+
+        The classification and the per-feature colors are computed once and stored in the
+        feature styles, so no Python callback runs per feature.
+
+        Args:
+            in_data (str | dict): The file path to a shapefile, GeoJSON or TopoJSON, or a GeoJSON or TopoJSON dictionary.
+            column (str): The attribute column used for coloring.
+            scheme (str, optional): The classification scheme, one of "quantiles", "equal_interval" or "categorical". Defaults to "quantiles".
+            k (int, optional): The number of classes for the numeric schemes. Defaults to 5.
+            cmap (str | list, optional): The name of a matplotlib colormap or a list of colors. Defaults to "viridis".
+            style (dict, optional): The base style shared by all features. Defaults to None.
+            layer_name (str, optional): The layer name. Defaults to "Choropleth".
+
+        Raises:
+            FileNotFoundError: If the provided file path does not exist.
+            TypeError: If the input data is not a str or dict.
+            ValueError: If the column could not be found.
+        """
+        import json
+        from .style import Classification, column_values, style_features
+        from .topology import is_topology, feature
+
+        if isinstance(in_data, str):
+            if not os.path.exists(in_data):
+                raise FileNotFoundError("The provided file could not be found.")
+            if in_data.lower().endswith(".shp"):
+                data = shp_to_geojson(in_data)
+            else:
+                with open(in_data) as f:
+                    data = json.load(f)
+        elif isinstance(in_data, dict):
+            data = in_data
+        else:
+            raise TypeError("The input data must be a type of str or dict.")
+
+        if is_topology(data):
+            data = feature(data)
+
+        if style is None:
+            style = {
+                "stroke": True,
+                "color": "#000000",
+                "weight": 1,
+                "opacity": 1,
+                "fill": True,
+                "fillOpacity": 0.7,
+            }
+
+        classification = Classification(column_values(data, column), scheme, k)
+        styled = style_features(data, classification.colors(cmap), style)
+
+        geo_json = ipyleaflet.GeoJSON(data=styled, name=layer_name)
+        geo_json.classification = classification
+        geo_json.base_style = style
+        self.add_layer(geo_json)
+
+    def restyle_layer(self, layer_name, cmap="viridis", scheme=None, k=None):
+        """Recolors a layer added by add_choropleth.
+
+        The cached attribute values are reused, and the classification itself is only
+        recomputed if the scheme or the number of classes changes.
+
+        Args:
+            layer_name (str): The name of the layer.
+            cmap (str | list, optional): The name of a matplotlib colormap or a list of colors. Defaults to "viridis".
+            scheme (str, optional): The new classification scheme. Defaults to None, which keeps the current scheme.
+            k (int, optional): The new number of classes. Defaults to None, which keeps the current number.
+
+        Raises:
+            ValueError: If the layer could not be found or was not added by add_choropleth.
+        """
+        from .style import Classification, style_features
+
+        layer = self.find_layer(layer_name)
+        if layer is None or not hasattr(layer, "classification"):
+            raise ValueError(f"The choropleth layer {layer_name} could not be found.")
+
+        if self.memory_manager is not None:
+            self.memory_manager.reload(layer)
+
+        classification = layer.classification
+        if (scheme is not None and scheme != classification.scheme) or (
+            k is not None and k != classification.k
+        ):
+            classification = Classification(
+                classification.values,
+                scheme or classification.scheme,
+                k or classification.k,
+            )
+            layer.classification = classification
+
+        layer.data = style_features(
+            layer.data, classification.colors(cmap), layer.base_style
+        )
+
+    def _update_layer_registry(self, change=None):
+        """Rebuilds the name index of the map layers whenever the layers or their names change.
+
+        The GeoJSON layers are also registered with the memory manager when they are
+        added, and unregistered when they are removed, however that happens.
+        """
+        layers = {layer.model_id: layer for layer in self.layers}
+        for model_id in set(self._named_layers) - set(layers):
+            layer = self._named_layers.pop(model_id)
+            layer.unobserve(self._rebuild_layer_registry, names="name")
+            if self.memory_manager is not None:
+                # The layer is gone, so its offloaded data is not needed anymore
+                self.memory_manager.unregister(layer, reload=False)
+        for model_id in set(layers) - set(self._named_layers):
+            layer = layers[model_id]
+            layer.observe(self._rebuild_layer_registry, names="name")
+            self._named_layers[model_id] = layer
+            if self.memory_manager is not None and isinstance(
+                layer, ipyleaflet.GeoJSON
+            ):
+                self.memory_manager.register(layer)
+        self._rebuild_layer_registry()
+
+    def _rebuild_layer_registry(self, change=None):
+        self._layer_registry = {layer.name: layer for layer in self.layers}
+
+    def unique_layer_name(self, name, taken=None):
+        """Returns a layer name that is not used by any layer on the map yet.
+
+        Args:
+            name (str): The preferred layer name.
+            taken (set, optional): Additional names to treat as used. Defaults to None.
+
+        Returns:
+            str: The name itself if it is available, otherwise the name with a numeric suffix, e.g. "Untitled (2)".
+        """
+        if taken is None:
+            taken = set()
+
+        def used(candidate):
+            return candidate in self._layer_registry or candidate in taken
+
+        if not used(name):
+            return name
+        i = 2
+        while used(f"{name} ({i})"):
+            i += 1
+        return f"{name} ({i})"
+
+    def find_layer(self, name):
+        """Finds a layer on the map by name.
+
+        Args:
+            name (str): The name of the layer.
+
+        Returns:
+            ipyleaflet.Layer: The layer, or None if no layer with the name exists.
+        """
+        return self._layer_registry.get(name)
+
+    def add_layer(self, layer):
+        """Adds a layer to the map, renaming it if its name is already used by another layer.
+
+        Args:
+            layer (ipyleaflet.Layer | dict): The layer to add, or a basemap such as basemaps.OpenStreetMap.Mapnik.
+        """
+        self.add_layers([layer])
+
+    def add_layers(self, layers):
+        """Adds several layers to the map with a single update of the map state.
+
+        Layers whose names are already used are renamed with a numeric suffix.
+
+        Args:
+            layers (list): The layers to add. Basemaps, i.e. dictionaries or TileProviders, are converted to tile layers.
+
+        Raises:
+            LayerException: If a layer is already on the map or listed twice.
+        """
+        converted = []
+        for layer in layers:
+            if hasattr(layer, "as_leaflet_layer"):
+                layer = layer.as_leaflet_layer()
+            if isinstance(layer, dict):
+                layer = ipyleaflet.basemap_to_tiles(layer)
+            converted.append(layer)
+        layers = converted
+
+        # Check all the layers before renaming any of them
+        model_ids = {layer.model_id for layer in self.layers}
+        for layer in layers:
+            if layer.model_id in model_ids:
+                raise ipyleaflet.LayerException(f"layer already on map: {layer!r}")
+            model_ids.add(layer.model_id)
+
+        taken = set()
+        with self.hold_sync():
+            for layer in layers:
+                if layer.name:
+                    layer.name = self.unique_layer_name(layer.name, taken)
+                    taken.add(layer.name)
+            self.layers = tuple(list(self.layers) + layers)
+
+    def remove_layers(self, layers):
+        """Removes several layers from the map with a single update of the map state.
+
+        Args:
+            layers (list): The layers or layer names to remove.
+
+        Raises:
+            ValueError: If a layer name could not be found.
+        """
+        model_ids = set()
+        for layer in layers:
+            if isinstance(layer, str):
+                name = layer
+                layer = self.find_layer(name)
+                if layer is None:
+                    raise ValueError(f"The layer {name} could not be found.")
+            model_ids.add(layer.model_id)
+
+        # The memory manager drops the offloaded data of the removed layers
+        with self.hold_sync():
+            self.layers = tuple(
+                layer for layer in self.layers if layer.model_id not in model_ids
+            )
+
+    def _chunked_layer(self, layer_name, key):
+        """Returns the named vector layer as a ChunkedGeoJSON, converting it in place if needed."""
+        from .layers import ChunkedGeoJSON
+
+        layer = self.find_layer(layer_name)
+        if layer is None:
+            raise ValueError(f"The layer {layer_name} could not be found.")
+
+        if isinstance(layer, ChunkedGeoJSON):
+            if layer.key != key:
+                layer.key = key
+                layer._index = {}
+                for chunk in layer.layers:
+                    layer._reindex(chunk, 0)
+            return layer
+        elif isinstance(layer, ipyleaflet.GeoJSON):
+            if self.memory_manager is not None:
+                self.memory_manager.unregister(layer)
+            chunked = ChunkedGeoJSON.from_geojson(layer, key=key)
+            self.substitute_layer(layer, chunked)
+            return chunked
+        else:
+            raise TypeError(f"The layer {layer_name} is not a GeoJSON layer.")
+
+    def append_features(self, layer_name, features, key="id"):
+        """Appends features to an existing GeoJSON layer, sending only the new features to the map.
+
+        Args:
+            layer_name (str): The name of the layer created by add_geojson or add_shapefile.
+            features (dict | list): A Feature, FeatureCollection or list of features.
+            key (str, optional): The feature identifier used by update_features(), either "id" or a property name. Defaults to "id".
+
+        Raises:
+            ValueError: If the layer could not be found.
+            TypeError: If the layer is not a GeoJSON layer.
         """
-        geojson = shp_to_geojson(in_shp)
-        self.add_geojson(geojson, style=style, layer_name=layer_name)
+        self._chunked_layer(layer_name, key).append(features)
+
+    def update_features(self, layer_name, features, key="id"):
+        """Updates features of an existing GeoJSON layer in place, matched by identifier.
+
+        Only the parts of the layer containing the updated features are sent to the map.
+        Features whose identifier is not in the layer yet are appended.
+
+        Args:
+            layer_name (str): The name of the layer created by add_geojson or add_shapefile.
+            features (dict | list): A Feature, FeatureCollection or list of features.
+            key (str, optional): The feature identifier, either "id" or a property name. Defaults to "id".
+
+        Raises:
+            ValueError: If the layer could not be found.
+            TypeError: If the layer is not a GeoJSON layer.
+        """
+        self._chunked_layer(layer_name, key).update(features)
+
+    def enable_memory_management(
+        self, hidden_timeout=60, memory_budget=512 * 1024 * 1024, cache_dir=None
+    ):
+        """Offloads the data of hidden GeoJSON layers to disk and reloads it when they are shown again.
+
+        Layers that stay hidden for longer than the timeout are offloaded. When the resident
+        layers exceed the memory budget, hidden layers are offloaded right away, least recently
+        used first. Visible layers are never offloaded.
+
+        A layer is hidden when its visible trait is False. The checkboxes of the LayersControl
+        only hide layers in the browser and never update this trait, so hide layers with the
+        layer manager of the toolbar (the map button) or by setting layer.visible.
+
+        Layers added to the map later are managed too. The offloaded data of a layer removed
+        from the map is discarded.
+
+        Args:
+            hidden_timeout (float, optional): The number of seconds a layer has to stay hidden before it is offloaded. Defaults to 60.
+            memory_budget (int, optional): The maximum total size in bytes of the resident GeoJSON layers. Defaults to 512 MB.
+            cache_dir (str, optional): The directory for the offloaded data. Defaults to None, which creates a temporary directory.
+        """
+        from .memory import LayerMemoryManager
+
+        if self.memory_manager is not None:
+            self.memory_manager.hidden_timeout = hidden_timeout
+            self.memory_manager.memory_budget = memory_budget
+            return
+
+        self.memory_manager = LayerMemoryManager(
+            hidden_timeout=hidden_timeout,
+            memory_budget=memory_budget,
+            cache_dir=cache_dir,
+        )
+        for layer in self.layers:
+            if isinstance(layer, ipyleaflet.GeoJSON):
+                self.memory_manager.register(layer)
+
+    def memory_report(self):
+        """Returns the memory state of the GeoJSON layers managed by enable_memory_management().
+
+        Raises:
+            ValueError: If memory management is not enabled.
+
+        Returns:
+            pd.DataFrame: One row per layer with its name, visibility, state, size and offloaded file size.
+        """
+        if self.memory_manager is None:
+            raise ValueError(
+                "Memory management is not enabled. Call enable_memory_management() first."
+            )
+        return self.memory_manager.report()
+
+    def _layer_data(self, layer):
+        """Returns the GeoJSON data of a layer, reading it from disk if it is offloaded."""
+        if hasattr(layer, "renderer"):
+            return layer.renderer.data
+        if self.memory_manager is not None:
+            return self.memory_manager.data(layer)
+        return layer.data
+
+    def _spatial_index(self, layer):
+        """Returns the cached spatial index of a vector layer, building it if the data changed."""
+        from .layers import ChunkedGeoJSON
+        from .spatial import SpatialIndex
+
+        # The key holds the indexed objects themselves, compared by identity,
+        # since the id of a garbage collected dict can be reused by a new one
+        if hasattr(layer, "data_frame"):
+            key = (layer.data_frame,)
+        elif hasattr(layer, "renderer"):
+            key = (layer.renderer.data,)
+        elif isinstance(layer, ChunkedGeoJSON):
+            key = tuple(chunk.data for chunk in layer.layers)
+        elif isinstance(layer, ipyleaflet.GeoJSON):
+            # Holding layer.data would keep offloaded data in memory, so use a
+            # token replaced on every change of the data instead
+            if not hasattr(layer, "data_token"):
+                layer.data_token = object()
+                layer.observe(_renew_data_token, names="data")
+            key = (layer.data_token,)
+        else:
+            raise TypeError(f"The layer {layer.name} is not a vector layer.")
+
+        cached = getattr(layer, "spatial_index", None)
+        if (
+            cached is not None
+            and len(cached[0]) == len(key)
+            and all(a is b for a, b in zip(cached[0], key))
+        ):
+            return cached[1]
+
+        if hasattr(layer, "data_frame"):
+            x, y = layer.xy
+            index = SpatialIndex.from_points(layer.data_frame[x], layer.data_frame[y])
+        else:
+            index = SpatialIndex(self._layer_data(layer))
+        layer.spatial_index = (key, index)
+        return index
+
+    def select_features(self, layer_name, geometry, predicate="intersects"):
+        """Selects the features of a vector layer that intersect or fall within a polygon.
+
+        Args:
+            layer_name (str): The name of a layer added by add_geojson, add_shapefile or add_points_from_csv.
+            geometry (dict): The GeoJSON Polygon or MultiPolygon (or a Feature containing one) to select with.
+            predicate (str, optional): Either "intersects" or "within". Defaults to "intersects".
+
+        Raises:
+            ValueError: If the layer could not be found.
+
+        Returns:
+            dict: The selected features as a GeoJSON FeatureCollection.
+        """
+        layer = self.find_layer(layer_name)
+        if layer is None:
+            raise ValueError(f"The layer {layer_name} could not be found.")
+
+        if geometry.get("type") == "Feature":
+            geometry = geometry["geometry"]
+
+        indices = self._spatial_index(layer).query(geometry, predicate=predicate)
+        self.selection = {"layer": layer, "indices": indices}
+        return self.selection_to_geojson()
+
+    def enable_selection(self, layer_name, predicate="intersects", highlight=True):
+        """Selects the features of a layer whenever a polygon or rectangle is drawn on the map.
+
+        Args:
+            layer_name (str): The name of the layer to select from.
+            predicate (str, optional): Either "intersects" or "within". Defaults to "intersects".
+            highlight (bool, optional): Whether to show the selected features in a "Selection" layer. Defaults to True.
+        """
+        self._selection_options = {
+            "layer_name": layer_name,
+            "predicate": predicate,
+            "highlight": highlight,
+        }
+
+    def disable_selection(self):
+        """Stops selecting features from drawn shapes."""
+        self._selection_options = None
+
+    def _handle_draw(self, target, action, geo_json):
+        options = self._selection_options
+        if options is None or action != "created":
+            return
+        if geo_json["geometry"]["type"] not in ("Polygon", "MultiPolygon"):
+            return
+
+        selected = self.select_features(
+            options["layer_name"], geo_json, predicate=options["predicate"]
+        )
+        if options["highlight"]:
+            # Only replace the highlight added here, not a user layer of the same name
+            if self._selection_layer in self.layers:
+                self.remove_layers([self._selection_layer])
+            self._selection_layer = ipyleaflet.GeoJSON(
+                data=selected,
+                style={"color": "#ffff00", "weight": 3, "fillOpacity": 0.1},
+                name="Selection",
+            )
+            self.add_layer(self._selection_layer)
+
+    def selection_to_geojson(self):
+        """Returns the current selection as a GeoJSON FeatureCollection.
+
+        Returns:
+            dict: The selected features, or None if nothing has been selected yet.
+        """
+        if self.selection is None:
+            return None
+
+        layer, indices = self.selection["layer"], self.selection["indices"]
+        if hasattr(layer, "data_frame"):
+            x, y = layer.xy
+            rows = layer.data_frame.iloc[indices]
+            features = [
+                {
+                    "type": "Feature",
+                    "geometry": {"type": "Point", "coordinates": [row[x], row[y]]},
+                    "properties": row,
+                }
+                for row in rows.to_dict("records")
+            ]
+        else:
+            data = self._layer_data(layer)
+            if data.get("type") == "FeatureCollection":
+                source = data["features"]
+            else:
+                source = [data]
+            features = [source[i] for i in indices]
+        return {"type": "FeatureCollection", "features": features}
+
+    def selection_to_df(self):
+        """Returns the attributes of the current selection as a pandas DataFrame.
+
+        Returns:
+            pd.DataFrame: The attributes of the selected features, or None if nothing has been selected yet.
+        """
+        import pandas as pd
+
+        if self.selection is None:
+            return None
+
+        layer, indices = self.selection["layer"], self.selection["indices"]
+        if hasattr(layer, "data_frame"):
+            return layer.data_frame.iloc[indices]
+
+        features = self.selection_to_geojson()["features"]
+        rows = []
+        for feature in features:
+            properties = dict(feature.get("properties") or {})
+            properties.pop("style", None)
+            rows.append(properties)
+        return pd.DataFrame(rows, index=indices)
 
     def add_points_from_csv(
         self,
@@ -135,6 +868,7 @@ class Map(ipyleaflet.Map):
         y="latitude",
         label=None,
         layer_name="Marker cluster",
+        background=False,
     ):
         """Adds points from a CSV file containing lat/lon information and display data on the map.
 
@@ -144,22 +878,23 @@ class Map(ipyleaflet.Map):
             y (str, optional): The name of the column containing latitude coordinates. Defaults to "latitude".
             label (str, optional): The name of the column containing label information to used for marker popup. Defaults to None.
             layer_name (str, optional): The layer name to use. Defaults to "Marker cluster".
+            background (bool, optional): Whether to read the CSV in a background thread, with the progress shown in the toolbar output panel. The markers are built once it is read. Defaults to False.
 
         Raises:
             FileNotFoundError: The specified input csv does not exist.
             ValueError: The specified x column does not exist.
             ValueError: The specified y column does not exist.
             ValueError: The specified label column does not exist.
+
+        Returns:
+            LoadTask: The background task if background is True, otherwise None.
         """
         import pandas as pd
-        import ipywidgets as widgets
-        from ipyleaflet import Marker, MarkerCluster
 
         if not os.path.exists(in_csv):
             raise FileNotFoundError("The specified input csv does not exist.")
 
-        df = pd.read_csv(in_csv)
-        col_names = df.columns.values.tolist()
+        col_names = pd.read_csv(in_csv, nrows=0).columns.values.tolist()
 
         if x not in col_names:
             raise ValueError(f"x must be one of the following: {', '.join(col_names)}")
@@ -172,23 +907,39 @@ class Map(ipyleaflet.Map):
                 f"label must be one of the following: {', '.join(col_names)}"
             )
 
-        points = list(zip(df[y], df[x]))
+        def build(df):
+            return self._marker_cluster(df, x, y, label, layer_name)
+
+        if background:
+            return self._load_in_background(
+                layer_name, lambda task: _read_csv(in_csv, task.update), build
+            )
 
         self.default_style = {"cursor": "wait"}
-        if label is not None:
-            labels = df[label]
-            markers = [
-                Marker(
+        self.add_layer(build(_read_csv(in_csv)))
+        self.default_style = {"cursor": "default"}
+
+    def _marker_cluster(self, df, x, y, label, layer_name):
+        """Builds the marker cluster for add_points_from_csv."""
+        import ipywidgets as widgets
+        from ipyleaflet import Marker, MarkerCluster
+
+        points = list(zip(df[y], df[x]))
+        labels = df[label] if label is not None else None
+        markers = []
+        for index, point in enumerate(points):
+            if labels is not None:
+                marker = Marker(
                     location=point, draggable=False, popup=widgets.HTML(labels[index])
                 )
-                for index, point in enumerate(points)
-            ]
-        else:
-            markers = [Marker(location=point, draggable=False) for point in points]
+            else:
+                marker = Marker(location=point, draggable=False)
+            markers.append(marker)
 
         marker_cluster = MarkerCluster(markers=markers, name=layer_name)
-        self.add_layer(marker_cluster)
-        self.default_style = {"cursor": "default"}
+        marker_cluster.data_frame = df
+        marker_cluster.xy = (x, y)
+        return marker_cluster
 
     def add_ee_layer(
         self, ee_object, vis_params={}, name=None, shown=True, opacity=1.0
@@ -203,34 +954,41 @@ class Map(ipyleaflet.Map):
         """
 
         ee_layer = ee_tile_layer(ee_object, vis_params, name, shown, opacity)
+        ee_layer.url = self.tile_url(ee_layer.url)
         self.add_layer(ee_layer)
 
     addLayer = add_ee_layer
 
 
-def shp_to_geojson(in_shp, out_geojson=None):
+def shp_to_geojson(in_shp, out_geojson=None, topojson=False, quantization=100000):
     """Converts a shapefile to GeoJSON.
 
     Args:
         in_shp (str): The file path to the input shapefile.
         out_geojson (str, optional): The file path to the output GeoJSON. Defaults to None.
+        topojson (bool, optional): Whether to encode the output as TopoJSON, which stores borders shared by neighboring polygons only once. Defaults to False.
+        quantization (int, optional): The number of grid steps along each axis used by the TopoJSON encoding. Defaults to 100000.
 
     Raises:
         FileNotFoundError: If the input shapefile does not exist.
 
     Returns:
-        dict: The dictionary of the GeoJSON.
+        dict: The dictionary of the GeoJSON, or of the TopoJSON topology if topojson is True.
     """
     import json
-    import shapefile
 
     in_shp = os.path.abspath(in_shp)
 
     if not os.path.exists(in_shp):
         raise FileNotFoundError("The provided shapefile could not be found.")
 
-    sf = shapefile.Reader(in_shp)
-    geojson = sf.__geo_interface__
+    geojson = _read_shapefile(in_shp)
+
+    if topojson:
+        from .topology import topology
+
+        name = os.path.splitext(os.path.basename(in_shp))[0]
+        geojson = topology(geojson, name=name, quantization=quantization)
 
     if out_geojson is None:
         return geojson
@@ -240,7 +998,52 @@ def shp_to_geojson(in_shp, out_geojson=None):
         if not os.path.exists(out_dir):
             os.makedirs(out_dir)
         with open(out_geojson, "w") as f:
-            f.write(json.dumps(geojson))
+            if topojson:
+                f.write(json.dumps(geojson, separators=(",", ":")))
+            else:
+                f.write(json.dumps(geojson))
+
+
+def _read_csv(in_csv, progress=no_progress):
+    """Reads a CSV file into a DataFrame in chunks, reporting the fraction of bytes read."""
+    import pandas as pd
+
+    size = max(os.path.getsize(in_csv), 1)
+    chunks = []
+    with open(in_csv, "rb") as f:
+        for chunk in pd.read_csv(f, chunksize=100000):
+            chunks.append(chunk)
+            progress(f.tell() / size, "Reading")
+    return pd.concat(chunks, ignore_index=True) if chunks else pd.read_csv(in_csv)
+
+
+def _read_shapefile(in_shp, progress=None):
+    """Reads a shapefile into a GeoJSON dictionary, optionally reporting the fraction of records read.
+
+    The attributes are decoded in bulk from the .dbf file and the geometries are read with pyshp.
+    """
+    import shapefile
+    from .dbf import sidecar_file, dbf_to_records
+
+    in_dbf = sidecar_file(in_shp, ".dbf")
+    with shapefile.Reader(in_shp) as sf:
+        n_shapes = len(sf)
+        properties = dbf_to_records(in_dbf) if in_dbf is not None else []
+
+        features = []
+        for i, shape in enumerate(sf.iterShapes()):
+            if progress is not None and i % 1000 == 0:
+                progress(i / max(n_shapes, 1))
+            features.append(
+                {
+                    "type": "Feature",
+                    "properties": properties[i] if i < len(properties) else {},
+                    "geometry": None
+                    if shape.shapeType == shapefile.NULL
+                    else shape.__geo_interface__,
+                }
+            )
+        return {"bbox": list(sf.bbox), "type": "FeatureCollection", "features": features}
 
 
 def csv_to_shp(in_csv, out_shp, x="longitude", y="latitude"):
@@ -329,6 +1132,212 @@ def csv_to_geojson(in_csv, out_geojson, x="longitude", y="latitude"):
     gdf.to_file(out_geojson, driver="GeoJSON")
 
 
+def _renew_data_token(change):
+    """Marks the data of a GeoJSON layer as changed for its cached spatial index."""
+    change["owner"].data_token = object()
+
+
+def _read_vector(in_vector):
+    """Reads a shapefile, GeoJSON or TopoJSON file or dictionary into a GeoJSON dictionary."""
+    import json
+    from .topology import is_topology, feature
+
+    if isinstance(in_vector, dict):
+        data = in_vector
+    elif not isinstance(in_vector, str):
+        raise TypeError("The input vector must be a type of str or dict.")
+    elif not os.path.exists(in_vector):
+        raise FileNotFoundError("The provided vector file could not be found.")
+    elif in_vector.lower().endswith(".shp"):
+        return shp_to_geojson(in_vector)
+    else:
+        with open(in_vector) as f:
+            data = json.load(f)
+
+    if is_topology(data):
+        return feature(data)
+    return data
+
+
+# The spatial index of a worker process, keyed by the file holding its polygons
+_join_cache = {}
+
+
+def _locate_points(args):
+    """Locates points in the polygons pickled to a file, indexing them once per worker process."""
+    import pickle
+    from .spatial import SpatialIndex
+
+    in_pickle, xy = args
+    if in_pickle not in _join_cache:
+        with open(in_pickle, "rb") as f:
+            polygons = pickle.load(f)
+        _join_cache.clear()
+        _join_cache[in_pickle] = SpatialIndex(polygons)
+    return _join_cache[in_pickle].locate(xy[0], xy[1])
+
+
+def spatial_join(
+    in_csv,
+    in_polygons,
+    x="longitude",
+    y="latitude",
+    how="join",
+    out_csv=None,
+    chunk_size=100000,
+    processes=None,
+):
+    """Joins points from a CSV file with the polygons containing them.
+
+    The points are read in chunks and located with an STR-tree over the polygon
+    bounding boxes followed by vectorized ray casting.
+
+    Args:
+        in_csv (str): The file path to the input CSV file.
+        in_polygons (str | dict): The file path to a polygon shapefile or GeoJSON, or a GeoJSON dictionary.
+        x (str, optional): The name of the column containing longitude coordinates. Defaults to "longitude".
+        y (str, optional): The name of the column containing latitude coordinates. Defaults to "latitude".
+        how (str, optional): Either "join" to attach the polygon attributes to each point, or "count" to count the points in each polygon. Defaults to "join".
+        out_csv (str, optional): The file path to the output CSV file. Defaults to None.
+        chunk_size (int, optional): The number of points read and processed at a time. Defaults to 100000.
+        processes (int, optional): The number of worker processes used to locate the chunks. Defaults to None, which processes the chunks in the current process.
+
+    Raises:
+        FileNotFoundError: The specified input csv does not exist.
+        ValueError: The specified x or y column does not exist, or how is not supported.
+
+    Returns:
+        pd.DataFrame: The points with the attributes of the containing polygon (NaN for points outside all polygons), or the polygon attributes with a "count" column.
+    """
+    import pickle
+    import tempfile
+    import numpy as np
+    import pandas as pd
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+
+    if not os.path.exists(in_csv):
+        raise FileNotFoundError("The input csv does not exist.")
+
+    if how not in ("join", "count"):
+        raise ValueError("how must be one of the following: join, count")
+
+    polygons = _read_vector(in_polygons)
+    attributes = pd.DataFrame(
+        [
+            {k: v for k, v in (f.get("properties") or {}).items() if k != "style"}
+            for f in polygons["features"]
+        ],
+        index=range(len(polygons["features"])),
+    )
+
+    chunks = pd.read_csv(in_csv, chunksize=chunk_size)
+    first = next(chunks, None)
+    if first is None:
+        raise ValueError("The input csv does not contain any rows.")
+
+    col_names = first.columns.values.tolist()
+    if x not in col_names:
+        raise ValueError(f"x must be one of the following: {', '.join(col_names)}")
+    if y not in col_names:
+        raise ValueError(f"y must be one of the following: {', '.join(col_names)}")
+
+    def all_chunks():
+        yield first
+        yield from chunks
+
+    def xy(chunk):
+        return chunk[x].to_numpy(float), chunk[y].to_numpy(float)
+
+    tmp_dir = None
+    if processes is not None and processes > 1:
+        # The polygons are pickled once, rather than with every chunk, and each
+        # worker builds its index from the file the first time it needs it
+        tmp_dir = tempfile.TemporaryDirectory()
+        in_pickle = os.path.join(tmp_dir.name, "polygons.pickle")
+        with open(in_pickle, "wb") as f:
+            pickle.dump(polygons, f, pickle.HIGHEST_PROTOCOL)
+        executor = ProcessPoolExecutor(processes)
+
+        def pooled():
+            # Keep a bounded number of chunks in flight and yield them in order
+            pending = deque()
+            for frame in all_chunks():
+                task = (in_pickle, xy(frame))
+                pending.append((frame, executor.submit(_locate_points, task)))
+                if len(pending) > 2 * processes:
+                    frame, future = pending.popleft()
+                    yield frame, future.result()
+            while pending:
+                frame, future = pending.popleft()
+                yield frame, future.result()
+
+        results = pooled()
+    else:
+        from .spatial import SpatialIndex
+
+        executor = None
+        index = SpatialIndex(polygons)
+        results = ((frame, index.locate(*xy(frame))) for frame in all_chunks())
+
+    try:
+        if how == "count":
+            counts = np.zeros(len(attributes) + 1, dtype=int)
+            for _, polygon_ids in results:
+                counts += np.bincount(polygon_ids + 1, minlength=len(counts))
+            out_df = attributes.copy()
+            out_df["count"] = counts[1:]
+        else:
+            renamed = {
+                col: f"{col}_right" for col in attributes.columns if col in col_names
+            }
+            right = attributes.rename(columns=renamed)
+            frames = []
+            for frame, polygon_ids in results:
+                matched = right.reindex(polygon_ids).reset_index(drop=True)
+                frames.append(
+                    pd.concat([frame.reset_index(drop=True), matched], axis=1)
+                )
+            out_df = pd.concat(frames, ignore_index=True)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        if tmp_dir is not None:
+            tmp_dir.cleanup()
+
+    if out_csv is not None:
+        out_csv = os.path.abspath(out_csv)
+        out_dir = os.path.dirname(out_csv)
+        if not os.path.exists(out_dir):
+            os.makedirs(out_dir)
+        out_df.to_csv(out_csv, index=False)
+
+    return out_df
+
+
+def vector_tile_layer(data, style=None, name="Untitled"):
+    """Rasterizes GeoJSON data into PNG tiles and returns a TileLayer serving them.
+
+    The tiles are rendered on demand by a local tile server, and the most recently used tiles are cached in memory.
+
+    Args:
+        data (dict): The GeoJSON data to render.
+        style (dict, optional): The style dictionary (color, weight, opacity, fillColor, fillOpacity). Defaults to None.
+        name (str, optional): The name of the layer. Defaults to "Untitled".
+
+    Returns:
+        ipyleaflet.TileLayer: The tile layer.
+    """
+    from .tiles import VectorTileRenderer, get_tile_server
+
+    renderer = VectorTileRenderer(data, style=style)
+    server = get_tile_server()
+    url = server.register("vector-" + random_string(8), renderer.get_tile)
+    tile_layer = TileLayer(url=url, name=name, attribution="geodemo")
+    tile_layer.renderer = renderer
+    return tile_layer
+
+
 def ee_tile_layer(
     ee_object, vis_params={}, name="Layer untitled", shown=True, opacity=1.0
 ):
@@ -0,0 +1,154 @@
+"""A module with custom ipyleaflet layers used by the geodemo Map.
+"""
+
+import ipyleaflet
+from traitlets import Dict
+
+
+def _as_features(features):
+    """Normalizes a Feature, FeatureCollection or list of features to a list."""
+    if isinstance(features, dict):
+        if features.get("type") == "FeatureCollection":
+            return list(features["features"])
+        elif features.get("type") == "Feature":
+            return [features]
+        raise TypeError("The input must be a Feature or FeatureCollection.")
+    return list(features)
+
+
+class ChunkedGeoJSON(ipyleaflet.LayerGroup):
+    """A GeoJSON layer that can be updated incrementally.
+
+    The features are stored in a group of GeoJSON sub-layers (chunks) holding at
+    most chunk_size features each. Appending features fills the last chunk, then
+    adds new chunks, and updating features only resends the chunks containing
+    them, so a change never sends more than a few small chunks to the frontend.
+
+    Args:
+        data (dict, optional): The initial GeoJSON FeatureCollection. Defaults to None.
+        style (dict, optional): The style applied to the features. Defaults to None.
+        key (str, optional): The feature identifier used by update(), either "id" or a property name. Defaults to "id".
+        chunk_size (int, optional): The maximum number of features of a chunk. Defaults to 1000.
+    """
+
+    style = Dict()
+    hover_style = Dict()
+
+    def __init__(self, data=None, style=None, key="id", chunk_size=1000, **kwargs):
+        super().__init__(**kwargs)
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be a positive integer.")
+        self.key = key
+        self.chunk_size = chunk_size
+        self._index = {}
+        if style is not None:
+            self.style = style
+        if data is not None:
+            self.append(data)
+
+    @classmethod
+    def from_geojson(cls, layer, key="id", chunk_size=1000):
+        """Converts an existing GeoJSON layer, splitting its features into chunks.
+
+        The features are sent to the frontend once more, in chunks, so that later
+        updates of the chunked layer only resend the chunks they change.
+
+        Args:
+            layer (ipyleaflet.GeoJSON): The layer to convert. It is left unchanged.
+            key (str, optional): The feature identifier. Defaults to "id".
+            chunk_size (int, optional): The maximum number of features of a chunk. Defaults to 1000.
+
+        Returns:
+            ChunkedGeoJSON: The chunked layer.
+        """
+        return cls(
+            data=_as_features(layer.data) if layer.data else [],
+            style=layer.style,
+            key=key,
+            chunk_size=chunk_size,
+            name=layer.name,
+            hover_style=layer.hover_style,
+        )
+
+    def _feature_key(self, feature):
+        if self.key == "id":
+            return feature.get("id")
+        return (feature.get("properties") or {}).get(self.key)
+
+    def _reindex(self, chunk, start):
+        for i, feature in enumerate(chunk.data.get("features", [])[start:], start):
+            fid = self._feature_key(feature)
+            if fid is not None:
+                self._index[fid] = (chunk, i)
+
+    def _chunk(self, features):
+        return ipyleaflet.GeoJSON(
+            data={"type": "FeatureCollection", "features": features},
+            style=self.style,
+            hover_style=self.hover_style,
+        )
+
+    def append(self, features):
+        """Appends features to the layer, sending only the new features and the last chunk.
+
+        Args:
+            features (dict | list): A Feature, FeatureCollection or list of features.
+        """
+        features = _as_features(features)
+        if not features:
+            return
+
+        if self.layers and len(self.layers[-1].data["features"]) < self.chunk_size:
+            # Fill the last chunk first, which only resends that chunk
+            chunk = self.layers[-1]
+            offset = len(chunk.data["features"])
+            room = self.chunk_size - offset
+            chunk.data = {
+                "type": "FeatureCollection",
+                "features": chunk.data["features"] + features[:room],
+            }
+            self._reindex(chunk, offset)
+            features = features[room:]
+
+        chunks = []
+        for start in range(0, len(features), self.chunk_size):
+            chunk = self._chunk(features[start : start + self.chunk_size])
+            self._reindex(chunk, 0)
+            chunks.append(chunk)
+        if chunks:
+            self.layers = tuple(self.layers) + tuple(chunks)
+
+    def update(self, features):
+        """Replaces features by identifier, appending the ones that are not in the layer yet.
+
+        Args:
+            features (dict | list): A Feature, FeatureCollection or list of features.
+        """
+        changed = {}
+        new_features = []
+        for feature in _as_features(features):
+            fid = self._feature_key(feature)
+            if fid is None or fid not in self._index:
+                new_features.append(feature)
+                continue
+            chunk, i = self._index[fid]
+            if chunk.model_id not in changed:
+                changed[chunk.model_id] = (chunk, list(chunk.data["features"]))
+            changed[chunk.model_id][1][i] = feature
+
+        for chunk, chunk_features in changed.values():
+            chunk.data = {"type": "FeatureCollection", "features": chunk_features}
+
+        self.append(new_features)
+
+    @property
+    def data(self):
+        """The features of all chunks as a single FeatureCollection."""
+        features = []
+        for chunk in self.layers:
+            features.extend(chunk.data.get("features", []))
+        return {"type": "FeatureCollection", "features": features}
+
+    @property
+    def __geo_interface__(self):
+        return self.data
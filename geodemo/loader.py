@@ -0,0 +1,234 @@
+"""A module for loading layers in the background without blocking the notebook.
+"""
+
+import asyncio
+import warnings
+import threading
+import ipywidgets as widgets
+
+
+class LoadCancelled(Exception):
+    """Raised inside a load when its task has been cancelled."""
+
+
+def no_progress(fraction, message=None):
+    """A progress callback that ignores the progress of a synchronous load."""
+
+
+def _running_loop():
+    """Returns the running event loop of the current thread, or None."""
+    with warnings.catch_warnings():
+        # Newer Pythons deprecate get_event_loop() outside of a running loop
+        warnings.simplefilter("ignore", DeprecationWarning)
+        try:
+            loop = asyncio.get_event_loop()
+        except RuntimeError:
+            return None
+    return loop if loop.is_running() else None
+
+
+def _close_widgets(value):
+    """Closes the widgets in a value produced by a cancelled task."""
+    if isinstance(value, widgets.Widget):
+        value.close()
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            _close_widgets(item)
+
+
+class LoadTask:
+    """Prepares a layer in a background thread and adds it to the map when done.
+
+    The preparation (reading and parsing the data) runs in a daemon thread and
+    reports its progress through update(), which also raises LoadCancelled once
+    the task has been cancelled. It should only produce plain data: widgets are
+    not thread-safe, so the prepared data is handed to the finish callback, which
+    builds the layer and adds it, on the event loop of the kernel, i.e. on the
+    main thread, or directly from the worker thread when no event loop is
+    running. Widgets returned by the preparation of a cancelled task are closed.
+
+    Args:
+        name (str): The name shown next to the progress bar.
+        prepare (callable): A function taking the task and returning the prepared data.
+        finish (callable): A function receiving the prepared data, adding the layer and returning it.
+    """
+
+    def __init__(self, name, prepare, finish):
+
+        self.name = name
+        self.status = "pending"
+        self.layer = None
+        self.error = None
+        self._prepare = prepare
+        self._finish = finish
+        self._cancelled = threading.Event()
+        self._done = threading.Event()
+        self._loop = None
+        self._callbacks = []
+        # The latest progress reported by the worker, not shown yet
+        self._progress_lock = threading.Lock()
+        self._pending_progress = None
+
+        self.progress = widgets.FloatProgress(
+            value=0,
+            min=0,
+            max=1,
+            description=name,
+            bar_style="info",
+            style={"description_width": "initial"},
+            layout=widgets.Layout(width="220px"),
+        )
+        self.label = widgets.Label(value="Waiting")
+        self.cancel_button = widgets.Button(
+            icon="times",
+            tooltip="Cancel",
+            button_style="primary",
+            layout=widgets.Layout(width="28px", padding="0px"),
+        )
+        self.cancel_button.on_click(lambda b: self.cancel())
+        self.widget = widgets.HBox([self.progress, self.label, self.cancel_button])
+
+    def start(self):
+        """Starts the load in a background thread."""
+        self._loop = _running_loop()
+        self.status = "running"
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        data = None
+        try:
+            data = self._prepare(self)
+        except LoadCancelled:
+            pass
+        except Exception as e:
+            self.error = e
+        self._call_soon(self._complete, data)
+
+    def _call_soon(self, func, *args):
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(func, *args)
+        else:
+            func(*args)
+
+    def _complete(self, data):
+        try:
+            if self._cancelled.is_set():
+                _close_widgets(data)
+                self.status = "cancelled"
+                self.label.value = "Cancelled"
+                self.progress.bar_style = "warning"
+            elif self.error is not None:
+                self.status = "error"
+                self.label.value = f"Failed: {self.error}"
+                self.progress.bar_style = "danger"
+            else:
+                self.layer = self._finish(data)
+                self.status = "done"
+                self.progress.value = 1
+                self.label.value = "Done"
+                self.progress.bar_style = "success"
+        except Exception as e:
+            self.status = "error"
+            self.error = e
+            self.label.value = f"Failed: {e}"
+            self.progress.bar_style = "danger"
+        finally:
+            self.cancel_button.disabled = True
+            self._done.set()
+            for callback in self._callbacks:
+                callback(self)
+
+    def on_done(self, callback):
+        """Registers a function called with the task once it has finished, failed or been cancelled.
+
+        Args:
+            callback (callable): The function to call.
+        """
+        self._callbacks.append(callback)
+        if self._done.is_set():
+            callback(self)
+
+    def update(self, fraction, message=None):
+        """Reports the progress of the load. Called from the worker thread.
+
+        The progress widgets are updated on the event loop. Updates reported
+        before the loop got to show the previous one are coalesced into it.
+
+        Args:
+            fraction (float): The completed fraction, between 0 and 1.
+            message (str, optional): The current step. Defaults to None.
+
+        Raises:
+            LoadCancelled: If the task has been cancelled.
+        """
+        if self._cancelled.is_set():
+            raise LoadCancelled()
+        with self._progress_lock:
+            scheduled = self._pending_progress is not None
+            if message is None and scheduled:
+                message = self._pending_progress[1]
+            self._pending_progress = (fraction, message)
+        if not scheduled:
+            self._call_soon(self._show_progress)
+
+    def _show_progress(self):
+        with self._progress_lock:
+            pending, self._pending_progress = self._pending_progress, None
+        if pending is None or self._done.is_set() or self._cancelled.is_set():
+            return
+        fraction, message = pending
+        # Skip tiny increments to avoid flooding the frontend with messages
+        if fraction - self.progress.value >= 0.01 or fraction < self.progress.value:
+            self.progress.value = fraction
+        if message is not None and message != self.label.value:
+            self.label.value = message
+
+    def cancel(self):
+        """Cancels the load. The layer is neither built nor added, even if its data was already prepared."""
+        if not self._done.is_set():
+            self._cancelled.set()
+            self.label.value = "Cancelling"
+
+    @property
+    def cancelled(self):
+        """Whether the task has been cancelled."""
+        return self._cancelled.is_set()
+
+    def done(self):
+        """Returns whether the task has finished, failed or been cancelled."""
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """Waits for the task to finish.
+
+        Args:
+            timeout (float, optional): The maximum number of seconds to wait. Defaults to None.
+
+        Returns:
+            bool: True if the task has finished.
+        """
+        return self._done.wait(timeout)
+
+    def result(self, timeout=None):
+        """Waits for the task and returns the added layer.
+
+        In a notebook, the layer is added by the event loop of the kernel, so this
+        must not be called from the cell that started the task; use on_done() there.
+
+        Args:
+            timeout (float, optional): The maximum number of seconds to wait. Defaults to None.
+
+        Raises:
+            TimeoutError: If the task did not finish in time.
+            LoadCancelled: If the task was cancelled.
+
+        Returns:
+            ipyleaflet.Layer: The added layer.
+        """
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"The load of {self.name} did not finish in time.")
+        if self.status == "cancelled":
+            raise LoadCancelled()
+        if self.error is not None:
+            raise self.error
+        return self.layer
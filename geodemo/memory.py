@@ -0,0 +1,283 @@
+"""A module for offloading the data of hidden vector layers to disk.
+"""
+
+import os
+import gzip
+import json
+import time
+import tempfile
+import threading
+from collections import OrderedDict
+
+# The data of offloaded layers. Leaflet rejects an empty dict with an
+# "Invalid GeoJSON object" error in the frontend.
+EMPTY = {"type": "FeatureCollection", "features": []}
+
+
+def estimate_size(data, sample=100):
+    """Estimates the size of GeoJSON data serialized as compact JSON.
+
+    Large FeatureCollections are estimated from an evenly spaced sample of their
+    features rather than serialized in full.
+
+    Args:
+        data (dict): The GeoJSON data.
+        sample (int, optional): The number of features to serialize. Defaults to 100.
+
+    Returns:
+        int: The estimated size in bytes.
+    """
+    features = data.get("features") if isinstance(data, dict) else None
+    if not isinstance(features, list) or len(features) <= sample:
+        return len(json.dumps(data, separators=(",", ":")))
+    step = len(features) / sample
+    picked = [features[int(i * step)] for i in range(sample)]
+    size = len(json.dumps(picked, separators=(",", ":")))
+    return int(size * len(features) / sample)
+
+
+class LayerMemoryManager:
+    """Keeps the data of hidden GeoJSON layers on disk instead of in memory.
+
+    A managed layer whose visible trait stays False for longer than the timeout
+    has its data written to a compressed file and replaced by an empty
+    FeatureCollection, both in the kernel and in the widget state. When the total size of the resident layers exceeds the
+    memory budget, hidden layers are offloaded right away, least recently used
+    first. Offloaded data is loaded back when the layer becomes visible again.
+
+    Only changes of the visible trait are seen. ipyleaflet's LayersControl
+    toggles layers in the browser without updating the trait, so unchecking a
+    layer there does not offload it; the layer manager of the toolbar does.
+
+    Widgets are not thread-safe, so the timeouts run on the event loop of the
+    kernel. Without a running event loop, e.g. in a script, a layer whose
+    timeout has expired is offloaded the next time the manager is used.
+
+    Args:
+        hidden_timeout (float, optional): The number of seconds a layer has to stay hidden before it is offloaded. Defaults to 60.
+        memory_budget (int, optional): The maximum total size in bytes of the resident managed layers. Defaults to 512 MB.
+        cache_dir (str, optional): The directory for the offloaded data. Defaults to None, which creates a temporary directory.
+    """
+
+    def __init__(
+        self, hidden_timeout=60, memory_budget=512 * 1024 * 1024, cache_dir=None
+    ):
+
+        if cache_dir is None:
+            cache_dir = tempfile.mkdtemp(prefix="geodemo_layers_")
+        elif not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+
+        self.hidden_timeout = hidden_timeout
+        self.memory_budget = memory_budget
+        self.cache_dir = os.path.abspath(cache_dir)
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+
+    def register(self, layer):
+        """Starts managing a GeoJSON layer.
+
+        Args:
+            layer (ipyleaflet.GeoJSON): The layer to manage.
+        """
+        with self._lock:
+            if layer.model_id in self._entries:
+                return
+            self._entries[layer.model_id] = {
+                "layer": layer,
+                "size": None,
+                "path": None,
+                "timer": None,
+                "due": None,
+                "last_used": time.time(),
+            }
+            layer.observe(self._visible_changed, names="visible")
+            layer.observe(self._data_changed, names="data")
+            if not layer.visible:
+                self._schedule(self._entries[layer.model_id])
+            self._enforce_budget()
+
+    def unregister(self, layer, reload=True):
+        """Stops managing a layer.
+
+        Args:
+            layer (ipyleaflet.GeoJSON): The managed layer.
+            reload (bool, optional): Whether to load the data back into the layer if it was offloaded. Otherwise the offloaded data is discarded, e.g. for a layer removed from the map. Defaults to True.
+        """
+        with self._lock:
+            entry = self._entries.get(layer.model_id)
+            if entry is None:
+                return
+            layer.unobserve(self._visible_changed, names="visible")
+            layer.unobserve(self._data_changed, names="data")
+            if reload:
+                self.reload(layer)
+            elif entry["path"] is not None:
+                os.remove(entry["path"])
+            self._cancel(entry)
+            del self._entries[layer.model_id]
+
+    def _visible_changed(self, change):
+        layer = change["owner"]
+        with self._lock:
+            entry = self._entries.get(layer.model_id)
+            if entry is None:
+                return
+            if change["new"]:
+                self.reload(layer)
+                entry["last_used"] = time.time()
+                self._entries.move_to_end(layer.model_id)
+                self._enforce_budget()
+            else:
+                self._schedule(entry)
+                self._enforce_budget()
+
+    def _data_changed(self, change):
+        with self._lock:
+            entry = self._entries.get(change["owner"].model_id)
+            # Offloading and reloading do not change the size of the data
+            if entry is not None and entry["path"] is None:
+                entry["size"] = None
+
+    def _size(self, entry):
+        """Returns the size of the data of a layer, estimating it again after a change."""
+        if entry["size"] is None:
+            entry["size"] = estimate_size(entry["layer"].data)
+        return entry["size"]
+
+    def _schedule(self, entry):
+        from .loader import _running_loop
+
+        self._cancel(entry)
+        if self.hidden_timeout is None:
+            return
+        loop = _running_loop()
+        if loop is not None:
+            entry["timer"] = loop.call_later(
+                self.hidden_timeout, self.offload, entry["layer"]
+            )
+        else:
+            entry["due"] = time.time() + self.hidden_timeout
+
+    @staticmethod
+    def _cancel(entry):
+        if entry["timer"] is not None:
+            entry["timer"].cancel()
+            entry["timer"] = None
+        entry["due"] = None
+
+    def _offload_due(self):
+        """Offloads the layers whose timeout has expired without an event loop to run it."""
+        now = time.time()
+        for entry in list(self._entries.values()):
+            if entry["due"] is not None and entry["due"] <= now:
+                self.offload(entry["layer"])
+
+    def _enforce_budget(self):
+        self._offload_due()
+        # Resident layers are visited from the least recently used one
+        for entry in list(self._entries.values()):
+            if self.resident_size() <= self.memory_budget:
+                break
+            if not entry["layer"].visible:
+                self.offload(entry["layer"])
+
+    def resident_size(self):
+        """Returns the total size of the managed layers held in memory.
+
+        Returns:
+            int: The size in bytes.
+        """
+        with self._lock:
+            self._offload_due()
+            return sum(
+                self._size(e) for e in self._entries.values() if e["path"] is None
+            )
+
+    def offload(self, layer):
+        """Writes the data of a hidden layer to disk and clears it from memory.
+
+        Args:
+            layer (ipyleaflet.GeoJSON): The managed layer.
+        """
+        with self._lock:
+            entry = self._entries.get(layer.model_id)
+            if entry is None or entry["path"] is not None or layer.visible:
+                return
+            # Keep the size of the data for the report while it is on disk
+            self._size(entry)
+            self._cancel(entry)
+            path = os.path.join(self.cache_dir, f"{layer.model_id}.json.gz")
+            with gzip.open(path, "wt", encoding="utf-8") as f:
+                json.dump(layer.data, f, separators=(",", ":"))
+            entry["path"] = path
+            layer.data = dict(EMPTY, features=[])
+
+    def reload(self, layer):
+        """Loads the data of an offloaded layer back into the layer.
+
+        A layer that is still hidden is offloaded again after the timeout.
+
+        Args:
+            layer (ipyleaflet.GeoJSON): The managed layer.
+        """
+        with self._lock:
+            entry = self._entries.get(layer.model_id)
+            if entry is None:
+                return
+            self._cancel(entry)
+            if entry["path"] is not None:
+                with gzip.open(entry["path"], "rt", encoding="utf-8") as f:
+                    data = json.load(f)
+                layer.data = data
+                os.remove(entry["path"])
+                entry["path"] = None
+            if not layer.visible:
+                self._schedule(entry)
+
+    def data(self, layer):
+        """Returns the data of a layer without loading it back into the layer.
+
+        Args:
+            layer (ipyleaflet.GeoJSON): The layer.
+
+        Returns:
+            dict: The GeoJSON data, read from disk if the layer is offloaded.
+        """
+        with self._lock:
+            entry = self._entries.get(layer.model_id)
+            if entry is None or entry["path"] is None:
+                return layer.data
+            with gzip.open(entry["path"], "rt", encoding="utf-8") as f:
+                return json.load(f)
+
+    def report(self):
+        """Returns the memory state of the managed layers.
+
+        Returns:
+            pd.DataFrame: One row per layer with its name, visibility, state, size and offloaded file size.
+        """
+        import pandas as pd
+
+        rows = []
+        with self._lock:
+            self._offload_due()
+            for entry in self._entries.values():
+                layer = entry["layer"]
+                offloaded = entry["path"] is not None
+                rows.append(
+                    {
+                        "name": layer.name,
+                        "visible": layer.visible,
+                        "state": "offloaded" if offloaded else "resident",
+                        "size_mb": self._size(entry) / 1024 ** 2,
+                        "disk_mb": os.path.getsize(entry["path"]) / 1024 ** 2
+                        if offloaded
+                        else 0.0,
+                        "last_used": pd.Timestamp(entry["last_used"], unit="s"),
+                    }
+                )
+        return pd.DataFrame(
+            rows,
+            columns=["name", "visible", "state", "size_mb", "disk_mb", "last_used"],
+        )
@@ -0,0 +1,583 @@
+"""A module for merging many vector files into one output file or map layer.
+"""
+
+import io
+import os
+import re
+import glob
+import json
+import shutil
+import zipfile
+import tempfile
+from collections import deque
+
+FORMATS = [".shp", ".geojson", ".json", ".zip"]
+
+# Attribute types, from the narrowest to the widest
+TYPES = ["bool", "int", "float", "str"]
+
+# The shapefile type holding each GeoJSON geometry type
+SHAPE_TYPES = {
+    "Point": "POINT",
+    "MultiPoint": "MULTIPOINT",
+    "LineString": "POLYLINE",
+    "MultiLineString": "POLYLINE",
+    "Polygon": "POLYGON",
+    "MultiPolygon": "POLYGON",
+}
+
+CHUNK_SIZE = 1024 * 1024
+
+# The properties of a feature, or the named CRS of files written before RFC 7946,
+# which also has properties
+_PROPERTIES = re.compile(r'"(properties|crs)"\s*:\s*')
+
+
+def expand_inputs(inputs):
+    """Expands file paths and glob patterns into a list of vector files.
+
+    The matches of each pattern are sorted, so the order of the merged features
+    only depends on the inputs.
+
+    Args:
+        inputs (str | list): A file path or glob pattern, or a list of them, e.g. "data/counties/*.shp".
+
+    Raises:
+        FileNotFoundError: If a file path does not exist.
+        ValueError: If a file format is not supported or no file matches.
+
+    Returns:
+        list: The absolute file paths, without duplicates.
+    """
+    if isinstance(inputs, str):
+        inputs = [inputs]
+
+    paths = []
+    for item in inputs:
+        if any(c in item for c in "*?["):
+            matches = sorted(glob.glob(item, recursive=True))
+            paths.extend(
+                m for m in matches if os.path.splitext(m)[1].lower() in FORMATS
+            )
+        elif not os.path.exists(item):
+            raise FileNotFoundError(f"The input file {item} could not be found.")
+        elif os.path.splitext(item)[1].lower() not in FORMATS:
+            raise ValueError(
+                f"The input format must be one of the following: {', '.join(FORMATS)}"
+            )
+        else:
+            paths.append(item)
+
+    paths = list(dict.fromkeys(os.path.abspath(p) for p in paths))
+    if not paths:
+        raise ValueError("No input file matches the provided inputs.")
+    return paths
+
+
+def _zip_datasets(names):
+    """Returns the member names of the datasets of a zip file: its shapefiles, or its GeoJSON files if it has none.
+
+    The members are listed directory by directory, the files of a directory
+    before its subdirectories, like an os.walk() of the extracted files.
+    """
+    found = {".shp": [], ".geojson": []}
+    files = [name for name in names if not name.endswith("/")]
+    for name in sorted(files, key=lambda name: (name.split("/")[:-1], name)):
+        ext = os.path.splitext(name)[1].lower()
+        if ext == ".json":
+            ext = ".geojson"
+        if ext in found:
+            found[ext].append(name)
+    return found[".shp"] or found[".geojson"]
+
+
+def _read_features(path):
+    """Reads the features of a shapefile, GeoJSON or zip file."""
+    from .geodemo import _read_vector
+
+    if not path.lower().endswith(".zip"):
+        return _read_vector(path)["features"]
+
+    features = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        with zipfile.ZipFile(path) as z:
+            datasets = _zip_datasets(z.namelist())
+            z.extractall(tmp_dir)
+        for dataset in datasets:
+            in_vector = os.path.join(tmp_dir, *dataset.split("/"))
+            features.extend(_read_vector(in_vector)["features"])
+    return features
+
+
+def _iter_properties(f):
+    """Yields the properties of the features of a GeoJSON or TopoJSON text stream.
+
+    Only the properties objects are decoded: the much larger geometries are
+    skipped by a streaming scan, like catalog.read_header() does.
+    """
+    decoder = json.JSONDecoder()
+    text, pos, eof = "", 0, False
+    while True:
+        match = _PROPERTIES.search(text, pos)
+        if match is not None:
+            try:
+                properties, pos = decoder.raw_decode(text, match.end())
+            except ValueError:
+                if eof:
+                    raise
+            else:
+                if match.group(1) == "properties" and isinstance(properties, dict):
+                    yield properties
+                continue
+        if eof:
+            return
+        chunk = f.read(CHUNK_SIZE)
+        eof = not chunk
+        # Keep the unmatched tail, which may hold the start of a split key
+        start = match.start() if match is not None else max(pos, len(text) - 64)
+        text, pos = text[start:] + chunk, 0
+
+
+def _value_type(value):
+    if value is None:
+        return None
+    elif isinstance(value, bool):
+        return "bool"
+    elif isinstance(value, int):
+        return "int"
+    elif isinstance(value, float):
+        return "float"
+    return "str"
+
+
+def _text(value):
+    """Returns the text of a value stored in a string field."""
+    if isinstance(value, str):
+        return value
+    elif isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return str(value)
+
+
+def _value_field(name, value):
+    """Returns the field holding a single value."""
+    value_type = _value_type(value)
+    if value_type == "int":
+        return {"name": name, "type": "int", "size": len(str(value)), "decimal": 0}
+    elif value_type == "float":
+        # The width and precision used by GDAL for floating point JSON values
+        return {"name": name, "type": "float", "size": 24, "decimal": 15}
+    elif value_type == "str":
+        size = len(_text(value).encode("utf-8"))
+        return {"name": name, "type": "str", "size": size, "decimal": 0}
+    return {"name": name, "type": value_type, "size": 1, "decimal": 0}
+
+
+def _dbf_schema(in_shp):
+    """Returns the attribute fields of a shapefile, read from its DBF header."""
+    from .dbf import sidecar_file, dbf_fields
+
+    in_dbf = sidecar_file(in_shp, ".dbf")
+    if in_dbf is None:
+        return []
+    fields = []
+    for name, field_type, _, size, decimal in dbf_fields(in_dbf)[3]:
+        if field_type in ("N", "F"):
+            value_type = "float" if decimal or field_type == "F" else "int"
+        elif field_type == "L":
+            value_type = "bool"
+        else:
+            value_type = "str"
+        fields.append(
+            {"name": name, "type": value_type, "size": size, "decimal": decimal}
+        )
+    return fields
+
+
+def _geojson_schema(f):
+    """Returns the attribute fields of a GeoJSON text stream, inferred from the values of its features."""
+    return _combine(
+        [_value_field(name, value) for name, value in properties.items()]
+        for properties in _iter_properties(f)
+    )
+
+
+def _combine(schemas):
+    """Merges the fields of the datasets of one input, matching them by name."""
+    fields = {}
+    for schema in schemas:
+        for field in schema:
+            name = field["name"]
+            fields[name] = _widen(fields[name], field) if name in fields else field
+    return list(fields.values())
+
+
+def _source_schema(path):
+    """Returns the attribute fields of one input as a list of dictionaries.
+
+    The features are not read: the fields of shapefiles come from the DBF
+    header alone, and the fields of GeoJSON files are inferred from the values
+    of their properties, skipping the geometries. A zip file is not extracted,
+    apart from the DBF files of its shapefiles.
+    """
+    if path.lower().endswith(".shp"):
+        return _dbf_schema(path)
+    elif not path.lower().endswith(".zip"):
+        with open(path, encoding="utf-8") as f:
+            return _geojson_schema(f)
+
+    schemas = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        with zipfile.ZipFile(path) as z:
+            names = z.namelist()
+            for dataset in _zip_datasets(names):
+                if not dataset.lower().endswith(".shp"):
+                    with z.open(dataset) as f:
+                        schemas.append(
+                            _geojson_schema(io.TextIOWrapper(f, encoding="utf-8"))
+                        )
+                    continue
+                base = os.path.splitext(dataset)[0]
+                for name in names:
+                    stem, ext = os.path.splitext(name)
+                    if stem == base and ext.lower() in (".dbf", ".cpg"):
+                        z.extract(name, tmp_dir)
+                schemas.append(_dbf_schema(os.path.join(tmp_dir, *dataset.split("/"))))
+    return _combine(schemas)
+
+
+def _widen(field, other):
+    """Returns a copy of a field widened to also hold the values of another field."""
+    if field["type"] is None or other["type"] is None:
+        value_type = field["type"] or other["type"]
+    else:
+        value_type = TYPES[max(TYPES.index(field["type"]), TYPES.index(other["type"]))]
+
+    if value_type in ("int", "float"):
+        # Widen the integer and fraction parts separately
+        decimal = max(field["decimal"], other["decimal"])
+        whole = max(
+            f["size"] - f["decimal"] - 1 if f["decimal"] else f["size"]
+            for f in (field, other)
+        )
+        size = whole + decimal + 1 if decimal else whole
+    elif value_type == "str":
+        # Numbers and booleans are written as their text
+        decimal = 0
+        size = max(_text_size(field), _text_size(other))
+    else:
+        decimal = 0
+        size = max(field["size"], other["size"])
+    return dict(field, type=value_type, size=size, decimal=decimal)
+
+
+def _text_size(field):
+    """Returns the number of bytes of the values of a field written as text."""
+    if field["type"] == "bool":
+        return len("False")
+    elif field["type"] == "float":
+        # The longest repr of a float, e.g. -1.2345678901234567e-300
+        return max(field["size"], 24)
+    return field["size"]
+
+
+def _field_key(name, case_sensitive):
+    return name if case_sensitive else name.lower()
+
+
+def _reconcile(schemas, case_sensitive=False):
+    """Merges the fields of several inputs into one schema."""
+    merged = {}
+    for fields in schemas:
+        for field in fields:
+            key = _field_key(field["name"], case_sensitive)
+            # The first spelling of a field name wins
+            merged[key] = _widen(merged[key], field) if key in merged else dict(field)
+    for field in merged.values():
+        if field["type"] is None:
+            field["type"] = "str"
+    return list(merged.values())
+
+
+def _cast(value, value_type):
+    if value is None:
+        return None
+    elif value_type == "str":
+        return _text(value)
+    elif value_type == "float":
+        return float(value)
+    elif value_type == "int":
+        return int(value)
+    return bool(value)
+
+
+def _merge_worker(args):
+    """Reads one input and maps its properties onto the merged schema."""
+    path, fields, source_field, case_sensitive = args
+    schema = {_field_key(f["name"], case_sensitive): f for f in fields}
+    source = os.path.basename(path)
+
+    features = []
+    for feature in _read_features(path):
+        properties = dict.fromkeys(f["name"] for f in fields)
+        for name, value in (feature.get("properties") or {}).items():
+            field = schema[_field_key(name, case_sensitive)]
+            properties[field["name"]] = _cast(value, field["type"])
+        if source_field is not None:
+            properties[source_field] = source
+        features.append(
+            {
+                "type": "Feature",
+                "properties": properties,
+                "geometry": feature.get("geometry"),
+            }
+        )
+    return features
+
+
+def _ordered_map(func, items, executor, processes):
+    """Maps a function over items, in the executor if any, and yields the results in order."""
+    if executor is None:
+        for item in items:
+            yield func(item)
+        return
+
+    # Keep a bounded number of inputs in flight so that only a few are held in memory
+    pending = deque()
+    try:
+        for item in items:
+            pending.append(executor.submit(func, item))
+            if len(pending) > 2 * processes:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        # Do not read the remaining inputs when the results are abandoned
+        for future in pending:
+            future.cancel()
+
+
+def _merge(paths, processes, source_field, case_sensitive):
+    """Yields the merged schema, then the path and features of each input."""
+    from concurrent.futures import ProcessPoolExecutor
+
+    executor = None
+    if processes is not None and processes > 1:
+        executor = ProcessPoolExecutor(processes)
+
+    schemas = results = None
+    try:
+        schemas = _ordered_map(_source_schema, paths, executor, processes)
+        fields = _reconcile(schemas, case_sensitive)
+        if source_field is not None:
+            keys = [_field_key(f["name"], case_sensitive) for f in fields]
+            if _field_key(source_field, case_sensitive) in keys:
+                raise ValueError(
+                    f"source_field {source_field} is already an attribute of the inputs."
+                )
+            size = max(len(os.path.basename(p).encode("utf-8")) for p in paths)
+            fields.append(
+                {"name": source_field, "type": "str", "size": size, "decimal": 0}
+            )
+        yield fields
+
+        tasks = [(path, fields, source_field, case_sensitive) for path in paths]
+        results = _ordered_map(_merge_worker, tasks, executor, processes)
+        for path, features in zip(paths, results):
+            yield path, features
+    finally:
+        for stream in (schemas, results):
+            if stream is not None:
+                stream.close()
+        if executor is not None:
+            executor.shutdown()
+
+
+def merge_schema(inputs, processes=None, case_sensitive=False):
+    """Computes the attribute schema shared by several vector files.
+
+    Fields are matched by name, ignoring case by default, and keep the spelling
+    of their first occurrence. A field missing from some inputs is kept, and the
+    type of each field is widened until it holds all its values, in the order
+    bool, int, float, str.
+
+    Args:
+        inputs (str | list): A file path or glob pattern, or a list of them.
+        processes (int, optional): The number of worker processes. Defaults to None, which reads the inputs in the current process.
+        case_sensitive (bool, optional): Whether field names that only differ by case are different fields. Defaults to False.
+
+    Returns:
+        list: The fields, each a dictionary with name, type, size and decimal keys.
+    """
+    stream = _merge(expand_inputs(inputs), processes, None, case_sensitive)
+    try:
+        return next(stream)
+    finally:
+        stream.close()
+
+
+def iter_merged_features(
+    inputs, processes=None, source_field=None, case_sensitive=False
+):
+    """Streams the features of several vector files, one input at a time.
+
+    The inputs are read in parallel, but yielded in the order of the expanded
+    inputs, so the result does not depend on the number of processes. The
+    properties of every feature follow the schema of merge_schema(), with None
+    for the fields missing from its input. Only a few inputs are held in memory
+    at once.
+
+    Args:
+        inputs (str | list): A file path or glob pattern, or a list of them. Shapefiles, GeoJSON and zip files are supported; a zip file contributes its shapefiles, or its GeoJSON files if it has no shapefile.
+        processes (int, optional): The number of worker processes. Defaults to None, which reads the inputs in the current process.
+        source_field (str, optional): The name of a property recording the input file name of each feature. Defaults to None.
+        case_sensitive (bool, optional): Whether field names that only differ by case are different fields. Defaults to False.
+
+    Raises:
+        ValueError: If source_field is already an attribute of the inputs.
+
+    Yields:
+        tuple: The file path and the list of features of each input.
+    """
+    stream = _merge(expand_inputs(inputs), processes, source_field, case_sensitive)
+    next(stream)
+    yield from stream
+
+
+def _write_geojson(stream, out_file):
+    with open(out_file, "w") as f:
+        f.write('{"type": "FeatureCollection", "features": [\n')
+        first = True
+        for _, features in stream:
+            for feature in features:
+                if not first:
+                    f.write(",\n")
+                f.write(json.dumps(feature))
+                first = False
+        f.write("\n]}\n")
+
+
+def _dbf_fields(fields):
+    """Returns the DBF field definitions, with names shortened to 10 characters."""
+    definitions, names = [], set()
+    for field in fields:
+        name = field["name"][:10]
+        i = 1
+        while name.lower() in names:
+            suffix = f"_{i}"
+            name = field["name"][: 10 - len(suffix)] + suffix
+            i += 1
+        names.add(name.lower())
+
+        if field["type"] == "bool":
+            definitions.append((name, "L", 1, 0))
+        elif field["type"] in ("int", "float"):
+            definitions.append((name, "N", max(field["size"], 1), field["decimal"]))
+        else:
+            definitions.append((name, "C", min(max(field["size"], 1), 254), 0))
+    return definitions
+
+
+def _write_shapefile(stream, fields, out_file, paths):
+    import shapefile
+    from .dbf import sidecar_file
+
+    base = os.path.splitext(out_file)[0]
+    writer = shapefile.Writer(base, encoding="utf-8")
+    shape_type = None
+    try:
+        definitions = _dbf_fields(fields)
+        for definition in definitions:
+            writer.field(*definition)
+        # pyshp writes missing text values as "None"
+        text = [i for i, d in enumerate(definitions) if d[1] == "C"]
+        for _, features in stream:
+            for feature in features:
+                geometry = feature["geometry"]
+                if geometry is None:
+                    writer.null()
+                else:
+                    this_type = SHAPE_TYPES.get(geometry["type"])
+                    if this_type is None or shape_type not in (None, this_type):
+                        raise ValueError(
+                            "A shapefile holds a single geometry type, but the inputs "
+                            f"have {shape_type} and {geometry['type']} geometries."
+                        )
+                    if shape_type is None:
+                        shape_type = this_type
+                        writer.shapeType = getattr(shapefile, shape_type)
+                    if geometry["type"] == "Point":
+                        # pyshp only accepts point coordinates given as a list
+                        geometry = dict(
+                            geometry, coordinates=list(geometry["coordinates"])
+                        )
+                    writer.shape(geometry)
+                values = list(feature["properties"].values())
+                for i in text:
+                    if values[i] is None:
+                        values[i] = ""
+                writer.record(*values)
+    except Exception:
+        writer.close()
+        # Do not leave a partial shapefile behind
+        for ext in (".shp", ".shx", ".dbf"):
+            if os.path.exists(base + ext):
+                os.remove(base + ext)
+        raise
+    writer.close()
+
+    with open(base + ".cpg", "w") as f:
+        f.write("UTF-8")
+    for path in paths:
+        in_prj = sidecar_file(path, ".prj")
+        if path.lower().endswith(".shp") and in_prj is not None:
+            shutil.copyfile(in_prj, base + ".prj")
+            break
+
+
+def merge_vectors(
+    inputs, out_file=None, processes=None, source_field=None, case_sensitive=False
+):
+    """Merges many vector files into one GeoJSON FeatureCollection or output file.
+
+    The features are streamed from the inputs to the output one input at a time,
+    so the output can be much larger than the memory. Features keep the order of
+    the expanded inputs and attributes follow the schema of merge_schema(). The
+    coordinates are copied as they are: the inputs must share a coordinate
+    reference system.
+
+    Args:
+        inputs (str | list): A file path or glob pattern, or a list of them, e.g. "data/counties/*.zip".
+        out_file (str, optional): The file path to the output .geojson, .json or .shp file. Defaults to None, which returns the merged features.
+        processes (int, optional): The number of worker processes reading the inputs. Defaults to None, which reads them in the current process.
+        source_field (str, optional): The name of a property recording the input file name of each feature. Defaults to None.
+        case_sensitive (bool, optional): Whether field names that only differ by case are different fields. Defaults to False.
+
+    Raises:
+        ValueError: If the output format is not supported, or if a shapefile output would mix geometry types.
+
+    Returns:
+        dict: The merged FeatureCollection if out_file is None, otherwise None.
+    """
+    if out_file is not None:
+        out_file = os.path.abspath(out_file)
+        ext = os.path.splitext(out_file)[1].lower()
+        if ext not in (".geojson", ".json", ".shp"):
+            raise ValueError("out_file must be a .geojson, .json or .shp file.")
+        out_dir = os.path.dirname(out_file)
+        if not os.path.exists(out_dir):
+            os.makedirs(out_dir)
+
+    paths = expand_inputs(inputs)
+    stream = _merge(paths, processes, source_field, case_sensitive)
+    try:
+        fields = next(stream)
+        if out_file is None:
+            features = [f for _, chunk in stream for f in chunk]
+            return {"type": "FeatureCollection", "features": features}
+        elif ext == ".shp":
+            _write_shapefile(stream, fields, out_file, paths)
+        else:
+            _write_geojson(stream, out_file)
+    finally:
+        stream.close()
@@ -0,0 +1,479 @@
+"""A module for vectorized spatial queries on vector data.
+"""
+
+import numpy as np
+
+# The number of (point, edge) pairs evaluated at once by the vectorized tests
+BLOCK_SIZE = 2 ** 22
+# The number of points located at once by SpatialIndex.locate
+LOCATE_CHUNK_SIZE = 2 ** 16
+
+
+def _iter_parts(geometry):
+    """Yields the single-part geometries contained in a GeoJSON geometry."""
+    if geometry is None:
+        return
+    geom_type = geometry["type"]
+    if geom_type == "GeometryCollection":
+        for geom in geometry["geometries"]:
+            yield from _iter_parts(geom)
+    elif geom_type.startswith("Multi"):
+        for coords in geometry["coordinates"]:
+            yield geom_type[5:], coords
+    else:
+        yield geom_type, geometry["coordinates"]
+
+
+def _ring_edges(ring):
+    """Returns the (n, 4) array of edges of a ring, closing it if needed."""
+    ring = np.asarray(ring, dtype=float).reshape(-1, 2)[:, :2]
+    if len(ring) and not np.array_equal(ring[0], ring[-1]):
+        ring = np.vstack([ring, ring[:1]])
+    return np.hstack([ring[:-1], ring[1:]])
+
+
+def polygon_edges(geometry):
+    """Returns the edges of all rings of a Polygon or MultiPolygon geometry.
+
+    Args:
+        geometry (dict): The GeoJSON geometry.
+
+    Raises:
+        ValueError: If the geometry does not contain any polygon.
+
+    Returns:
+        np.ndarray: An (n, 4) array of (x0, y0, x1, y1) edges.
+    """
+    edges = [
+        _ring_edges(ring)
+        for geom_type, coords in _iter_parts(geometry)
+        if geom_type == "Polygon"
+        for ring in coords
+    ]
+    if not edges:
+        raise ValueError("The geometry must be a Polygon or MultiPolygon.")
+    return np.vstack(edges)
+
+
+def _ray_cast(x, y, edges):
+    """Counts the ray crossings of each point with the edges, block by block."""
+    inside = np.zeros(len(x), dtype=bool)
+    x0, y0, x1, y1 = (col[None, :] for col in edges.T)
+    dy = np.where(y1 == y0, 1.0, y1 - y0)
+    step = max(1, BLOCK_SIZE // max(len(edges), 1))
+    for start in range(0, len(x), step):
+        px = x[start : start + step, None]
+        py = y[start : start + step, None]
+        crosses = (y0 > py) != (y1 > py)
+        xint = x0 + (py - y0) * (x1 - x0) / dy
+        inside[start : start + step] = (crosses & (px < xint)).sum(axis=1) % 2 == 1
+    return inside
+
+
+def points_in_polygon(x, y, edges):
+    """Tests which points fall inside a polygon using even-odd ray casting.
+
+    The points are processed in blocks so that the memory used by the broadcast
+    (points x edges) arrays stays bounded. Polygons with many edges are split
+    into horizontal bands so that each point is only tested against the edges
+    overlapping its band.
+
+    Args:
+        x (array-like): The x coordinates of the points.
+        y (array-like): The y coordinates of the points.
+        edges (np.ndarray): The (n, 4) array of polygon edges, e.g. from polygon_edges().
+
+    Returns:
+        np.ndarray: A boolean array, True for the points inside the polygon.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    inside = np.zeros(len(x), dtype=bool)
+    if len(edges) == 0 or len(x) == 0:
+        return inside
+
+    n_bands = min(len(edges) // 32, len(x) // 32, 256)
+    if n_bands < 2:
+        return _ray_cast(x, y, edges)
+
+    ymin = np.minimum(edges[:, 1], edges[:, 3])
+    ymax = np.maximum(edges[:, 1], edges[:, 3])
+    lo, hi = ymin.min(), ymax.max()
+    height = (hi - lo) / n_bands
+    if height <= 0:
+        return _ray_cast(x, y, edges)
+
+    within = (y >= lo) & (y <= hi)
+    point_bands = np.clip(((y - lo) // height).astype(int), 0, n_bands - 1)
+    edge_lo = np.clip(((ymin - lo) // height).astype(int), 0, n_bands - 1)
+    edge_hi = np.clip(((ymax - lo) // height).astype(int), 0, n_bands - 1)
+
+    candidates = np.flatnonzero(within)
+    order = candidates[np.argsort(point_bands[candidates], kind="stable")]
+    splits = np.searchsorted(point_bands[order], np.arange(n_bands + 1))
+    for band in range(n_bands):
+        pts = order[splits[band] : splits[band + 1]]
+        if len(pts) == 0:
+            continue
+        band_edges = edges[(edge_lo <= band) & (edge_hi >= band)]
+        inside[pts] = _ray_cast(x[pts], y[pts], band_edges)
+    return inside
+
+
+def _orientation(ax, ay, bx, by, cx, cy):
+    return np.sign((bx - ax) * (cy - ay) - (by - ay) * (cx - ax))
+
+
+def segments_intersect(segments, others):
+    """Tests which segments intersect any of the other segments.
+
+    Args:
+        segments (np.ndarray): An (n, 4) array of (x0, y0, x1, y1) segments.
+        others (np.ndarray): An (m, 4) array of segments to test against.
+
+    Returns:
+        np.ndarray: A boolean array of length n.
+    """
+    hits = np.zeros(len(segments), dtype=bool)
+    if len(segments) == 0 or len(others) == 0:
+        return hits
+
+    bx0, by0, bx1, by1 = (col[None, :] for col in others.T)
+    step = max(1, BLOCK_SIZE // len(others))
+    for start in range(0, len(segments), step):
+        block = segments[start : start + step]
+        ax0, ay0, ax1, ay1 = (col[:, None] for col in block.T)
+        overlap = (
+            (np.minimum(ax0, ax1) <= np.maximum(bx0, bx1))
+            & (np.minimum(bx0, bx1) <= np.maximum(ax0, ax1))
+            & (np.minimum(ay0, ay1) <= np.maximum(by0, by1))
+            & (np.minimum(by0, by1) <= np.maximum(ay0, ay1))
+        )
+        d1 = _orientation(bx0, by0, bx1, by1, ax0, ay0)
+        d2 = _orientation(bx0, by0, bx1, by1, ax1, ay1)
+        d3 = _orientation(ax0, ay0, ax1, ay1, bx0, by0)
+        d4 = _orientation(ax0, ay0, ax1, ay1, bx1, by1)
+        crossing = overlap & (d1 * d2 <= 0) & (d3 * d4 <= 0)
+        hits[start : start + step] = crossing.any(axis=1)
+    return hits
+
+
+def _str_order(bounds, node_capacity):
+    """Orders boxes with the Sort-Tile-Recursive packing algorithm."""
+    n = len(bounds)
+    cx = (bounds[:, 0] + bounds[:, 2]) / 2
+    cy = (bounds[:, 1] + bounds[:, 3]) / 2
+    n_nodes = int(np.ceil(n / node_capacity))
+    n_slices = max(1, int(np.ceil(np.sqrt(n_nodes))))
+    slice_size = n_slices * node_capacity
+    by_x = np.argsort(cx, kind="stable")
+    slice_ids = np.arange(n) // slice_size
+    # Within each vertical slice, order the boxes by their y center
+    return by_x[np.lexsort((cy[by_x], slice_ids))]
+
+
+class STRTree:
+    """A static R-tree over bounding boxes, packed with Sort-Tile-Recursive.
+
+    The tree is queried with whole arrays of points at once: the candidate
+    (point, node) pairs are filtered level by level with vectorized box tests.
+
+    Args:
+        bounds (np.ndarray): An (n, 4) array of (minx, miny, maxx, maxy) boxes.
+        node_capacity (int, optional): The maximum number of children per node. A small fan-out keeps the number of candidate pairs low. Defaults to 4.
+    """
+
+    def __init__(self, bounds, node_capacity=4):
+
+        bounds = np.asarray(bounds, dtype=float).reshape(-1, 4)
+        order = _str_order(bounds, node_capacity) if len(bounds) else np.empty(0, int)
+        self.ids = order
+        self.levels = []
+
+        entries = bounds[order]
+        while len(entries) > 1 or not self.levels:
+            if len(entries) == 0:
+                break
+            # Group consecutive entries into parent nodes
+            starts = np.arange(0, len(entries), node_capacity)
+            counts = np.minimum(node_capacity, len(entries) - starts)
+            parents = np.column_stack(
+                [
+                    np.minimum.reduceat(entries[:, 0], starts),
+                    np.minimum.reduceat(entries[:, 1], starts),
+                    np.maximum.reduceat(entries[:, 2], starts),
+                    np.maximum.reduceat(entries[:, 3], starts),
+                ]
+            )
+            self.levels.append((entries, starts, counts))
+            if len(parents) > 1:
+                parent_order = _str_order(parents, node_capacity)
+                # Reorder the parents, keeping their child ranges attached
+                self.levels[-1] = (entries, starts, counts, parent_order)
+                parents = parents[parent_order]
+            entries = parents
+        self.root = entries
+
+    def query_points(self, x, y):
+        """Finds the boxes containing each point.
+
+        Args:
+            x (np.ndarray): The x coordinates of the points.
+            y (np.ndarray): The y coordinates of the points.
+
+        Returns:
+            tuple: Two arrays (point indices, box indices) of the matching pairs.
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        if not self.levels or len(x) == 0:
+            return np.empty(0, int), np.empty(0, int)
+
+        pts = np.arange(len(x))
+        nodes = np.zeros(len(x), dtype=int)
+        boxes = self.root
+        for level in reversed(self.levels):
+            entries, starts, counts = level[:3]
+            pts, nodes = self._filter(x, y, pts, nodes, boxes)
+            if len(level) == 4:
+                nodes = level[3][nodes]
+            # Expand each (point, node) pair to the node's children
+            n = counts[nodes]
+            first = np.repeat(starts[nodes], n)
+            offsets = np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n)
+            pts = np.repeat(pts, n)
+            nodes = first + offsets
+            boxes = entries
+
+        pts, nodes = self._filter(x, y, pts, nodes, boxes)
+        return pts, self.ids[nodes]
+
+    @staticmethod
+    def _filter(x, y, pts, nodes, boxes):
+        """Keeps the (point, box) pairs where the box contains the point."""
+        px, py = x[pts], y[pts]
+        b = boxes[nodes]
+        keep = (px >= b[:, 0]) & (px <= b[:, 2]) & (py >= b[:, 1]) & (py <= b[:, 3])
+        return pts[keep], nodes[keep]
+
+
+class SpatialIndex:
+    """A bounding-box index over the features of a vector layer.
+
+    Queries first narrow the features down with vectorized bounding-box tests and
+    then run vectorized point-in-polygon and segment intersection tests on the
+    remaining candidates only. Point layers are sorted by x so that a query only
+    touches the points within the x range of the query geometry.
+
+    Args:
+        data (dict): The GeoJSON FeatureCollection to index.
+    """
+
+    def __init__(self, data=None):
+
+        self.points_only = False
+        if data is None:
+            return
+
+        bounds, vertices, vertex_fids = [], [], []
+        edges, edge_fids, ring_flags = [], [], []
+        if data.get("type") == "FeatureCollection":
+            features = data["features"]
+        else:
+            features = [data]
+
+        for fid, feature in enumerate(features):
+            coords = []
+            for geom_type, part in _iter_parts(feature.get("geometry")):
+                if geom_type == "Point":
+                    coords.append(np.asarray(part, dtype=float)[None, :2])
+                elif geom_type == "LineString":
+                    line = np.asarray(part, dtype=float).reshape(-1, 2)[:, :2]
+                    coords.append(line)
+                    segs = np.hstack([line[:-1], line[1:]])
+                    edges.append(segs)
+                    edge_fids.append(np.full(len(segs), fid))
+                    ring_flags.append(np.zeros(len(segs), dtype=bool))
+                elif geom_type == "Polygon":
+                    for ring in part:
+                        segs = _ring_edges(ring)
+                        coords.append(segs[:, :2])
+                        edges.append(segs)
+                        edge_fids.append(np.full(len(segs), fid))
+                        ring_flags.append(np.ones(len(segs), dtype=bool))
+
+            if coords:
+                coords = np.vstack(coords)
+                bounds.append([*coords.min(axis=0), *coords.max(axis=0)])
+            else:
+                coords = np.empty((0, 2))
+                bounds.append([np.inf, np.inf, -np.inf, -np.inf])
+            vertices.append(coords)
+            vertex_fids.append(np.full(len(coords), fid))
+
+        self.n = len(features)
+        self.bounds = np.array(bounds, dtype=float).reshape(-1, 4)
+        self.vertices = np.vstack(vertices) if vertices else np.empty((0, 2))
+        self.vertex_fids = np.concatenate(vertex_fids or [np.empty(0, int)])
+        self.edges = np.vstack(edges) if edges else np.empty((0, 4))
+        self.edge_fids = np.concatenate(edge_fids or [np.empty(0, int)])
+        self.ring_flags = np.concatenate(ring_flags or [np.empty(0, bool)])
+
+    @classmethod
+    def from_points(cls, x, y):
+        """Creates an index over point coordinates.
+
+        Args:
+            x (array-like): The x coordinates (longitudes).
+            y (array-like): The y coordinates (latitudes).
+
+        Returns:
+            SpatialIndex: The index.
+        """
+        index = cls()
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        index.points_only = True
+        index.n = len(x)
+        index.order = np.argsort(x, kind="stable")
+        index.x = x[index.order]
+        index.y = y[index.order]
+        return index
+
+    def _query_points(self, edges, bbox):
+        lo = np.searchsorted(self.x, bbox[0], side="left")
+        hi = np.searchsorted(self.x, bbox[2], side="right")
+        x, y = self.x[lo:hi], self.y[lo:hi]
+        near = (y >= bbox[1]) & (y <= bbox[3])
+        candidates = np.flatnonzero(near)
+        inside = points_in_polygon(x[candidates], y[candidates], edges)
+        return np.sort(self.order[lo:hi][candidates[inside]])
+
+    def query(self, geometry, predicate="intersects"):
+        """Returns the features matching a polygon.
+
+        Args:
+            geometry (dict): The GeoJSON Polygon or MultiPolygon to query with.
+            predicate (str, optional): Either "intersects" or "within". Defaults to "intersects".
+
+        Raises:
+            ValueError: If the predicate is not supported.
+
+        Returns:
+            np.ndarray: The sorted indices of the matching features.
+        """
+        if predicate not in ("intersects", "within"):
+            raise ValueError(
+                "predicate must be one of the following: intersects, within"
+            )
+
+        edges = polygon_edges(geometry)
+        pts = np.vstack([edges[:, :2], edges[:, 2:]])
+        bbox = (*pts.min(axis=0), *pts.max(axis=0))
+
+        if self.points_only:
+            return self._query_points(edges, bbox)
+        if self.n == 0:
+            return np.empty(0, dtype=int)
+
+        b = self.bounds
+        if predicate == "within":
+            candidates = (
+                (b[:, 0] >= bbox[0])
+                & (b[:, 1] >= bbox[1])
+                & (b[:, 2] <= bbox[2])
+                & (b[:, 3] <= bbox[3])
+            )
+        else:
+            candidates = (
+                (b[:, 0] <= bbox[2])
+                & (b[:, 2] >= bbox[0])
+                & (b[:, 1] <= bbox[3])
+                & (b[:, 3] >= bbox[1])
+            )
+        if not candidates.any():
+            return np.empty(0, dtype=int)
+
+        vmask = candidates[self.vertex_fids]
+        vfids = self.vertex_fids[vmask]
+        vertices = self.vertices[vmask]
+        inside = points_in_polygon(vertices[:, 0], vertices[:, 1], edges)
+        n_inside = np.bincount(vfids[inside], minlength=self.n)
+        n_total = np.bincount(vfids, minlength=self.n)
+
+        emask = candidates[self.edge_fids]
+        efids = self.edge_fids[emask]
+        crossing = np.zeros(self.n, dtype=bool)
+        if predicate == "within":
+            hits = segments_intersect(self.edges[emask], edges)
+            crossing[efids[hits]] = True
+            return np.flatnonzero(candidates & (n_inside == n_total) & ~crossing)
+
+        matched = candidates & (n_inside > 0)
+        remaining = emask & ~matched[self.edge_fids]
+        hits = segments_intersect(self.edges[remaining], edges)
+        crossing[self.edge_fids[remaining][hits]] = True
+        matched |= crossing
+
+        # Polygons that fully contain the query geometry
+        remaining = remaining & self.ring_flags & ~matched[self.edge_fids]
+        if remaining.any():
+            x0, y0, x1, y1 = self.edges[remaining].T
+            px, py = edges[0, 0], edges[0, 1]
+            crosses = (y0 > py) != (y1 > py)
+            dy = np.where(y1 == y0, 1.0, y1 - y0)
+            xint = x0 + (py - y0) * (x1 - x0) / dy
+            fids = self.edge_fids[remaining][crosses & (px < xint)]
+            matched |= np.bincount(fids, minlength=self.n) % 2 == 1
+
+        return np.flatnonzero(matched)
+
+    def locate(self, x, y):
+        """Finds the polygon containing each point.
+
+        Candidate polygons are found with an STR-tree over the polygon bounding
+        boxes, and the candidates of each polygon are then tested together with
+        vectorized ray casting.
+
+        Args:
+            x (array-like): The x coordinates of the points.
+            y (array-like): The y coordinates of the points.
+
+        Returns:
+            np.ndarray: The index of the containing polygon for each point, -1 if there is none. Points inside overlapping polygons get the lowest polygon index.
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        result = np.full(len(x), -1)
+
+        if getattr(self, "_tree", None) is None:
+            self._tree = STRTree(self.bounds)
+            rings = self.ring_flags
+            self._ring_edges = self.edges[rings]
+            ring_fids = self.edge_fids[rings]
+            self._ring_ranges = np.searchsorted(ring_fids, np.arange(self.n + 1))
+
+        for start in range(0, len(x), LOCATE_CHUNK_SIZE):
+            end = start + LOCATE_CHUNK_SIZE
+            result[start:end] = self._locate(x[start:end], y[start:end])
+        return result
+
+    def _locate(self, x, y):
+        result = np.full(len(x), -1)
+        pts, polys = self._tree.query_points(x, y)
+        if len(pts) == 0:
+            return result
+
+        # Visit polygons in descending order so that the lowest index wins
+        order = np.argsort(-polys, kind="stable")
+        pts, polys = pts[order], polys[order]
+        bounds = np.flatnonzero(np.r_[True, polys[1:] != polys[:-1], True])
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            poly = polys[start]
+            lo, hi = self._ring_ranges[poly], self._ring_ranges[poly + 1]
+            candidates = pts[start:end]
+            inside = points_in_polygon(
+                x[candidates], y[candidates], self._ring_edges[lo:hi]
+            )
+            result[candidates[inside]] = poly
+        return result
@@ -0,0 +1,183 @@
+"""A module for data-driven styling of vector layers.
+"""
+
+import numpy as np
+
+SCHEMES = ["quantiles", "equal_interval", "categorical"]
+
+
+def get_colors(cmap="viridis", n=5):
+    """Samples n colors from a matplotlib colormap.
+
+    Args:
+        cmap (str | list, optional): The name of a matplotlib colormap or a list of colors. Defaults to "viridis".
+        n (int, optional): The number of colors. Defaults to 5.
+
+    Returns:
+        list: The list of hex colors.
+    """
+    import matplotlib
+    import matplotlib.colors as mcolors
+
+    if isinstance(cmap, (list, tuple)):
+        colors = [mcolors.to_hex(c) for c in cmap]
+        return [colors[i % len(colors)] for i in range(n)]
+
+    if hasattr(matplotlib, "colormaps"):
+        colormap = matplotlib.colormaps[cmap]
+    else:
+        # matplotlib < 3.5, e.g. on Python 3.6
+        import matplotlib.cm as cm
+
+        colormap = cm.get_cmap(cmap)
+    if isinstance(colormap, mcolors.ListedColormap) and colormap.N < 256:
+        positions = np.arange(n) % colormap.N
+        return [mcolors.to_hex(c) for c in colormap(positions)]
+    positions = np.linspace(0, 1, n) if n > 1 else np.array([0.5])
+    return [mcolors.to_hex(c) for c in colormap(positions)]
+
+
+class Classification:
+    """Assigns the values of an attribute column to classes.
+
+    The classification is computed once, in a single vectorized pass over the
+    values, and can be reused to restyle a layer with a different colormap.
+
+    Args:
+        values (array-like): The attribute values, one per feature.
+        scheme (str, optional): The classification scheme, one of "quantiles", "equal_interval" or "categorical". Defaults to "quantiles".
+        k (int, optional): The number of classes for the numeric schemes. Defaults to 5.
+
+    Raises:
+        ValueError: If the scheme is not supported.
+    """
+
+    def __init__(self, values, scheme="quantiles", k=5):
+
+        if scheme not in SCHEMES:
+            raise ValueError(f"scheme must be one of the following: {', '.join(SCHEMES)}")
+
+        self.values = np.asarray(values, dtype=object)
+        self.scheme = scheme
+        self.k = k
+        self.bins = None
+        self.categories = None
+
+        if scheme == "categorical":
+            self._classify_categorical()
+        else:
+            self._classify_numeric()
+
+    def _classify_categorical(self):
+        missing = np.array([v is None for v in self.values], dtype=bool)
+        keys = self.values[~missing].astype(str)
+        self.categories, inverse = np.unique(keys, return_inverse=True)
+        self.classes = np.full(len(self.values), -1)
+        self.classes[~missing] = inverse
+        self.k = len(self.categories)
+
+    def _classify_numeric(self):
+        import pandas as pd
+
+        values = pd.to_numeric(pd.Series(self.values), errors="coerce").to_numpy(float)
+        valid = ~np.isnan(values)
+        self.classes = np.full(len(values), -1)
+        if not valid.any():
+            self.bins = np.array([])
+            return
+
+        if self.scheme == "quantiles":
+            bins = np.quantile(values[valid], np.linspace(0, 1, self.k + 1))
+        else:
+            bins = np.linspace(values[valid].min(), values[valid].max(), self.k + 1)
+        self.bins = bins
+        # Upper class breaks, with the maximum value falling into the last class
+        classes = np.searchsorted(bins[1:-1], values[valid], side="right")
+        self.classes[valid] = classes
+
+    def colors(self, cmap="viridis", missing_color="#cccccc"):
+        """Returns the color of each feature.
+
+        Args:
+            cmap (str | list, optional): The name of a matplotlib colormap or a list of colors. Defaults to "viridis".
+            missing_color (str, optional): The color for features with missing values. Defaults to "#cccccc".
+
+        Returns:
+            np.ndarray: The array of hex colors, one per feature.
+        """
+        palette = np.array(get_colors(cmap, max(self.k, 1)) + [missing_color])
+        return palette[self.classes]
+
+    def legend(self, cmap="viridis"):
+        """Returns the legend entries of the classification.
+
+        Args:
+            cmap (str | list, optional): The name of a matplotlib colormap or a list of colors. Defaults to "viridis".
+
+        Returns:
+            dict: A dictionary mapping class labels to colors.
+        """
+        colors = get_colors(cmap, max(self.k, 1))
+        if self.scheme == "categorical":
+            labels = [str(c) for c in self.categories]
+        else:
+            labels = [
+                f"{self.bins[i]:g} - {self.bins[i + 1]:g}"
+                for i in range(len(self.bins) - 1)
+            ]
+        return dict(zip(labels, colors))
+
+
+def _color_key(feature):
+    geometry = feature.get("geometry") or {}
+    if geometry.get("type") in ("LineString", "MultiLineString"):
+        return "color"
+    return "fillColor"
+
+
+def style_features(data, colors, style=None):
+    """Bakes per-feature colors into the style property of each feature.
+
+    Args:
+        data (dict): The GeoJSON FeatureCollection.
+        colors (array-like): The color of each feature.
+        style (dict, optional): The base style shared by all features. Defaults to None.
+
+    Returns:
+        dict: A new FeatureCollection with a "style" property on every feature.
+    """
+    if style is None:
+        style = {}
+
+    features = []
+    for feature, color in zip(data["features"], colors):
+        properties = dict(feature.get("properties") or {})
+        feature_style = dict(style)
+        feature_style[_color_key(feature)] = str(color)
+        properties["style"] = feature_style
+        feature = dict(feature)
+        feature["properties"] = properties
+        features.append(feature)
+
+    return {"type": "FeatureCollection", "features": features}
+
+
+def column_values(data, column):
+    """Extracts an attribute column from a FeatureCollection.
+
+    Args:
+        data (dict): The GeoJSON FeatureCollection.
+        column (str): The name of the attribute.
+
+    Raises:
+        ValueError: If no feature has the attribute.
+
+    Returns:
+        list: The attribute values, with None for features missing the attribute.
+    """
+    values = [
+        (feature.get("properties") or {}).get(column) for feature in data["features"]
+    ]
+    if data["features"] and all(v is None for v in values):
+        raise ValueError(f"The column {column} could not be found.")
+    return values
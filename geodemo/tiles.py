@@ -0,0 +1,844 @@
+"""A module for rendering vector data into XYZ tiles and for serving and caching tiles locally.
+"""
+
+import io
+import os
+import math
+import hashlib
+import threading
+import http.client
+import urllib.parse
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from socketserver import ThreadingMixIn
+
+TILE_SIZE = 256
+MAX_LATITUDE = 85.0511287798
+
+
+def lonlat_to_world(lon, lat):
+    """Projects longitude/latitude to normalized Web Mercator coordinates.
+
+    Args:
+        lon (array-like): The longitudes in decimal degrees.
+        lat (array-like): The latitudes in decimal degrees.
+
+    Returns:
+        tuple: Two arrays of x and y coordinates in the range [0, 1], with y increasing southwards.
+    """
+    lon = np.asarray(lon, dtype=float)
+    lat = np.clip(np.asarray(lat, dtype=float), -MAX_LATITUDE, MAX_LATITUDE)
+    x = (lon + 180.0) / 360.0
+    sin_lat = np.sin(np.radians(lat))
+    y = 0.5 - np.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)
+    return x, y
+
+
+def tile_bounds(z, x, y):
+    """Returns the bounds of an XYZ tile in normalized Web Mercator coordinates.
+
+    Args:
+        z (int): The zoom level.
+        x (int): The tile column.
+        y (int): The tile row.
+
+    Returns:
+        tuple: The (minx, miny, maxx, maxy) bounds of the tile.
+    """
+    n = 2 ** z
+    return x / n, y / n, (x + 1) / n, (y + 1) / n
+
+
+def _iter_geometries(geometry):
+    """Yields the single-part geometries contained in a GeoJSON geometry."""
+    if geometry is None:
+        return
+    geom_type = geometry["type"]
+    if geom_type == "GeometryCollection":
+        for geom in geometry["geometries"]:
+            yield from _iter_geometries(geom)
+    elif geom_type.startswith("Multi"):
+        for coords in geometry["coordinates"]:
+            yield geom_type[5:], coords
+    else:
+        yield geom_type, geometry["coordinates"]
+
+
+def _to_world(coords):
+    """Converts a list of positions to an (n, 2) array of world coordinates."""
+    coords = np.asarray(coords, dtype=float).reshape(-1, 2)
+    x, y = lonlat_to_world(coords[:, 0], coords[:, 1])
+    return np.column_stack([x, y])
+
+
+def _segments(points):
+    """Returns the (n - 1, 4) array of consecutive segments of a path."""
+    return np.hstack([points[:-1], points[1:]])
+
+
+def _empty_tile():
+    return np.zeros((TILE_SIZE, TILE_SIZE, 4), dtype=float)
+
+
+def encode_png(rgba):
+    """Encodes an RGBA array into PNG bytes.
+
+    Args:
+        rgba (np.ndarray): A (height, width, 4) array with values in the range [0, 1].
+
+    Returns:
+        bytes: The PNG encoded image.
+    """
+    import matplotlib.image as mpimg
+
+    buf = io.BytesIO()
+    mpimg.imsave(buf, np.clip(rgba, 0, 1), format="png")
+    return buf.getvalue()
+
+
+class VectorTileRenderer:
+    """Rasterizes GeoJSON features into PNG XYZ tiles.
+
+    The geometries are projected once when the renderer is created. Each tile is
+    then rendered with vectorized NumPy operations: polygons are filled with an
+    even-odd scanline algorithm and lines are stroked by stamping a brush along
+    sampled segment positions. The most recently used tiles are kept in memory.
+
+    Args:
+        data (dict): The GeoJSON FeatureCollection or Feature to render.
+        style (dict, optional): A Leaflet path style dict (color, weight, opacity, fill, fillColor, fillOpacity). Defaults to None.
+        max_tiles (int, optional): The maximum number of rendered tiles kept in memory. Defaults to 1024, about 50 MB of typical PNG tiles.
+    """
+
+    def __init__(self, data, style=None, max_tiles=1024):
+
+        if style is None:
+            style = {}
+
+        self.style = {
+            "stroke": True,
+            "color": "#3388ff",
+            "weight": 3,
+            "opacity": 1.0,
+            "fill": True,
+            "fillOpacity": 0.2,
+            "radius": 5,
+        }
+        self.style.update(style)
+        if "fillColor" not in self.style:
+            self.style["fillColor"] = self.style["color"]
+
+        self.data = data
+        self.max_tiles = max_tiles
+        self.cache = OrderedDict()
+        self._empty_png = None
+        self._lock = threading.Lock()
+        self._load(data)
+
+    def _load(self, data):
+        if data.get("type") == "FeatureCollection":
+            features = data["features"]
+        elif data.get("type") == "Feature":
+            features = [data]
+        else:
+            features = [{"type": "Feature", "geometry": data}]
+
+        edges, edge_fids, lines, points = [], [], [], []
+        for fid, feature in enumerate(features):
+            for geom_type, coords in _iter_geometries(feature.get("geometry")):
+                if geom_type == "Polygon":
+                    for ring in coords:
+                        ring = _to_world(ring)
+                        if len(ring) < 3:
+                            continue
+                        if not np.array_equal(ring[0], ring[-1]):
+                            ring = np.vstack([ring, ring[:1]])
+                        segs = _segments(ring)
+                        edges.append(segs)
+                        edge_fids.append(np.full(len(segs), fid))
+                        lines.append(segs)
+                elif geom_type == "LineString":
+                    line = _to_world(coords)
+                    if len(line) > 1:
+                        lines.append(_segments(line))
+                elif geom_type == "Point":
+                    points.append(_to_world(coords))
+
+        self.edges = np.vstack(edges) if edges else np.empty((0, 4))
+        self.edge_fids = (
+            np.concatenate(edge_fids) if edge_fids else np.empty(0, dtype=int)
+        )
+        if len(self.edge_fids):
+            # Per-feature x extents, used to cull whole polygons per tile
+            starts = np.flatnonzero(np.r_[True, np.diff(self.edge_fids) != 0])
+            ex = self.edges[:, [0, 2]]
+            self.fill_xmin = np.minimum.reduceat(ex.min(axis=1), starts)
+            self.fill_xmax = np.maximum.reduceat(ex.max(axis=1), starts)
+            sizes = np.diff(np.r_[starts, len(self.edge_fids)])
+            self.edge_groups = np.repeat(np.arange(len(starts)), sizes)
+        self.lines = np.vstack(lines) if lines else np.empty((0, 4))
+        self.points = np.vstack(points) if points else np.empty((0, 2))
+
+        all_xy = np.vstack(
+            [self.lines[:, :2], self.lines[:, 2:], self.points, np.empty((0, 2))]
+        )
+        if len(all_xy):
+            self.bounds = (*all_xy.min(axis=0), *all_xy.max(axis=0))
+        else:
+            self.bounds = None
+
+    def _margin(self):
+        """Returns the stroke/point padding in pixels around geometries."""
+        return max(self.style["weight"], 2 * self.style["radius"]) / 2.0 + 1
+
+    def _fill_mask(self, edges, edge_fids):
+        """Fills polygons given as edges in tile pixel coordinates."""
+        mask = np.zeros((TILE_SIZE, TILE_SIZE), dtype=bool)
+        if len(edges) == 0:
+            return mask
+
+        x0, y0, x1, y1 = edges.T
+        ymin = np.minimum(y0, y1)
+        ymax = np.maximum(y0, y1)
+        # Scanline rows whose pixel centers (row + 0.5) lie in [ymin, ymax)
+        row_start = np.clip(np.ceil(ymin - 0.5), 0, TILE_SIZE).astype(int)
+        row_end = np.clip(np.ceil(ymax - 0.5), 0, TILE_SIZE).astype(int)
+        counts = row_end - row_start
+        keep = counts > 0
+        if not keep.any():
+            return mask
+
+        counts = counts[keep]
+        idx = np.repeat(np.flatnonzero(keep), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(
+            np.cumsum(counts) - counts, counts
+        )
+        rows = np.repeat(row_start[keep], counts) + offsets
+
+        yc = rows + 0.5
+        xs = x0[idx] + (yc - y0[idx]) * (x1[idx] - x0[idx]) / (y1[idx] - y0[idx])
+        fids = edge_fids[idx]
+
+        # Pair up sorted crossings within each (row, feature) group
+        order = np.lexsort((xs, fids, rows))
+        rows, xs = rows[order], xs[order]
+        starts = np.floor(xs[0::2] - 0.5).astype(int) + 1
+        ends = np.floor(xs[1::2] - 0.5).astype(int) + 1
+        span_rows = rows[0::2]
+        starts = np.clip(starts, 0, TILE_SIZE)
+        ends = np.clip(ends, 0, TILE_SIZE)
+
+        diff = np.zeros((TILE_SIZE, TILE_SIZE + 1), dtype=int)
+        np.add.at(diff, (span_rows, starts), 1)
+        np.add.at(diff, (span_rows, ends), -1)
+        return np.cumsum(diff, axis=1)[:, :TILE_SIZE] > 0
+
+    def _stroke_mask(self, segments, width):
+        """Strokes line segments given in tile pixel coordinates."""
+        mask = np.zeros((TILE_SIZE, TILE_SIZE), dtype=bool)
+        if len(segments) == 0 or width <= 0:
+            return mask
+
+        pad = width / 2.0 + 1
+        lo, hi = -pad, TILE_SIZE + pad
+
+        # Liang-Barsky clipping of the segments to the padded tile
+        x0, y0, x1, y1 = segments.T
+        dx, dy = x1 - x0, y1 - y0
+        t0 = np.zeros(len(segments))
+        t1 = np.ones(len(segments))
+        valid = np.ones(len(segments), dtype=bool)
+        for p, q in ((-dx, x0 - lo), (dx, hi - x0), (-dy, y0 - lo), (dy, hi - y0)):
+            parallel = p == 0
+            valid &= ~(parallel & (q < 0))
+            with np.errstate(divide="ignore", invalid="ignore"):
+                r = np.where(parallel, 0.0, q / np.where(parallel, 1.0, p))
+            t0 = np.where(~parallel & (p < 0), np.maximum(t0, r), t0)
+            t1 = np.where(~parallel & (p > 0), np.minimum(t1, r), t1)
+        valid &= t0 <= t1
+        if not valid.any():
+            return mask
+
+        x0, y0, dx, dy = x0[valid], y0[valid], dx[valid], dy[valid]
+        t0, t1 = t0[valid], t1[valid]
+        cx0, cy0 = x0 + t0 * dx, y0 + t0 * dy
+        cdx, cdy = (t1 - t0) * dx, (t1 - t0) * dy
+
+        # Sample every half pixel along each clipped segment
+        n = np.ceil(np.hypot(cdx, cdy) * 2).astype(int) + 1
+        idx = np.repeat(np.arange(len(n)), n)
+        step = np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n)
+        t = step / np.maximum(np.repeat(n, n) - 1, 1)
+        sx = cx0[idx] + t * cdx[idx]
+        sy = cy0[idx] + t * cdy[idx]
+        self._stamp(mask, sx, sy, width / 2.0)
+        return mask
+
+    @staticmethod
+    def _stamp(mask, sx, sy, radius):
+        """Stamps a disk brush of the given radius at each sample position."""
+        r = max(radius, 0.5)
+        k = int(math.ceil(r))
+        ox, oy = np.meshgrid(np.arange(-k, k + 1), np.arange(-k, k + 1))
+        inside = ox ** 2 + oy ** 2 <= r ** 2 + 0.25
+        ox, oy = ox[inside], oy[inside]
+        cols = (np.floor(sx)[:, None] + ox[None, :]).astype(int).ravel()
+        rows = (np.floor(sy)[:, None] + oy[None, :]).astype(int).ravel()
+        ok = (cols >= 0) & (cols < TILE_SIZE) & (rows >= 0) & (rows < TILE_SIZE)
+        mask[rows[ok], cols[ok]] = True
+
+    @staticmethod
+    def _composite(image, mask, color, opacity):
+        """Composites a solid color over the image where mask is set."""
+        import matplotlib.colors as mcolors
+
+        if not mask.any() or opacity <= 0:
+            return
+        rgb = np.array(mcolors.to_rgb(color))
+        dst_a = image[mask, 3]
+        out_a = opacity + dst_a * (1 - opacity)
+        out_rgb = (
+            rgb[None, :] * opacity
+            + image[mask, :3] * (dst_a * (1 - opacity))[:, None]
+        ) / out_a[:, None]
+        image[mask, :3] = out_rgb
+        image[mask, 3] = out_a
+
+    def render(self, z, x, y):
+        """Renders a single tile as an RGBA array.
+
+        Args:
+            z (int): The zoom level.
+            x (int): The tile column.
+            y (int): The tile row.
+
+        Returns:
+            np.ndarray: A (256, 256, 4) float array, or None if the tile is empty.
+        """
+        if self.bounds is None:
+            return None
+
+        scale = (2 ** z) * TILE_SIZE
+        pad = self._margin() / scale
+        minx, miny, maxx, maxy = tile_bounds(z, x, y)
+        bminx, bminy, bmaxx, bmaxy = self.bounds
+        if bminx > maxx + pad or bmaxx < minx - pad:
+            return None
+        if bminy > maxy + pad or bmaxy < miny - pad:
+            return None
+
+        origin = np.array([minx, miny, minx, miny])
+        style = self.style
+        image = _empty_tile()
+        painted = False
+
+        if style["fill"] and len(self.edges):
+            ey = self.edges[:, [1, 3]]
+            near = (ey.max(axis=1) >= miny) & (ey.min(axis=1) <= maxy)
+            # Only whole polygons may be culled so that crossings stay paired
+            overlaps = (self.fill_xmin <= maxx) & (self.fill_xmax >= minx)
+            near &= overlaps[self.edge_groups]
+            if near.any():
+                edges = (self.edges[near] - origin) * scale
+                mask = self._fill_mask(edges, self.edge_fids[near])
+                self._composite(image, mask, style["fillColor"], style["fillOpacity"])
+                painted |= mask.any()
+
+        if style["stroke"] and len(self.lines):
+            lx = self.lines[:, [0, 2]]
+            ly = self.lines[:, [1, 3]]
+            near = (
+                (lx.max(axis=1) >= minx - pad)
+                & (lx.min(axis=1) <= maxx + pad)
+                & (ly.max(axis=1) >= miny - pad)
+                & (ly.min(axis=1) <= maxy + pad)
+            )
+            if near.any():
+                segments = (self.lines[near] - origin) * scale
+                mask = self._stroke_mask(segments, style["weight"])
+                self._composite(image, mask, style["color"], style["opacity"])
+                painted |= mask.any()
+
+        if len(self.points):
+            px = (self.points[:, 0] - minx) * scale
+            py = (self.points[:, 1] - miny) * scale
+            r = style["radius"]
+            near = (px > -r) & (px < TILE_SIZE + r) & (py > -r) & (py < TILE_SIZE + r)
+            if near.any():
+                mask = np.zeros((TILE_SIZE, TILE_SIZE), dtype=bool)
+                self._stamp(mask, px[near], py[near], r)
+                self._composite(image, mask, style["fillColor"], style["fillOpacity"])
+                if style["stroke"]:
+                    self._composite(image, mask, style["color"], style["opacity"] / 2)
+                painted |= mask.any()
+
+        if not painted:
+            return None
+        return image
+
+    def get_tile(self, z, x, y):
+        """Returns a tile as PNG bytes, rendering and caching it if needed.
+
+        Args:
+            z (int): The zoom level.
+            x (int): The tile column.
+            y (int): The tile row.
+
+        Returns:
+            bytes: The PNG encoded tile.
+        """
+        with self._lock:
+            tile = self.cache.get((z, x, y))
+            if tile is not None:
+                self.cache.move_to_end((z, x, y))
+                return tile
+
+        image = self.render(z, x, y)
+        if image is None:
+            if self._empty_png is None:
+                self._empty_png = encode_png(_empty_tile())
+            tile = self._empty_png
+        else:
+            tile = encode_png(image)
+
+        with self._lock:
+            self.cache[(z, x, y)] = tile
+            while len(self.cache) > self.max_tiles:
+                self.cache.popitem(last=False)
+        return tile
+
+    def clear_cache(self, zoom=None):
+        """Clears the cached tiles.
+
+        Args:
+            zoom (int, optional): The zoom level to clear. Defaults to None, which clears all zoom levels.
+        """
+        with self._lock:
+            if zoom is None:
+                self.cache.clear()
+            else:
+                for key in [key for key in self.cache if key[0] == zoom]:
+                    del self.cache[key]
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class TileServer:
+    """A local HTTP server serving XYZ tiles from registered tile sources.
+
+    Tiles are served from ``<base_url>/<name>/{z}/{x}/{y}.png``, where each
+    source is a callable taking (z, x, y) and returning the tile bytes or None.
+
+    The base URL is the address the browser uses to reach the server. It is
+    ``http://<host>:<port>`` when the browser runs on the same machine as the
+    kernel. On JupyterHub, Binder or other remote kernels, the server is reached
+    through jupyter-server-proxy at ``<JUPYTERHUB_SERVICE_PREFIX>proxy/<port>``.
+    Any other setup can set the GEODEMO_TILE_BASE_URL environment variable,
+    where ``{port}`` is replaced by the port of the server.
+
+    Args:
+        host (str, optional): The host to bind to. Defaults to "localhost".
+        port (int, optional): The port to bind to. Defaults to 0, which picks a free port.
+        base_url (str, optional): The public base URL of the server, which may contain {port}. Defaults to None, which uses the rules above.
+    """
+
+    def __init__(self, host="localhost", port=0, base_url=None):
+        self.sources = {}
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parts = self.path.split("?")[0].strip("/").split("/")
+                tile = None
+                content_type = "image/png"
+                if len(parts) == 4 and parts[0] in server.sources:
+                    try:
+                        z, x = int(parts[1]), int(parts[2])
+                        y = int(parts[3].split(".")[0])
+                    except ValueError:
+                        z = None
+                    if z is not None:
+                        source = server.sources[parts[0]]
+                        result = source(z, x, y)
+                        if isinstance(result, tuple):
+                            tile, content_type = result
+                        else:
+                            tile = result
+
+                if tile is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(tile)))
+                self.send_header("Access-Control-Allow-Origin", "*")
+                self.end_headers()
+                self.wfile.write(tile)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = _ThreadingHTTPServer((host, port), Handler)
+        self.host = host
+        self.port = self.httpd.server_address[1]
+        self.base_url = base_url
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def base_url(self):
+        """The URL prefix the browser uses to reach the server.
+
+        Changing it only affects the URLs of the sources registered afterwards.
+        """
+        return self._base_url
+
+    @base_url.setter
+    def base_url(self, value):
+        if value is None:
+            value = os.environ.get("GEODEMO_TILE_BASE_URL")
+        prefix = os.environ.get("JUPYTERHUB_SERVICE_PREFIX")
+        if value is None and prefix:
+            value = prefix.rstrip("/") + "/proxy/{port}"
+        if value is None:
+            value = "http://{host}:{port}"
+        value = value.replace("{host}", self.host).replace("{port}", str(self.port))
+        self._base_url = value.rstrip("/")
+
+    def register(self, name, source):
+        """Registers a tile source.
+
+        Args:
+            name (str): The URL path component for the source.
+            source (callable): A function taking (z, x, y) and returning the tile bytes, a (bytes, content_type) tuple, or None.
+
+        Returns:
+            str: The XYZ URL template for the source.
+        """
+        self.sources[name] = source
+        return self.url(name)
+
+    def unregister(self, name):
+        """Removes a tile source.
+
+        Args:
+            name (str): The name of the source.
+        """
+        self.sources.pop(name, None)
+
+    def url(self, name, ext="png"):
+        """Returns the XYZ URL template for a registered source.
+
+        Args:
+            name (str): The name of the source.
+            ext (str, optional): The file extension of the tiles. Defaults to "png".
+
+        Returns:
+            str: The URL template.
+        """
+        return f"{self.base_url}/{name}/{{z}}/{{x}}/{{y}}.{ext}"
+
+    def shutdown(self):
+        """Stops the server."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+_tile_server = None
+
+
+def get_tile_server():
+    """Returns the shared local tile server, starting it if needed.
+
+    Returns:
+        TileServer: The tile server.
+    """
+    global _tile_server
+    if _tile_server is None:
+        _tile_server = TileServer()
+    return _tile_server
+
+
+class TileCache:
+    """A size-bounded on-disk least-recently-used cache of tiles.
+
+    Args:
+        cache_dir (str, optional): The directory to store the tiles in. Defaults to None, which uses ~/.cache/geodemo/tiles.
+        max_size (int, optional): The maximum total size of the cached tiles in bytes. Defaults to 512 MB.
+    """
+
+    def __init__(self, cache_dir=None, max_size=512 * 1024 * 1024):
+
+        if cache_dir is None:
+            cache_dir = os.path.expanduser("~/.cache/geodemo/tiles")
+
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_size = max_size
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+
+        existing = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                stat = entry.stat()
+                existing.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(existing):
+            self._entries[name] = size
+            self.size += size
+        self._evict()
+
+    @staticmethod
+    def _key(url):
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def get(self, url):
+        """Returns the cached tile for a URL.
+
+        Args:
+            url (str): The tile URL.
+
+        Returns:
+            bytes: The tile, or None if it is not cached.
+        """
+        key = self._key(url)
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+            os.utime(self._path(key))
+        except OSError:
+            with self._lock:
+                self.size -= self._entries.pop(key, 0)
+            return None
+        return data
+
+    def put(self, url, data):
+        """Adds a tile to the cache, evicting the least recently used tiles if needed.
+
+        Args:
+            url (str): The tile URL.
+            data (bytes): The tile.
+        """
+        key = self._key(url)
+        path = self._path(key)
+        tmp = path + "." + str(threading.get_ident()) + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+        with self._lock:
+            self.size -= self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            self.size += len(data)
+            self._evict()
+
+    def _evict(self):
+        while self.size > self.max_size and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self.size -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def __contains__(self, url):
+        return self._key(url) in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        """Removes all cached tiles."""
+        with self._lock:
+            for key in self._entries:
+                try:
+                    os.remove(self._path(key))
+                except OSError:
+                    pass
+            self._entries.clear()
+            self.size = 0
+
+
+def _content_type(data):
+    """Guesses the content type of a tile from its leading bytes."""
+    if data.startswith(b"\x89PNG"):
+        return "image/png"
+    elif data.startswith(b"\xff\xd8"):
+        return "image/jpeg"
+    elif data[8:12] == b"WEBP":
+        return "image/webp"
+    return "application/octet-stream"
+
+
+class TileProxy:
+    """A local caching proxy for remote XYZ tile services.
+
+    Tiles are served by the local tile server and fetched from upstream only on
+    a cache miss. Upstream requests run on a thread pool whose workers keep their
+    HTTP connections alive between requests, and concurrent requests for the same
+    tile share a single upstream fetch.
+
+    Args:
+        cache_dir (str, optional): The directory to store the tiles in. Defaults to None, which uses ~/.cache/geodemo/tiles.
+        max_size (int, optional): The maximum size of the disk cache in bytes. Defaults to 512 MB.
+        max_workers (int, optional): The number of concurrent upstream fetches. Defaults to 8.
+        timeout (float, optional): The upstream request timeout in seconds. Defaults to 10.
+        server (TileServer, optional): The tile server to register the proxied layers with. Defaults to None, which uses the shared tile server.
+    """
+
+    def __init__(
+        self,
+        cache_dir=None,
+        max_size=512 * 1024 * 1024,
+        max_workers=8,
+        timeout=10,
+        server=None,
+    ):
+        self.cache = TileCache(cache_dir, max_size=max_size)
+        self.timeout = timeout
+        self.server = server if server is not None else get_tile_server()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.upstream_requests = 0
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def proxy_url(self, url):
+        """Routes an XYZ URL template through the proxy.
+
+        Args:
+            url (str): The upstream URL template containing {z}, {x} and {y}.
+
+        Returns:
+            str: The local URL template serving the cached tiles.
+        """
+        name = "proxy-" + hashlib.sha1(url.encode("utf-8")).hexdigest()[:12]
+
+        def source(z, x, y):
+            tile_url = (
+                url.replace("{z}", str(z))
+                .replace("{x}", str(x))
+                .replace("{y}", str(y))
+                .replace("{s}", "a")
+            )
+            data = self.get(tile_url)
+            if data is None:
+                return None
+            return data, _content_type(data)
+
+        self.server.register(name, source)
+        path = urllib.parse.urlsplit(url).path
+        ext = os.path.splitext(path)[1].lstrip(".")
+        if "{" in ext or not ext:
+            ext = "png"
+        return self.server.url(name, ext=ext)
+
+    def get(self, url):
+        """Returns a tile from the cache, fetching it from upstream if needed.
+
+        Args:
+            url (str): The tile URL.
+
+        Returns:
+            bytes: The tile, or None if it could not be fetched.
+        """
+        data = self.cache.get(url)
+        if data is not None:
+            return data
+
+        with self._lock:
+            future = self._inflight.get(url)
+            if future is None:
+                future = Future()
+                self._inflight[url] = future
+                owner = True
+            else:
+                owner = False
+
+        if owner:
+            try:
+                data = self.executor.submit(self._fetch, url).result()
+                if data is not None:
+                    self.cache.put(url, data)
+                future.set_result(data)
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    self._inflight.pop(url, None)
+
+        try:
+            return future.result()
+        except Exception:
+            return None
+
+    def _connection(self, scheme, netloc):
+        conns = getattr(self._local, "conns", None)
+        if conns is None:
+            conns = self._local.conns = {}
+        conn = conns.get((scheme, netloc))
+        if conn is None:
+            if scheme == "https":
+                conn = http.client.HTTPSConnection(netloc, timeout=self.timeout)
+            else:
+                conn = http.client.HTTPConnection(netloc, timeout=self.timeout)
+            conns[(scheme, netloc)] = conn
+        return conn
+
+    def _fetch(self, url):
+        parts = urllib.parse.urlsplit(url)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+
+        for attempt in range(2):
+            conn = self._connection(parts.scheme, parts.netloc)
+            try:
+                with self._lock:
+                    self.upstream_requests += 1
+                conn.request("GET", path, headers={"User-Agent": "geodemo"})
+                response = conn.getresponse()
+                data = response.read()
+            except (http.client.HTTPException, OSError):
+                # Drop stale keep-alive connections and retry once
+                conn.close()
+                self._local.conns.pop((parts.scheme, parts.netloc), None)
+                if attempt:
+                    raise
+                continue
+            if response.status != 200:
+                return None
+            return data
+
+    def shutdown(self):
+        """Stops the upstream fetching threads."""
+        self.executor.shutdown(wait=False)
+
+
+_tile_proxy = None
+
+
+def get_tile_proxy():
+    """Returns the shared tile proxy, creating it if needed.
+
+    Returns:
+        TileProxy: The tile proxy.
+    """
+    global _tile_proxy
+    if _tile_proxy is None:
+        _tile_proxy = TileProxy()
+    return _tile_proxy
@@ -3,6 +3,7 @@ import ipywidgets as widgets
 from ipyleaflet import WidgetControl
 from ipyfilechooser import FileChooser
 from IPython.display import display
+from .catalog import DataCatalog
 
 
 def main_toolbar(m):
@@ -68,6 +69,12 @@ def main_toolbar(m):
     output = widgets.Output()
     output_ctrl = WidgetControl(widget=output, position="topright")
 
+    # Background layer loads show their progress below the active tool
+    progress_panel = widgets.VBox()
+    m.progress_panel = progress_panel
+    m.toolbar_output = output
+    m.toolbar_output_ctrl = output_ctrl
+
     buttons = widgets.ToggleButtons(
         value=None,
         options=["Apply", "Reset", "Close"],
@@ -78,33 +85,129 @@ def main_toolbar(m):
 
     data_dir = os.path.abspath("./data")
 
+    # The catalog describes the datasets from their headers, so choosing one
+    # shows its contents and zooms to it without parsing it
+    catalog = DataCatalog(data_dir)
+    m.catalog = catalog
+    catalog_tasks = []
+    # The dataset description shown by each tool, refreshed once the catalog is built
+    described = {}
+
+    def build_catalog():
+        if not catalog_tasks:
+            task = m._load_in_background(
+                "Catalog",
+                lambda task: catalog.build(task.update),
+                finish=lambda catalog: None,
+            )
+            # A dataset chosen while indexing was described as such
+            task.on_done(
+                lambda task: [show(chooser) for show, chooser in described.values()]
+            )
+            catalog_tasks.append(task)
+
+    def dataset_info(chooser, info, tool):
+        def show(chooser):
+            if chooser.selected is None or not os.path.isfile(chooser.selected):
+                info.value = ""
+                return
+            info.value = catalog.describe(chooser.selected)
+            try:
+                bounds = catalog.bounds(chooser.selected)
+            except (OSError, ValueError):
+                bounds = None
+            if bounds is not None:
+                m.fit_bounds(bounds)
+
+        chooser.register_callback(show)
+        described[tool] = (show, chooser)
+
     fc = FileChooser(data_dir)
     fc.use_dir_icons = True
     fc.filter_pattern = ["*.shp", "*.geojson"]
+    fc_info = widgets.HTML(layout=widgets.Layout(max_width="400px"))
+    dataset_info(fc, fc_info, "folder-open")
 
-    filechooser_widget = widgets.VBox([fc, buttons])
+    filechooser_widget = widgets.VBox([fc, fc_info, buttons])
 
     def button_click(change):
         if change["new"] == "Apply" and fc.selected is not None:
             if fc.selected.endswith(".shp"):
-                m.add_shapefile(fc.selected, layer_name="Shapefile")
+                m.add_shapefile(fc.selected, layer_name="Shapefile", background=True)
             elif fc.selected.endswith(".geojson"):
-                m.add_geojson(fc.selected, layer_name="GeoJSON")
+                m.add_geojson(fc.selected, layer_name="GeoJSON", background=True)
         elif change["new"] == "Reset":
             fc.reset()
+            fc_info.value = ""
         elif change["new"] == "Close":
             fc.reset()
+            fc_info.value = ""
             m.remove_control(output_ctrl)
             buttons.value = None
 
     buttons.observe(button_click, "value")
 
+    # Unlike the LayersControl, whose checkboxes only hide layers in the browser,
+    # the layer manager sets the visible trait, which memory management watches
+    layer_list = widgets.VBox(layout=widgets.Layout(max_height="300px"))
+    layer_links = []
+    layer_panel = {"open": False}
+
+    def refresh_layers(change=None):
+        if not layer_panel["open"]:
+            return
+        for link in layer_links:
+            link.unlink()
+        layer_links.clear()
+        old_boxes = layer_list.children
+        boxes = []
+        for layer in m.layers:
+            if not layer.has_trait("visible"):
+                continue
+            box = widgets.Checkbox(
+                value=layer.visible,
+                description=layer.name or type(layer).__name__,
+                indent=False,
+                layout=widgets.Layout(width="240px"),
+            )
+            layer_links.append(widgets.link((box, "value"), (layer, "visible")))
+            boxes.append(box)
+        layer_list.children = boxes
+        for box in old_boxes:
+            box.close()
+
+    layer_close = widgets.Button(
+        description="Close", button_style="primary", layout=widgets.Layout(width="80px")
+    )
+
+    def layer_close_click(b):
+        layer_panel["open"] = False
+        m.remove_control(output_ctrl)
+
+    layer_close.on_click(layer_close_click)
+    layer_manager = widgets.VBox([widgets.Label("Layers"), layer_list, layer_close])
+    m.layer_manager = layer_manager
+    m.observe(refresh_layers, names="layers")
+
+    def show_output():
+        # Another tool may already have opened the panel
+        if output_ctrl not in m.controls:
+            m.add_control(output_ctrl)
+
     def tool_click(b):
         with output:
             output.clear_output()
+            layer_panel["open"] = b.icon == "map"
+            if b.icon in ("folder-open", "map-marker"):
+                build_catalog()
+
             if b.icon == "folder-open":
                 display(filechooser_widget)
-                m.add_control(output_ctrl)
+                show_output()
+            elif b.icon == "map":
+                display(layer_manager)
+                show_output()
+                refresh_layers()
             elif b.icon == "gears":
                 import whiteboxgui.whiteboxgui as wbt
 
@@ -126,6 +229,8 @@ def main_toolbar(m):
                 fc = FileChooser(data_dir)
                 fc.use_dir_icons = True
                 fc.filter_pattern = ["*.csv"]
+                csv_info = widgets.HTML(layout=widgets.Layout(max_width="400px"))
+                dataset_info(fc, csv_info, "map-marker")
 
                 x_widget = widgets.Dropdown(
                     description="X:",
@@ -161,10 +266,10 @@ def main_toolbar(m):
 
                 def btn_click(change):
                     if change["new"] == "Read data" and fc.selected is not None:
-                        import pandas as pd
-
-                        df = pd.read_csv(fc.selected)
-                        col_names = df.columns.values.tolist()
+                        col_names = [
+                            name
+                            for name, _ in catalog.get(fc.selected).get("fields", [])
+                        ]
                         x_widget.options = col_names
                         y_widget.options = col_names
                         label_widget.options = col_names
@@ -187,6 +292,7 @@ def main_toolbar(m):
                                 y=y_widget.value,
                                 label=label_widget.value,
                                 layer_name=layer_widget.value,
+                                background=True,
                             )
 
                     elif change["new"] == "Close":
@@ -198,6 +304,7 @@ def main_toolbar(m):
                 csv_widget = widgets.VBox(
                     [
                         fc,
+                        csv_info,
                         widgets.HBox([x_widget, y_widget]),
                         label_widget,
                         layer_widget,
@@ -206,7 +313,9 @@ def main_toolbar(m):
                 )
 
                 display(csv_widget)
-                m.add_control(output_ctrl)
+                show_output()
+
+            display(progress_panel)
 
     for i in range(rows):
         for j in range(cols):
@@ -0,0 +1,347 @@
+"""A module for encoding polygon layers with shared boundaries as TopoJSON.
+"""
+
+import math
+import numpy as np
+
+
+def is_topology(data):
+    """Checks whether a dictionary is a TopoJSON topology.
+
+    Args:
+        data (dict): The dictionary to check.
+
+    Returns:
+        bool: True if the dictionary is a TopoJSON topology.
+    """
+    return isinstance(data, dict) and data.get("type") == "Topology"
+
+
+def _iter_coordinates(geometry):
+    """Yields the coordinate arrays of a geometry."""
+    if not geometry:
+        return
+    geom_type = geometry["type"]
+    coords = geometry.get("coordinates")
+    if geom_type == "GeometryCollection":
+        for geom in geometry["geometries"]:
+            yield from _iter_coordinates(geom)
+    elif geom_type == "Point":
+        yield [coords]
+    elif geom_type in ("MultiPoint", "LineString"):
+        yield coords
+    elif geom_type in ("MultiLineString", "Polygon"):
+        yield from coords
+    elif geom_type == "MultiPolygon":
+        for polygon in coords:
+            yield from polygon
+
+
+class _ArcBuilder:
+    """Collects the lines and rings of a layer and cuts them into shared arcs."""
+
+    def __init__(self, translate, scale, quantization):
+        self.translate = translate
+        self.scale = scale
+        self.n = quantization
+        self.lines = []
+        self.closed = []
+
+    def quantize(self, coords):
+        q = np.round((np.asarray(coords, dtype=float)[:, :2] - self.translate) / self.scale)
+        return q.astype(np.int64)
+
+    def add(self, coords, closed):
+        """Registers a line or ring and returns its position, resolved by arcs()."""
+        q = self.quantize(coords)
+        # Quantization can collapse consecutive vertices onto the same point
+        keep = np.ones(len(q), dtype=bool)
+        keep[1:] = np.any(q[1:] != q[:-1], axis=1)
+        q = q[keep]
+        if closed and len(q) > 1 and np.any(q[0] != q[-1]):
+            q = np.vstack([q, q[:1]])
+        self.lines.append(q)
+        self.closed.append(closed)
+        return len(self.lines) - 1
+
+    def _junctions(self, keys):
+        """Finds the points where lines meet, split or end."""
+        points, neighbors, endpoints = [], [], []
+        for key, closed in zip(keys, self.closed):
+            if len(key) < 2:
+                endpoints.append(key)
+                continue
+            if closed:
+                ring = key[:-1]
+                prev, nxt = np.roll(ring, 1), np.roll(ring, -1)
+            else:
+                ring = key
+                prev = np.r_[-1, key[:-1]]
+                nxt = np.r_[key[1:], -1]
+                endpoints.append(key[[0, -1]])
+            points.append(ring)
+            neighbors.append(np.stack([np.minimum(prev, nxt), np.maximum(prev, nxt)], 1))
+
+        junctions = [np.concatenate(endpoints)] if endpoints else []
+        if points:
+            rows = np.column_stack([np.concatenate(points), np.concatenate(neighbors)])
+            # A point seen with more than one pair of neighbors is a junction
+            unique_rows = np.unique(rows, axis=0)
+            pts, counts = np.unique(unique_rows[:, 0], return_counts=True)
+            junctions.append(pts[counts > 1])
+        if not junctions:
+            return np.array([], dtype=np.int64)
+        return np.unique(np.concatenate(junctions))
+
+    def arcs(self):
+        """Cuts the lines into deduplicated arcs.
+
+        Returns:
+            tuple: The list of quantized arcs and, for each line, its list of arc indices.
+        """
+        keys = [q[:, 0] * self.n + q[:, 1] for q in self.lines]
+        junctions = self._junctions(keys)
+
+        arcs, index, line_arcs = [], {}, []
+        for q, key, closed in zip(self.lines, keys, self.closed):
+            is_junction = np.isin(key, junctions)
+            if closed and len(q) > 1:
+                # Rotate the ring to start at a junction, or at its smallest point
+                hits = np.flatnonzero(is_junction[:-1])
+                start = hits[0] if len(hits) else int(np.argmin(key[:-1]))
+                q = np.vstack([q[start:-1], q[: start + 1]])
+                key = np.r_[key[start:-1], key[: start + 1]]
+                is_junction = np.r_[is_junction[start:-1], is_junction[: start + 1]]
+                is_junction[[0, -1]] = True
+            cuts = np.flatnonzero(is_junction)
+            if len(cuts) < 2:
+                cuts = np.array([0, len(q) - 1])
+
+            refs = []
+            for a, b in zip(cuts[:-1], cuts[1:]):
+                forward = key[a : b + 1].tobytes()
+                if forward in index:
+                    refs.append(index[forward])
+                    continue
+                backward = key[a : b + 1][::-1].tobytes()
+                if backward in index:
+                    refs.append(~index[backward])
+                    continue
+                index[forward] = len(arcs)
+                refs.append(len(arcs))
+                arcs.append(q[a : b + 1])
+            line_arcs.append(refs)
+
+        return arcs, line_arcs
+
+
+def topology(data, name="collection", quantization=100000):
+    """Converts a GeoJSON FeatureCollection to a TopoJSON topology.
+
+    The coordinates are quantized to an integer grid. Borders shared by
+    neighboring polygons are detected by hashing the quantized points with their
+    neighbors, cut into arcs at the junctions and stored only once. The arcs are
+    delta-encoded.
+
+    Args:
+        data (dict): The GeoJSON FeatureCollection.
+        name (str, optional): The name of the object holding the features in the topology. Defaults to "collection".
+        quantization (int, optional): The number of grid steps along each axis. Defaults to 100000.
+
+    Raises:
+        ValueError: If the quantization is smaller than 2.
+
+    Returns:
+        dict: The TopoJSON topology.
+    """
+    if quantization < 2:
+        raise ValueError("quantization must be at least 2.")
+    quantization = int(quantization)
+
+    features = data["features"] if data.get("type") == "FeatureCollection" else [data]
+    coords = [
+        np.asarray(c, dtype=float)[:, :2]
+        for feature in features
+        for c in _iter_coordinates(feature.get("geometry"))
+        if len(c)
+    ]
+    if coords:
+        coords = np.vstack(coords)
+        x0, y0 = coords.min(axis=0)
+        x1, y1 = coords.max(axis=0)
+    else:
+        x0 = y0 = x1 = y1 = 0.0
+    translate = np.array([x0, y0])
+    scale = np.array(
+        [
+            (x1 - x0) / (quantization - 1) if x1 > x0 else 1.0,
+            (y1 - y0) / (quantization - 1) if y1 > y0 else 1.0,
+        ]
+    )
+    builder = _ArcBuilder(translate, scale, quantization)
+
+    def encode(geometry):
+        if not geometry:
+            return {"type": None}
+        geom_type = geometry["type"]
+        coords = geometry.get("coordinates")
+        if geom_type == "GeometryCollection":
+            return {
+                "type": geom_type,
+                "geometries": [encode(g) for g in geometry["geometries"]],
+            }
+        elif geom_type == "Point":
+            return {"type": geom_type, "coordinates": builder.quantize([coords])[0]}
+        elif geom_type == "MultiPoint":
+            return {"type": geom_type, "coordinates": builder.quantize(coords)}
+        elif geom_type == "LineString":
+            return {"type": geom_type, "arcs": builder.add(coords, False)}
+        elif geom_type == "MultiLineString":
+            return {"type": geom_type, "arcs": [builder.add(c, False) for c in coords]}
+        elif geom_type == "Polygon":
+            return {"type": geom_type, "arcs": [builder.add(r, True) for r in coords]}
+        elif geom_type == "MultiPolygon":
+            return {
+                "type": geom_type,
+                "arcs": [[builder.add(r, True) for r in p] for p in coords],
+            }
+        raise ValueError(f"Unsupported geometry type: {geom_type}")
+
+    geometries = []
+    for feature in features:
+        geometry = encode(feature.get("geometry"))
+        if feature.get("id") is not None:
+            geometry["id"] = feature["id"]
+        if feature.get("properties"):
+            geometry["properties"] = feature["properties"]
+        geometries.append(geometry)
+
+    arcs, line_arcs = builder.arcs()
+
+    def resolve(geometry):
+        if "geometries" in geometry:
+            for g in geometry["geometries"]:
+                resolve(g)
+        elif "coordinates" in geometry:
+            geometry["coordinates"] = np.asarray(geometry["coordinates"]).tolist()
+        elif geometry["type"] == "LineString":
+            geometry["arcs"] = line_arcs[geometry["arcs"]]
+        elif geometry["type"] in ("MultiLineString", "Polygon"):
+            geometry["arcs"] = [line_arcs[i] for i in geometry["arcs"]]
+        elif geometry["type"] == "MultiPolygon":
+            geometry["arcs"] = [[line_arcs[i] for i in p] for p in geometry["arcs"]]
+
+    for geometry in geometries:
+        resolve(geometry)
+
+    return {
+        "type": "Topology",
+        "bbox": [float(x0), float(y0), float(x1), float(y1)],
+        "transform": {"scale": scale.tolist(), "translate": translate.tolist()},
+        "objects": {name: {"type": "GeometryCollection", "geometries": geometries}},
+        "arcs": [np.vstack([a[:1], np.diff(a, axis=0)]).tolist() for a in arcs],
+    }
+
+
+def feature(topology, name=None):
+    """Converts an object of a TopoJSON topology back to a GeoJSON FeatureCollection.
+
+    The coordinates are rounded to the precision of the quantization grid, which
+    keeps the decoded GeoJSON small.
+
+    Args:
+        topology (dict): The TopoJSON topology.
+        name (str, optional): The name of the object to convert. Defaults to None, which uses the first object.
+
+    Raises:
+        ValueError: If the object could not be found in the topology.
+
+    Returns:
+        dict: The GeoJSON FeatureCollection.
+    """
+    objects = topology.get("objects", {})
+    if name is None:
+        name = next(iter(objects), None)
+    if name not in objects:
+        raise ValueError(f"The object {name} could not be found in the topology.")
+
+    transform = topology.get("transform")
+    if transform is not None:
+        scale = np.asarray(transform["scale"], dtype=float)
+        translate = np.asarray(transform["translate"], dtype=float)
+        decimals = max(0, math.ceil(-math.log10(scale.min()))) + 1
+    arcs = []
+    for arc in topology.get("arcs", []):
+        arc = np.asarray(arc, dtype=float)[:, :2]
+        if transform is not None:
+            arc = np.round(np.cumsum(arc, axis=0) * scale + translate, decimals)
+        arcs.append(arc.tolist())
+
+    def point(position):
+        if transform is None:
+            return list(position)
+        return np.round(np.asarray(position)[:2] * scale + translate, decimals).tolist()
+
+    def line(refs):
+        coords = []
+        for ref in refs:
+            arc = arcs[ref] if ref >= 0 else arcs[~ref][::-1]
+            coords.extend(arc[1:] if coords else arc)
+        return coords
+
+    def decode(geometry):
+        geom_type = geometry.get("type")
+        if geom_type is None:
+            return None
+        elif geom_type == "GeometryCollection":
+            return {
+                "type": geom_type,
+                "geometries": [decode(g) for g in geometry["geometries"]],
+            }
+        elif geom_type == "Point":
+            return {"type": geom_type, "coordinates": point(geometry["coordinates"])}
+        elif geom_type == "MultiPoint":
+            return {
+                "type": geom_type,
+                "coordinates": [point(p) for p in geometry["coordinates"]],
+            }
+        elif geom_type == "LineString":
+            return {"type": geom_type, "coordinates": line(geometry["arcs"])}
+        elif geom_type in ("MultiLineString", "Polygon"):
+            return {"type": geom_type, "coordinates": [line(r) for r in geometry["arcs"]]}
+        elif geom_type == "MultiPolygon":
+            return {
+                "type": geom_type,
+                "coordinates": [[line(r) for r in p] for p in geometry["arcs"]],
+            }
+        raise ValueError(f"Unsupported geometry type: {geom_type}")
+
+    obj = objects[name]
+    geometries = obj["geometries"] if obj.get("type") == "GeometryCollection" else [obj]
+    features = []
+    for geometry in geometries:
+        f = {
+            "type": "Feature",
+            "properties": geometry.get("properties", {}),
+            "geometry": decode(geometry),
+        }
+        if "id" in geometry:
+            f["id"] = geometry["id"]
+        features.append(f)
+    return {"type": "FeatureCollection", "features": features}
+
+
+def quantize(data, quantization=100000):
+    """Snaps a GeoJSON FeatureCollection to a quantization grid through a TopoJSON round trip.
+
+    Shared borders end up with identical coordinates in both neighbors, and the
+    coordinates carry no more decimals than the grid needs.
+
+    Args:
+        data (dict): The GeoJSON FeatureCollection.
+        quantization (int, optional): The number of grid steps along each axis. Defaults to 100000.
+
+    Returns:
+        dict: The quantized GeoJSON FeatureCollection.
+    """
+    return feature(topology(data, quantization=quantization))
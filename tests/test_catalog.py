@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+
+"""Tests for `catalog` module."""
+
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+import shapefile
+from geodemo import catalog
+
+
+class TestCatalog(unittest.TestCase):
+    """Tests for `catalog` module."""
+
+    def setUp(self):
+        """Set up test fixtures, if any."""
+        print("setUp")
+        self.data_dir = os.path.abspath("examples/data")
+        self.out_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Tear down test fixtures, if any."""
+        print("tearDown\n")
+        shutil.rmtree(self.out_dir)
+
+    def test_shapefile_header(self):
+        print("test_shapefile_header")
+        in_shp = os.path.join(self.data_dir, "nyc_subway_stations.shp")
+        header = catalog.read_header(in_shp)
+        with shapefile.Reader(in_shp) as sf:
+            self.assertEqual(header["count"], len(sf))
+            self.assertEqual(header["bbox"], list(sf.bbox))
+            self.assertEqual([f[0] for f in header["fields"]], [f.name for f in sf.fields[1:]])
+        minx, miny, maxx, maxy = header["wgs84_bbox"]
+        self.assertTrue(-75 < minx < maxx < -73 and 40 < miny < maxy < 41)
+
+    def test_geojson_header(self):
+        print("test_geojson_header")
+        in_geojson = os.path.join(self.data_dir, "world_cities.geojson")
+        header = catalog.read_header(in_geojson)
+        with open(in_geojson) as f:
+            data = json.load(f)
+        self.assertEqual(header["count"], len(data["features"]))
+        xs = [f["geometry"]["coordinates"][0] for f in data["features"]]
+        self.assertEqual(header["bbox"][0], min(xs))
+        self.assertEqual(header["geometry_type"], "Point")
+
+        header = catalog.read_header(os.path.join(self.data_dir, "world_cities.csv"))
+        self.assertEqual(header["count"], len(data["features"]))
+        self.assertIn("pop_max", [f[0] for f in header["fields"]])
+
+    def test_index(self):
+        print("test_index")
+        for name in ("world_cities.csv", "us_states.geojson"):
+            shutil.copy(os.path.join(self.data_dir, name), self.out_dir)
+        data_catalog = catalog.DataCatalog(self.out_dir).build()
+        self.assertEqual(len(data_catalog.entries), 2)
+        self.assertTrue(os.path.exists(data_catalog.index_file))
+
+        in_csv = os.path.join(self.out_dir, "world_cities.csv")
+        with open(in_csv, "a") as f:
+            f.write("Nowhere,XXX,0.5,0.5,1\n")
+        os.utime(in_csv, (0, 0))
+        # The persisted entry is reused until the file changes
+        reloaded = catalog.DataCatalog(self.out_dir)
+        self.assertEqual(reloaded.entries["world_cities.csv"]["count"], 1249)
+        self.assertEqual(reloaded.get(in_csv)["count"], 1250)
+        self.assertEqual(reloaded.bounds(in_csv)[0][0], -89.98289)
+
+    def test_unreadable(self):
+        print("test_unreadable")
+        in_shp = os.path.join(self.out_dir, "bad.shp")
+        with open(in_shp, "wb") as f:
+            f.write(b"not a shapefile")
+        data_catalog = catalog.DataCatalog(self.out_dir).build()
+        self.assertIn("error", data_catalog.get(in_shp))
+        self.assertIn("not a valid shapefile", data_catalog.describe(in_shp))
+        self.assertIsNone(data_catalog.bounds(in_shp))
+
+    def test_describe_while_indexing(self):
+        print("test_describe_while_indexing")
+        shutil.copy(os.path.join(self.data_dir, "us_states.geojson"), self.out_dir)
+        in_geojson = os.path.join(self.out_dir, "us_states.geojson")
+        data_catalog = catalog.DataCatalog(self.out_dir)
+        data_catalog.indexing = True
+        self.assertIn("indexing", data_catalog.describe(in_geojson))
+        self.assertIsNone(data_catalog.bounds(in_geojson))
+        self.assertEqual(data_catalog.entries, {})
+        data_catalog.build()
+        self.assertFalse(data_catalog.indexing)
+        self.assertIn("50 features", data_catalog.describe(in_geojson))
+
+
+if __name__ == '__main__':
+    unittest.main()
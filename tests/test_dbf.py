@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+
+"""Tests for `dbf` module."""
+
+import os
+import datetime
+import shutil
+import tempfile
+import unittest
+
+import shapefile
+from geodemo import dbf, geodemo
+
+
+class TestDbf(unittest.TestCase):
+    """Tests for `dbf` module."""
+
+    def setUp(self):
+        """Set up test fixtures, if any."""
+        print("setUp")
+        self.in_dbf = os.path.abspath("examples/data/nyc_subway_stations.dbf")
+        self.out_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Tear down test fixtures, if any."""
+        print("tearDown\n")
+        shutil.rmtree(self.out_dir)
+
+    def write_shapefile(self, encoding="utf-8"):
+        out_shp = os.path.join(self.out_dir, "points")
+        with shapefile.Writer(
+            out_shp, shapeType=shapefile.POINT, encoding=encoding
+        ) as w:
+            w.field("INT", "N", 10, 0)
+            w.field("REAL", "N", 12, 3)
+            w.field("DATE", "D")
+            w.field("FLAG", "L")
+            w.field("NAME", "C", 20)
+            for i in range(100):
+                w.point(i, i)
+                w.record(
+                    None if i % 10 == 0 else i - 50,
+                    None if i % 7 == 0 else i / 8,
+                    None if i % 5 == 0 else datetime.date(2000 + i, 1 + i % 12, 1 + i % 28),
+                    [True, False, None][i % 3],
+                    f"Café {i}",
+                )
+        return out_shp
+
+    def test_matches_pyshp(self):
+        print("test_matches_pyshp")
+        reader = shapefile.Reader(dbf=open(self.in_dbf, "rb"))
+        expected = [r.as_dict(date_strings=True) for r in reader.iterRecords()]
+        reader.close()
+        self.assertEqual(dbf.dbf_to_records(self.in_dbf), expected)
+
+        out_shp = self.write_shapefile()
+        with shapefile.Reader(out_shp) as reader:
+            expected = [r.as_dict(date_strings=True) for r in reader.iterRecords()]
+        records = dbf.dbf_to_records(out_shp + ".dbf")
+        self.assertEqual(records, expected)
+        self.assertIsNone(records[0]["INT"])
+        self.assertEqual(records[1]["REAL"], 0.125)
+
+        geojson = geodemo.shp_to_geojson(out_shp + ".shp")
+        self.assertEqual(geojson["features"][1]["properties"], records[1])
+
+    def test_encoding(self):
+        print("test_encoding")
+        out_shp = self.write_shapefile(encoding="cp1252")
+        with open(out_shp + ".cpg", "w") as f:
+            f.write("1252")
+        self.assertEqual(dbf.dbf_encoding(out_shp + ".dbf"), "cp1252")
+        self.assertEqual(dbf.dbf_to_records(out_shp + ".dbf")[3]["NAME"], "Café 3")
+
+    def test_dbf_to_df(self):
+        print("test_dbf_to_df")
+        df = dbf.dbf_to_df(self.write_shapefile() + ".dbf", columns=["INT", "DATE"])
+        self.assertEqual(list(df.columns), ["INT", "DATE"])
+        self.assertTrue(df["INT"].isna()[0])
+        self.assertEqual(df["DATE"][1], datetime.datetime(2001, 2, 2))
+        with self.assertRaises(ValueError):
+            dbf.dbf_to_df(self.in_dbf, columns=["MISSING"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+
+"""Tests for `export` module."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from geodemo import export
+
+
+class TestExport(unittest.TestCase):
+    """Tests for `export` module."""
+
+    def setUp(self):
+        """Set up test fixtures, if any."""
+        print("setUp")
+        self.in_shp = os.path.abspath("examples/data/us_states.shp")
+        self.out_dir = tempfile.mkdtemp()
+        self.layers = [{"data": self.in_shp, "style": {"fillColor": "#ffcc00"}}]
+
+    def tearDown(self):
+        """Tear down test fixtures, if any."""
+        print("tearDown\n")
+        shutil.rmtree(self.out_dir)
+
+    def test_extents_from_vector(self):
+        print("test_extents_from_vector")
+        extents = export.extents_from_vector(self.in_shp, "name")
+        self.assertEqual(len(extents), 50)
+        minx, miny, maxx, maxy = dict(extents)["Colorado"]
+        self.assertAlmostEqual(minx, -109.05, places=1)
+        self.assertAlmostEqual(maxy, 41.0, places=1)
+
+    def test_export_png(self):
+        print("test_export_png")
+        extents = dict(export.extents_from_vector(self.in_shp, "name"))
+        extents = {name: extents[name] for name in ["Colorado", "Kansas"]}
+        out_files = export.export_maps(
+            self.layers, extents, self.out_dir, "png", processes=2, width=200, height=150
+        )
+        self.assertEqual([os.path.basename(f) for f in out_files], ["Colorado.png", "Kansas.png"])
+        self.assertTrue(all(os.path.exists(f) for f in out_files))
+
+    def test_export_html(self):
+        print("test_export_html")
+        out_files = export.export_maps(self.layers, [(-110, 35, -100, 42)], self.out_dir)
+        with open(out_files[0]) as f:
+            self.assertIn("Colorado", f.read())
+
+    def test_export_file_names(self):
+        print("test_export_file_names")
+        extents = [
+            ("Washington", (-125, 45, -116, 49)),
+            ("Washington", (-78, 38, -76, 39)),
+            ("../a/b", (-110, 35, -100, 42)),
+            ("", (-110, 35, -100, 42)),
+        ]
+        out_files = export.export_maps(self.layers, extents, self.out_dir)
+        self.assertEqual(
+            [os.path.basename(f) for f in out_files],
+            ["Washington.html", "Washington_2.html", "_a_b.html", "map_4.html"],
+        )
+        self.assertTrue(all(os.path.dirname(f) == self.out_dir for f in out_files))
+
+    def test_export_png_holes(self):
+        print("test_export_png_holes")
+        import matplotlib.image as mpimg
+
+        outer = [[0, 0], [10, 0], [10, 10], [0, 10], [0, 0]]
+        hole = [[3, 3], [3, 7], [7, 7], [7, 3], [3, 3]]
+        polygon = {
+            "type": "Feature",
+            "properties": {},
+            "geometry": {"type": "Polygon", "coordinates": [outer, hole]},
+        }
+        layers = [{"data": {"type": "FeatureCollection", "features": [polygon]}}]
+        out_file = export.export_maps(
+            layers, [(0, 0, 10, 10)], self.out_dir, "png", width=100, height=100
+        )[0]
+        image = mpimg.imread(out_file)
+        # The hole shows the white background, the ring around it is filled
+        self.assertTrue((image[50, 50, :3] > 0.99).all())
+        self.assertFalse((image[50, 15, :3] > 0.99).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
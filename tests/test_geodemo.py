@@ -3,9 +3,15 @@
 """Tests for `geodemo` package."""
 
 
+import os
+import time
+import asyncio
+import threading
 import unittest
 
+import ipyleaflet
 from geodemo import geodemo
+from geodemo.layers import ChunkedGeoJSON
 
 
 class TestGeodemo(unittest.TestCase):
@@ -13,9 +19,193 @@ class TestGeodemo(unittest.TestCase):
 
     def setUp(self):
         """Set up test fixtures, if any."""
+        # The map toolbar browses the ./data directory
+        self.cwd = os.getcwd()
+        os.chdir(os.path.join(os.path.dirname(__file__), os.pardir, "examples"))
 
     def tearDown(self):
         """Tear down test fixtures, if any."""
+        os.chdir(self.cwd)
 
     def test_000_something(self):
         """Test something."""
+
+    def test_layer_registry(self):
+        m = geodemo.Map()
+        collection = {"type": "FeatureCollection", "features": []}
+        m.add_geojson(collection)
+        m.add_geojson(collection)
+        self.assertIsNotNone(m.find_layer("Untitled"))
+        self.assertIsNotNone(m.find_layer("Untitled (2)"))
+
+        layers = [ipyleaflet.GeoJSON(data=collection, name="Layer") for _ in range(3)]
+        m.add_layers(layers)
+        self.assertIs(m.find_layer("Layer (3)"), layers[2])
+
+        m.remove_layers(["Layer", layers[1]])
+        self.assertIsNone(m.find_layer("Layer"))
+        self.assertIs(m.find_layer("Layer (3)"), layers[2])
+
+        layers[2].name = "Renamed"
+        self.assertIs(m.find_layer("Renamed"), layers[2])
+        self.assertIsNone(m.find_layer("Layer (3)"))
+        with self.assertRaises(ipyleaflet.LayerException):
+            m.add_layer(layers[2])
+        self.assertEqual(layers[2].name, "Renamed")
+
+        m.add_layer(ipyleaflet.basemaps.OpenStreetMap.Mapnik)
+        self.assertIsInstance(m.find_layer("OpenStreetMap.Mapnik"), ipyleaflet.TileLayer)
+
+    def test_select_features(self):
+        m = geodemo.Map()
+        m.add_shapefile("data/us_states.shp", layer_name="States")
+        box = {
+            "type": "Polygon",
+            "coordinates": [[[-100, 30], [-90, 30], [-90, 40], [-100, 40], [-100, 30]]],
+        }
+        selected = m.select_features("States", box)
+        layer = m.find_layer("States")
+        index = layer.spatial_index[1]
+        m.select_features("States", box)
+        self.assertIs(layer.spatial_index[1], index)
+
+        # A new data dict invalidates the index, even if it reuses the old id
+        layer.data = {"type": "FeatureCollection", "features": layer.data["features"][:1]}
+        self.assertLess(len(m.select_features("States", box)["features"]), len(selected["features"]))
+
+        # Drawing replaces the previous highlight, but not a user layer named "Selection"
+        m.add_geojson("data/us_states.geojson", layer_name="Selection")
+        m.enable_selection("States")
+        drawn = {"type": "Feature", "properties": {}, "geometry": box}
+        m._handle_draw(m.draw_control, "created", drawn)
+        m._handle_draw(m.draw_control, "created", drawn)
+        names = [layer.name for layer in m.layers]
+        self.assertEqual(names[-2:], ["Selection", "Selection (2)"])
+        self.assertIs(m.layers[-1], m._selection_layer)
+
+    def test_layer_manager(self):
+        m = geodemo.Map()
+        m.add_shapefile("data/us_states.shp", layer_name="States")
+        m.enable_memory_management(hidden_timeout=None, memory_budget=0)
+        toolbar = m.controls[-1].widget
+        toolbar.children[0].value = True
+        grid = toolbar.children[1]
+        [b for b in grid.children if b.icon == "map"][0].click()
+
+        boxes = m.layer_manager.children[1].children
+        self.assertEqual(boxes[-1].description, "States")
+        boxes[-1].value = False
+        self.assertEqual(m.memory_report().loc[0, "state"], "offloaded")
+        boxes[-1].value = True
+        self.assertEqual(len(m.find_layer("States").data["features"]), 50)
+
+    def test_memory_management(self):
+        m = geodemo.Map()
+        m.enable_memory_management(hidden_timeout=None, memory_budget=0)
+        m.add_shapefile("data/us_states.shp", layer_name="States")
+        layer = m.find_layer("States")
+        layer.visible = False
+        path = m.memory_manager._entries[layer.model_id]["path"]
+        self.assertTrue(os.path.exists(path))
+        # Layers removed by ipyleaflet itself are unregistered too
+        m.substitute(layer, ipyleaflet.GeoJSON(name="Empty"))
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(m.memory_report()["name"].tolist(), ["Empty"])
+        with self.assertRaises(ValueError):
+            m.remove_layers(["Empty", "Missing"])
+        self.assertEqual(len(m.memory_report()), 1)
+
+        m.enable_memory_management(hidden_timeout=0.05, memory_budget=2 ** 40)
+        m.add_choropleth("data/us_states.shp", "name", scheme="categorical")
+        layer = m.find_layer("Choropleth")
+        layer.visible = False
+        time.sleep(0.1)
+        self.assertEqual(m.memory_report()["state"].tolist()[-1], "offloaded")
+        # A restyled hidden layer is offloaded again after the timeout
+        m.restyle_layer("Choropleth", cmap="Reds")
+        self.assertEqual(m.memory_report()["state"].tolist()[-1], "resident")
+        time.sleep(0.1)
+        self.assertEqual(m.memory_report()["state"].tolist()[-1], "offloaded")
+
+    def test_toolbar_tools(self):
+        m = geodemo.Map()
+        toolbar = m.controls[-1].widget
+        toolbar.children[0].value = True
+        grid = toolbar.children[1]
+        for button in grid.children:
+            # The gears tool downloads the WhiteboxTools binary on first use
+            if button.icon == "gears":
+                continue
+            # Button.click() only logs the errors of its handlers
+            for handler in button._click_handlers.callbacks:
+                handler(button)
+            self.assertIn(m.toolbar_output_ctrl, m.controls)
+
+    def test_background_load(self):
+        m = geodemo.Map()
+        task = m.add_shapefile(
+            "data/us_states.shp", layer_name="States", background=True
+        )
+        layer = task.result(60)
+        self.assertIs(m.find_layer("States"), layer)
+        self.assertEqual(len(layer.data["features"]), 50)
+
+        # Hold the worker until the task is cancelled
+        started = threading.Event()
+        release = threading.Event()
+        read_csv = geodemo._read_csv
+
+        def gated_read_csv(in_csv, progress):
+            started.set()
+            release.wait(60)
+            return read_csv(in_csv, progress)
+
+        geodemo._read_csv = gated_read_csv
+        try:
+            task = m.add_points_from_csv("data/world_cities.csv", background=True)
+            self.assertTrue(started.wait(60))
+            task.cancel()
+            release.set()
+            self.assertTrue(task.wait(60))
+        finally:
+            geodemo._read_csv = read_csv
+        self.assertEqual(task.status, "cancelled")
+        self.assertIsNone(m.find_layer("Marker cluster"))
+
+    def test_add_vectors(self):
+        m = geodemo.Map()
+        m.add_vectors(["data/us_states.shp", "data/countries.shp"], source_field="source")
+        layer = m.find_layer("Merged")
+        features = [f for chunk in layer.layers for f in chunk.data["features"]]
+        self.assertEqual(len(features), 50 + 179)
+        self.assertEqual(features[0]["properties"]["source"], "us_states.shp")
+        self.assertEqual(features[-1]["properties"]["source"], "countries.shp")
+
+        # In the background, each file is appended on the thread of the event loop
+        appends = []
+        append = ChunkedGeoJSON.append
+
+        def recording_append(layer, features):
+            appends.append((threading.current_thread(), len(features)))
+            append(layer, features)
+
+        async def run():
+            task = m.add_vectors(
+                ["data/us_states.shp", "data/countries.shp"],
+                layer_name="Background",
+                background=True,
+            )
+            while not task.done():
+                await asyncio.sleep(0.01)
+            return task
+
+        ChunkedGeoJSON.append = recording_append
+        loop = asyncio.new_event_loop()
+        try:
+            task = loop.run_until_complete(run())
+        finally:
+            loop.close()
+            ChunkedGeoJSON.append = append
+        self.assertIs(m.find_layer("Background"), task.result())
+        main = threading.current_thread()
+        self.assertEqual(appends, [(main, 50), (main, 179)])
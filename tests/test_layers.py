@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+
+"""Tests for `layers` module."""
+
+import unittest
+
+import ipyleaflet
+from geodemo import layers
+
+
+def point(i, y=0):
+    return {
+        "type": "Feature",
+        "id": i,
+        "geometry": {"type": "Point", "coordinates": [i, y]},
+        "properties": {"name": str(i)},
+    }
+
+
+class TestLayers(unittest.TestCase):
+    """Tests for `layers` module."""
+
+    def setUp(self):
+        """Set up test fixtures, if any."""
+        print("setUp")
+
+    def tearDown(self):
+        """Tear down test fixtures, if any."""
+        print("tearDown\n")
+
+    def test_append(self):
+        print("test_append")
+        layer = layers.ChunkedGeoJSON(style={"color": "red"}, chunk_size=32)
+        for i in range(100):
+            layer.append(point(i))
+        sizes = [len(chunk.data["features"]) for chunk in layer.layers]
+        self.assertEqual(sizes, [32, 32, 32, 4])
+        ids = [feature["id"] for feature in layer.data["features"]]
+        self.assertEqual(ids, list(range(100)))
+        layer.append([point(i) for i in range(100, 170)])
+        sizes = [len(chunk.data["features"]) for chunk in layer.layers]
+        self.assertEqual(sizes, [32, 32, 32, 32, 32, 10])
+
+    def test_update(self):
+        print("test_update")
+        base = ipyleaflet.GeoJSON(
+            data={"type": "FeatureCollection", "features": [point(i) for i in range(10)]},
+            name="base",
+        )
+        layer = layers.ChunkedGeoJSON.from_geojson(base, chunk_size=4)
+        self.assertNotIn(base, layer.layers)
+        self.assertEqual(len(layer.layers), 3)
+
+        layer.append([point(10)])
+        # Only the chunks holding the updated features are resent
+        resent = []
+        for chunk in layer.layers:
+            chunk.observe(lambda change: resent.append(change["owner"]), names="data")
+        layer.update([point(3, 5), point(10, 5), point(11)])
+        self.assertEqual(resent, [layer.layers[0], layer.layers[2], layer.layers[2]])
+        features = layer.data["features"]
+        self.assertEqual(len(features), 12)
+        self.assertEqual(features[3]["geometry"]["coordinates"], [3, 5])
+        self.assertEqual(features[10]["geometry"]["coordinates"], [10, 5])
+
+    def test_update_by_property(self):
+        print("test_update_by_property")
+        layer = layers.ChunkedGeoJSON(key="name")
+        layer.append([point(i) for i in range(3)])
+        layer.update(point(1, 9))
+        self.assertEqual(layer.data["features"][1]["geometry"]["coordinates"], [1, 9])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+
+"""Tests for `loader` module."""
+
+import asyncio
+import threading
+import unittest
+
+import ipywidgets as widgets
+from geodemo import loader
+
+
+class TestLoader(unittest.TestCase):
+    """Tests for `loader` module."""
+
+    def setUp(self):
+        """Set up test fixtures, if any."""
+        print("setUp")
+        self.added = []
+
+    def tearDown(self):
+        """Tear down test fixtures, if any."""
+        print("tearDown\n")
+
+    def add(self, data):
+        self.added.append(data)
+        return data
+
+    def test_load_task(self):
+        print("test_load_task")
+
+        def prepare(task):
+            for i in range(10):
+                task.update(i / 10, "Working")
+            return "layer"
+
+        task = loader.LoadTask("Layer", prepare, self.add)
+        task.start()
+        self.assertEqual(task.result(10), "layer")
+        self.assertEqual(task.status, "done")
+        self.assertEqual(self.added, ["layer"])
+        self.assertEqual(task.progress.value, 1)
+
+    def test_progress_on_loop(self):
+        print("test_progress_on_loop")
+
+        def prepare(task):
+            for i in range(10000):
+                task.update(i / 10000, f"Step {i}")
+            return "layer"
+
+        def record_thread(change):
+            changes.append(threading.current_thread())
+
+        async def run():
+            task = loader.LoadTask("Layer", prepare, self.add)
+            for widget in (task.progress, task.label):
+                widget.observe(record_thread, "value")
+            task.start()
+            while not task.done():
+                await asyncio.sleep(0.01)
+            return task
+
+        # The widgets are only updated on the thread running the event loop,
+        # and the updates are coalesced
+        changes = []
+        loop = asyncio.new_event_loop()
+        try:
+            task = loop.run_until_complete(run())
+        finally:
+            loop.close()
+        self.assertEqual(task.result(), "layer")
+        self.assertEqual(set(changes), {threading.current_thread()})
+        self.assertLess(len(changes), 10000)
+
+    def test_cancel(self):
+        print("test_cancel")
+        started = threading.Event()
+        release = threading.Event()
+        widget = widgets.HTML("layer")
+
+        def prepare(task):
+            started.set()
+            release.wait(10)
+            return widget
+
+        task = loader.LoadTask("Layer", prepare, self.add)
+        task.start()
+        started.wait(10)
+        task.cancel()
+        release.set()
+        self.assertTrue(task.wait(10))
+        self.assertEqual(task.status, "cancelled")
+        self.assertEqual(self.added, [])
+        # Widgets produced by a cancelled task are closed
+        self.assertIsNone(widget.comm)
+        with self.assertRaises(loader.LoadCancelled):
+            task.result()
+
+    def test_error(self):
+        print("test_error")
+
+        def prepare(task):
+            raise ValueError("bad data")
+
+        task = loader.LoadTask("Layer", prepare, self.add)
+        task.start()
+        self.assertTrue(task.wait(10))
+        self.assertEqual(task.status, "error")
+        self.assertIn("bad data", task.label.value)
+        with self.assertRaises(ValueError):
+            task.result()
+
+
+if __name__ == '__main__':
+    unittest.main()
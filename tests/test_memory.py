@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+
+"""Tests for `memory` module."""
+
+import os
+import json
+import asyncio
+import time
+import shutil
+import tempfile
+import unittest
+
+import ipyleaflet
+from geodemo import geodemo, memory
+
+
+class TestMemory(unittest.TestCase):
+    """Tests for `memory` module."""
+
+    def setUp(self):
+        """Set up test fixtures, if any."""
+        print("setUp")
+        self.cache_dir = tempfile.mkdtemp()
+        geojson = geodemo.shp_to_geojson(os.path.abspath("examples/data/countries.shp"))
+        self.layers = [
+            ipyleaflet.GeoJSON(data=geojson, name=name) for name in ("a", "b")
+        ]
+
+    def tearDown(self):
+        """Tear down test fixtures, if any."""
+        print("tearDown\n")
+        shutil.rmtree(self.cache_dir)
+
+    def test_hidden_timeout(self):
+        print("test_hidden_timeout")
+        manager = memory.LayerMemoryManager(hidden_timeout=0.1, cache_dir=self.cache_dir)
+        layer = self.layers[0]
+        manager.register(layer)
+        n_features = len(layer.data["features"])
+
+        async def hide():
+            layer.visible = False
+            await asyncio.sleep(0.5)
+
+        # The offload runs on the event loop
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(hide())
+        finally:
+            loop.close()
+        self.assertEqual(layer.data, memory.EMPTY)
+        self.assertEqual(len(manager.data(layer)["features"]), n_features)
+        self.assertEqual(manager.report().loc[0, "state"], "offloaded")
+
+        layer.visible = True
+        self.assertEqual(len(layer.data["features"]), n_features)
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+        # Without an event loop, the layer is offloaded the next time the manager is used
+        layer.visible = False
+        time.sleep(0.2)
+        self.assertEqual(manager.report().loc[0, "state"], "offloaded")
+
+    def test_memory_budget(self):
+        print("test_memory_budget")
+        manager = memory.LayerMemoryManager(
+            hidden_timeout=None, memory_budget=1, cache_dir=self.cache_dir
+        )
+        for layer in self.layers:
+            manager.register(layer)
+        self.layers[1].visible = False
+        self.assertEqual(self.layers[1].data, memory.EMPTY)
+        self.assertNotEqual(self.layers[0].data, memory.EMPTY)
+        self.assertEqual(manager.resident_size(), manager.report()["size_mb"][0] * 1024 ** 2)
+
+    def test_size_tracking(self):
+        print("test_size_tracking")
+        manager = memory.LayerMemoryManager(hidden_timeout=None, cache_dir=self.cache_dir)
+        layer = self.layers[0]
+        manager.register(layer)
+        exact = len(json.dumps(layer.data, separators=(",", ":")))
+        self.assertAlmostEqual(manager.resident_size() / exact, 1, delta=0.25)
+
+        layer.data = {"type": "FeatureCollection", "features": layer.data["features"][:1]}
+        self.assertEqual(manager.resident_size(), len(json.dumps(layer.data, separators=(",", ":"))))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+
+"""Tests for `merge` module."""
+
+import os
+import json
+import shutil
+import warnings
+import tempfile
+import unittest
+
+import shapefile
+from geodemo import merge
+
+
+class TestMerge(unittest.TestCase):
+    """Tests for `merge` module."""
+
+    def setUp(self):
+        """Set up test fixtures, if any."""
+        print("setUp")
+        self.data_dir = os.path.abspath("examples/data")
+        self.out_dir = tempfile.mkdtemp()
+        self.in_geojson = os.path.join(self.out_dir, "points.geojson")
+        features = [
+            {
+                "type": "Feature",
+                "properties": {"name": "a", "pop": 1, "flag": True},
+                "geometry": {"type": "Point", "coordinates": [-73.9, 40.7]},
+            },
+            {
+                "type": "Feature",
+                "properties": {"name": "b", "pop": 2.5},
+                "geometry": {"type": "Point", "coordinates": [-74.0, 40.8]},
+            },
+        ]
+        with open(self.in_geojson, "w") as f:
+            json.dump({"type": "FeatureCollection", "features": features}, f)
+
+    def tearDown(self):
+        """Tear down test fixtures, if any."""
+        print("tearDown\n")
+        shutil.rmtree(self.out_dir)
+
+    def test_expand_inputs(self):
+        print("test_expand_inputs")
+        paths = merge.expand_inputs(
+            [os.path.join(self.data_dir, "*.shp"), os.path.join(self.data_dir, "us_states.shp")]
+        )
+        self.assertEqual(paths, sorted(paths))
+        self.assertEqual(len(paths), len(set(paths)))
+        with self.assertRaises(FileNotFoundError):
+            merge.expand_inputs("missing.shp")
+        with self.assertRaises(ValueError):
+            merge.expand_inputs(os.path.join(self.data_dir, "*.gpkg"))
+
+    def test_merge_schema(self):
+        print("test_merge_schema")
+        in_shp = os.path.join(self.data_dir, "nyc_subway_stations.shp")
+        fields = merge.merge_schema([in_shp, self.in_geojson])
+        names = [f["name"] for f in fields]
+        with shapefile.Reader(in_shp) as sf:
+            self.assertEqual(names[: len(sf.fields) - 1], [f.name for f in sf.fields[1:]])
+        # name matches the NAME field of the shapefile and the new fields come last
+        self.assertEqual(names[-2:], ["pop", "flag"])
+        self.assertEqual(fields[-2]["type"], "float")
+        self.assertEqual(fields[-1]["type"], "bool")
+        self.assertEqual(len(merge.merge_schema([in_shp, self.in_geojson], case_sensitive=True)), len(fields) + 1)
+
+    def test_source_schema(self):
+        print("test_source_schema")
+        # The schema is read from the headers, without reading the features twice
+        self.assertEqual(
+            merge._source_schema(os.path.join(self.data_dir, "us_states.zip")),
+            merge._source_schema(os.path.join(self.data_dir, "us_states.shp")),
+        )
+        with open(self.in_geojson) as f:
+            data = json.load(f)
+        data["crs"] = {"type": "name", "properties": {"name": "urn:ogc:def:crs:OGC:1.3:CRS84"}}
+        with open(self.in_geojson, "w") as f:
+            json.dump(data, f)
+        fields = merge._source_schema(self.in_geojson)
+        self.assertEqual([f["name"] for f in fields], ["name", "pop", "flag"])
+        self.assertEqual(fields[1]["type"], "float")
+
+    def test_merge_vectors(self):
+        print("test_merge_vectors")
+        inputs = [
+            os.path.join(self.data_dir, "us_states.shp"),
+            os.path.join(self.data_dir, "countries.shp"),
+            os.path.join(self.data_dir, "us_states.zip"),
+        ]
+        data = merge.merge_vectors(inputs, source_field="source")
+        sources = [f["properties"]["source"] for f in data["features"]]
+        self.assertEqual(sources.count("countries.shp"), 179)
+        self.assertEqual(sources.count("us_states.zip"), sources.count("us_states.shp"))
+        self.assertEqual(sources, sorted(sources, key=[os.path.basename(p) for p in inputs].index))
+        self.assertEqual(merge.merge_vectors(inputs, source_field="source", processes=2), data)
+
+        out_geojson = os.path.join(self.out_dir, "merged.geojson")
+        merge.merge_vectors(inputs, out_geojson, source_field="source")
+        with open(out_geojson) as f:
+            self.assertEqual(json.load(f), json.loads(json.dumps(data)))
+
+        out_shp = os.path.join(self.out_dir, "merged.shp")
+        merge.merge_vectors(inputs, out_shp, source_field="source")
+        self.assertTrue(os.path.exists(os.path.join(self.out_dir, "merged.prj")))
+        with shapefile.Reader(out_shp) as sf:
+            self.assertEqual(len(sf), len(data["features"]))
+            self.assertEqual(sf.record(0).as_dict(), data["features"][0]["properties"])
+
+    def test_widen_to_text(self):
+        print("test_widen_to_text")
+        inputs = []
+        for i, properties in enumerate([{"v": True, "n": 0.1 + 0.2}, {"v": "x", "n": "y"}]):
+            inputs.append(os.path.join(self.out_dir, f"{i}.geojson"))
+            feature = {
+                "type": "Feature",
+                "properties": properties,
+                "geometry": {"type": "Point", "coordinates": [i, i]},
+            }
+            with open(inputs[-1], "w") as f:
+                json.dump({"type": "FeatureCollection", "features": [feature]}, f)
+
+        # A field widened to text is wide enough for the text of the booleans and numbers
+        fields = merge.merge_schema(inputs)
+        self.assertEqual([(f["type"], f["size"]) for f in fields], [("str", 5), ("str", 24)])
+        out_shp = os.path.join(self.out_dir, "text.shp")
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            merge.merge_vectors(inputs, out_shp)
+        self.assertEqual(caught, [])
+        with shapefile.Reader(out_shp) as sf:
+            self.assertEqual(sf.record(0).as_dict(), {"v": "True", "n": str(0.1 + 0.2)})
+
+    def test_merge_mixed_geometries(self):
+        print("test_merge_mixed_geometries")
+        inputs = [os.path.join(self.data_dir, "us_states.shp"), self.in_geojson]
+        out_shp = os.path.join(self.out_dir, "mixed.shp")
+        with self.assertRaises(ValueError):
+            merge.merge_vectors(inputs, out_shp)
+        self.assertFalse(os.path.exists(out_shp))
+
+        out_shp = os.path.join(self.out_dir, "points.shp")
+        merge.merge_vectors(
+            [os.path.join(self.data_dir, "nyc_subway_stations.shp"), self.in_geojson], out_shp
+        )
+        with shapefile.Reader(out_shp) as sf:
+            record = sf.record(len(sf) - 1).as_dict()
+        self.assertEqual(record["NAME"], "b")
+        self.assertEqual(record["pop"], 2.5)
+        self.assertEqual(record["LABEL"], "")
+        self.assertIsNone(record["flag"])
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+
+"""Tests for `spatial` module."""
+
+import os
+import unittest
+
+import numpy as np
+from geodemo import geodemo, spatial
+
+
+class TestSpatial(unittest.TestCase):
+    """Tests for `spatial` module."""
+
+    def setUp(self):
+        """Set up test fixtures, if any."""
+        print("setUp")
+        self.in_shp = os.path.abspath("examples/data/us_states.shp")
+        self.box = {
+            "type": "Polygon",
+            "coordinates": [[[-105, 35], [-95, 35], [-95, 42], [-105, 42], [-105, 35]]],
+        }
+
+    def tearDown(self):
+        """Tear down test fixtures, if any."""
+        print("tearDown\n")
+
+    def test_points_in_polygon(self):
+        print("test_points_in_polygon")
+        edges = spatial.polygon_edges(self.box)
+        inside = spatial.points_in_polygon([-100, -90, -104.9], [40, 40, 41.9], edges)
+        self.assertEqual(inside.tolist(), [True, False, True])
+
+    def test_query_points(self):
+        print("test_query_points")
+        x = np.random.uniform(-180, 180, 10000)
+        y = np.random.uniform(-85, 85, 10000)
+        index = spatial.SpatialIndex.from_points(x, y)
+        expected = np.flatnonzero((x > -105) & (x < -95) & (y > 35) & (y < 42))
+        np.testing.assert_array_equal(index.query(self.box), expected)
+
+    def test_query_polygons(self):
+        print("test_query_polygons")
+        geojson = geodemo.shp_to_geojson(self.in_shp)
+        index = spatial.SpatialIndex(geojson)
+
+        def names(indices):
+            return sorted(geojson["features"][i]["properties"]["name"] for i in indices)
+
+        self.assertIn("Texas", names(index.query(self.box)))
+        self.assertEqual(names(index.query(self.box, "within")), [])
+
+        small = {
+            "type": "Polygon",
+            "coordinates": [[[-100, 39], [-99.9, 39], [-99.9, 39.1], [-100, 39]]],
+        }
+        self.assertEqual(names(index.query(small)), ["Kansas"])
+
+    def test_str_tree(self):
+        print("test_str_tree")
+        corners = np.random.uniform(0, 100, (500, 2))
+        bounds = np.hstack([corners, corners + 5])
+        tree = spatial.STRTree(bounds)
+        x = np.random.uniform(0, 100, 200)
+        y = np.random.uniform(0, 100, 200)
+        pts, boxes = tree.query_points(x, y)
+        expected = {
+            (i, j)
+            for i in range(len(x))
+            for j in np.flatnonzero(
+                (bounds[:, 0] <= x[i])
+                & (bounds[:, 2] >= x[i])
+                & (bounds[:, 1] <= y[i])
+                & (bounds[:, 3] >= y[i])
+            )
+        }
+        self.assertEqual(set(zip(pts.tolist(), boxes.tolist())), expected)
+
+    def test_spatial_join(self):
+        print("test_spatial_join")
+        in_csv = os.path.abspath("examples/data/world_cities.csv")
+        in_shp = os.path.abspath("examples/data/countries.shp")
+        joined = geodemo.spatial_join(in_csv, in_shp, chunk_size=500)
+        self.assertIn("name_right", joined.columns)
+        self.assertEqual(joined.loc[0, "name_right"], "Uganda")
+
+        counts = geodemo.spatial_join(in_csv, in_shp, how="count", processes=2)
+        self.assertEqual(counts["count"].sum(), joined["name_right"].notna().sum())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+
+"""Tests for `style` module."""
+
+import os
+import unittest
+
+from geodemo import geodemo, style
+
+
+class TestStyle(unittest.TestCase):
+    """Tests for `style` module."""
+
+    def setUp(self):
+        """Set up test fixtures, if any."""
+        print("setUp")
+        self.in_shp = os.path.abspath("examples/data/us_states.shp")
+
+    def tearDown(self):
+        """Tear down test fixtures, if any."""
+        print("tearDown\n")
+
+    def test_quantiles(self):
+        print("test_quantiles")
+        values = list(range(1, 11)) + [None]
+        classification = style.Classification(values, "quantiles", k=5)
+        self.assertEqual(classification.classes.tolist(), [0, 0, 1, 1, 2, 2, 3, 3, 4, 4, -1])
+        colors = classification.colors(["red", "blue"], missing_color="#000000")
+        self.assertEqual(colors[-1], "#000000")
+        self.assertEqual(len(classification.legend()), 5)
+
+    def test_equal_interval(self):
+        print("test_equal_interval")
+        classification = style.Classification([0, 1, 9, 10], "equal_interval", k=2)
+        self.assertEqual(classification.classes.tolist(), [0, 0, 1, 1])
+        with self.assertRaises(ValueError):
+            style.Classification([0, 1], "natural_breaks")
+
+    def test_style_features(self):
+        print("test_style_features")
+        geojson = geodemo.shp_to_geojson(self.in_shp)
+        values = style.column_values(geojson, "name")
+        classification = style.Classification(values, "categorical")
+        self.assertEqual(classification.k, len(set(values)))
+
+        styled = style.style_features(
+            geojson, classification.colors("tab20"), {"weight": 1}
+        )
+        feature_style = styled["features"][0]["properties"]["style"]
+        self.assertEqual(feature_style["weight"], 1)
+        self.assertTrue(feature_style["fillColor"].startswith("#"))
+        self.assertNotIn("style", geojson["features"][0]["properties"])
+
+
+if __name__ == '__main__':
+    unittest.main()
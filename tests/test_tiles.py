@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+
+"""Tests for `tiles` module."""
+
+import os
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+import urllib.request
+
+from geodemo import geodemo, tiles
+
+
+class TestTiles(unittest.TestCase):
+    """Tests for `tiles` module."""
+
+    def setUp(self):
+        """Set up test fixtures, if any."""
+        print("setUp")
+        self.in_shp = os.path.abspath("examples/data/countries.shp")
+        self.style = {
+            "color": "#000000",
+            "weight": 1,
+            "fillColor": "#0000ff",
+            "fillOpacity": 0.4,
+        }
+
+    def tearDown(self):
+        """Tear down test fixtures, if any."""
+        print("tearDown\n")
+
+    def _fake_upstream(self, delay=0):
+        server = tiles.TileServer()
+        calls = []
+
+        def source(z, x, y):
+            calls.append((z, x, y))
+            time.sleep(delay)
+            return b"\x89PNG" + bytes(1000)
+
+        url = server.register("fake", source)
+        return server, url, calls
+
+    def test_render_polygon(self):
+        print("test_render_polygon")
+        square = {
+            "type": "Polygon",
+            "coordinates": [[[-90, -45], [90, -45], [90, 45], [-90, 45], [-90, -45]]],
+        }
+        renderer = tiles.VectorTileRenderer(square, style={"stroke": False})
+        image = renderer.render(0, 0, 0)
+        self.assertEqual(image.shape, (256, 256, 4))
+        self.assertGreater(image[128, 128, 3], 0)
+        self.assertEqual(image[5, 5, 3], 0)
+        self.assertIsNone(renderer.render(3, 7, 0))
+
+    def test_get_tile_cached(self):
+        print("test_get_tile_cached")
+        geojson = geodemo.shp_to_geojson(self.in_shp)
+        renderer = tiles.VectorTileRenderer(geojson, style=self.style)
+        tile = renderer.get_tile(1, 0, 0)
+        self.assertTrue(tile.startswith(b"\x89PNG"))
+        self.assertIs(renderer.get_tile(1, 0, 0), tile)
+        renderer.clear_cache(1)
+        self.assertNotIn((1, 0, 0), renderer.cache)
+
+        renderer = tiles.VectorTileRenderer(geojson, style=self.style, max_tiles=2)
+        for x in range(4):
+            renderer.get_tile(2, x, 1)
+        self.assertEqual(list(renderer.cache), [(2, 2, 1), (2, 3, 1)])
+
+    def test_tile_server_base_url(self):
+        print("test_tile_server_base_url")
+        server = tiles.TileServer(base_url="/user/me/proxy/{port}/")
+        try:
+            self.assertEqual(
+                server.url("a"), f"/user/me/proxy/{server.port}/a/{{z}}/{{x}}/{{y}}.png"
+            )
+            os.environ["GEODEMO_TILE_BASE_URL"] = "https://tiles.example.org"
+            try:
+                server.base_url = None
+            finally:
+                del os.environ["GEODEMO_TILE_BASE_URL"]
+            self.assertEqual(server.register("b", lambda z, x, y: None)[:30], "https://tiles.example.org/b/{z")
+        finally:
+            server.shutdown()
+
+    def test_vector_tile_layer(self):
+        print("test_vector_tile_layer")
+        geojson = geodemo.shp_to_geojson(self.in_shp)
+        layer = geodemo.vector_tile_layer(geojson, style=self.style, name="Countries")
+        data = urllib.request.urlopen(layer.url.format(z=0, x=0, y=0)).read()
+        self.assertTrue(data.startswith(b"\x89PNG"))
+
+    def test_tile_cache_lru(self):
+        print("test_tile_cache_lru")
+        cache_dir = tempfile.mkdtemp()
+        try:
+            cache = tiles.TileCache(cache_dir, max_size=2500)
+            cache.put("a", bytes(1000))
+            cache.put("b", bytes(1000))
+            self.assertIsNotNone(cache.get("a"))
+            cache.put("c", bytes(1000))
+            self.assertIn("a", cache)
+            self.assertNotIn("b", cache)
+            self.assertEqual(len(tiles.TileCache(cache_dir, max_size=2500)), 2)
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def test_tile_proxy(self):
+        print("test_tile_proxy")
+        upstream, upstream_url, calls = self._fake_upstream(delay=0.2)
+        cache_dir = tempfile.mkdtemp()
+        try:
+            proxy = tiles.TileProxy(cache_dir)
+            url = proxy.proxy_url(upstream_url).format(z=3, x=1, y=2)
+
+            results = []
+            threads = [
+                threading.Thread(
+                    target=lambda: results.append(urllib.request.urlopen(url).read())
+                )
+                for _ in range(5)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            self.assertEqual(len(results), 5)
+            self.assertEqual(calls, [(3, 1, 2)])
+            self.assertEqual(urllib.request.urlopen(url).read(), results[0])
+            self.assertEqual(proxy.upstream_requests, 1)
+            proxy.shutdown()
+        finally:
+            upstream.shutdown()
+            shutil.rmtree(cache_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
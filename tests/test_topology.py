@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+
+"""Tests for `topology` module."""
+
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from geodemo import geodemo, topology
+
+
+class TestTopology(unittest.TestCase):
+    """Tests for `topology` module."""
+
+    def setUp(self):
+        """Set up test fixtures, if any."""
+        print("setUp")
+        self.in_shp = os.path.abspath("examples/data/us_states.shp")
+        # Two squares sharing the edge x = 1
+        self.squares = {
+            "type": "FeatureCollection",
+            "features": [
+                {
+                    "type": "Feature",
+                    "id": i,
+                    "properties": {"name": f"square {i}"},
+                    "geometry": {
+                        "type": "Polygon",
+                        "coordinates": [
+                            [[i, 0], [i + 1, 0], [i + 1, 1], [i, 1], [i, 0]]
+                        ],
+                    },
+                }
+                for i in range(2)
+            ],
+        }
+
+    def tearDown(self):
+        """Tear down test fixtures, if any."""
+        print("tearDown\n")
+
+    def test_shared_arcs(self):
+        print("test_shared_arcs")
+        topo = topology.topology(self.squares, quantization=3)
+        self.assertTrue(topology.is_topology(topo))
+        # The shared edge is stored once and referenced by both squares
+        self.assertEqual(len(topo["arcs"]), 3)
+        left, right = topo["objects"]["collection"]["geometries"]
+        shared = set(left["arcs"][0]) & {~i for i in right["arcs"][0]}
+        self.assertEqual(len(shared), 1)
+
+        back = topology.feature(topo)
+        self.assertEqual(back["features"][1]["id"], 1)
+        self.assertEqual(back["features"][0]["properties"], {"name": "square 0"})
+        ring = back["features"][0]["geometry"]["coordinates"][0]
+        self.assertEqual(len(ring), 5)
+        self.assertEqual(ring[0], ring[-1])
+        self.assertEqual(
+            sorted(map(tuple, ring[:-1])), [(0, 0), (0, 1), (1, 0), (1, 1)]
+        )
+
+    def test_shp_to_topojson(self):
+        print("test_shp_to_topojson")
+        geojson = geodemo.shp_to_geojson(self.in_shp)
+        topo = geodemo.shp_to_geojson(self.in_shp, topojson=True)
+        self.assertIn("us_states", topo["objects"])
+        self.assertLess(len(json.dumps(topo)), len(json.dumps(geojson)) / 2)
+
+        out_dir = tempfile.mkdtemp()
+        try:
+            out_file = os.path.join(out_dir, "us_states.json")
+            geodemo.shp_to_geojson(self.in_shp, out_file, topojson=True)
+            decoded = geodemo._read_vector(out_file)
+            self.assertEqual(len(decoded["features"]), len(geojson["features"]))
+            self.assertEqual(
+                decoded["features"][0]["properties"],
+                geojson["features"][0]["properties"],
+            )
+        finally:
+            shutil.rmtree(out_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()